@@ -29,9 +29,18 @@ except Exception as e:
 
 
 # Define a temporary image path
-TEMP_IMAGE_DIR = "temp_screenshots"
+# RAM-backed /dev/shm where available; BMP since it is written uncompressed (no PNG/JPEG encode)
+TEMP_IMAGE_DIR = "/dev/shm/temp_screenshots" if os.path.isdir("/dev/shm") else "temp_screenshots"
 os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
-TEMP_IMAGE_PATH = os.path.join(TEMP_IMAGE_DIR, "initial_calculator_state.png")
+# pid suffix keeps concurrent agents apart; the frame is removed as soon as the pipeline has read it
+TEMP_IMAGE_PATH = os.path.join(TEMP_IMAGE_DIR, f"initial_calculator_state_{os.getpid()}.bmp")
+
+def remove_temp_image():
+    """Delete this process's screenshot - an uncompressed full-res frame in RAM-backed /dev/shm"""
+    try:
+        os.unlink(TEMP_IMAGE_PATH)
+    except FileNotFoundError:
+        pass
 
 async def run_cv_pipeline_on_image_path(image_path: str) -> list[dict]:
     detected_elements = await process_os_image(image_path=image_path)
@@ -284,7 +293,10 @@ async def main_task():
                 cv2.imwrite(TEMP_IMAGE_PATH, frame_bgr)
                 print(f"  Initial screenshot saved to: {TEMP_IMAGE_PATH}")
 
-                all_detected_elements = await run_cv_pipeline_on_image_path(TEMP_IMAGE_PATH)
+                try:
+                    all_detected_elements = await run_cv_pipeline_on_image_path(TEMP_IMAGE_PATH)
+                finally:
+                    remove_temp_image()
                 if all_detected_elements:
                     print(f"  CV Pipeline successful. Found {len(all_detected_elements)} elements.")
                     cv_pipeline_run_successfully = True
@@ -5,14 +5,18 @@ Equivalent to the Windows window_manager.py but using macOS APIs
 """
 
 import time
+import io
 import json
 import hashlib
 import os
-import getpass
+import pwd
+import socket
 import ctypes
 from typing import List, Dict, Optional, Tuple, Any
 import subprocess
 import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 # macOS-specific imports
 try:
@@ -48,25 +52,11 @@ try:
     except ImportError:
         CGEventSetLocation = None
     
-    from AppKit import (
-        NSWorkspace, NSApplication, NSScreen, NSWindow, NSApp,
-        NSApplicationActivateIgnoringOtherApps, NSRunningApplication,
-        NSWorkspaceDidActivateApplicationNotification, NSNotificationCenter,
-        NSAlert, NSInformationalAlertStyle, NSModalResponseOK, NSCursor,
-        NSEvent
-    )
-    
-    from Foundation import (
-        NSString, NSArray, NSDictionary, NSNumber, NSDate, NSBundle,
-        NSProcessInfo, NSHost, NSFileManager, NSHomeDirectory, NSURL,
-        NSUserDefaults, NSTimer, NSRunLoop, NSDefaultRunLoopMode, NSValue
-    )
+    # AppKit/Foundation symbols are imported inside the methods that need them
+    from CoreFoundation import CFArrayGetCount, CFArrayGetValueAtIndex
     
-    import objc
-    from CoreFoundation import (
-        CFArrayGetCount, CFArrayGetValueAtIndex, CFStringRef,
-        CFNumberRef, CFDictionaryRef, CFArrayRef
-    )
+    # Options used for every on-screen window snapshot
+    ONSCREEN_WINDOW_OPTIONS = kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements
     
     MACOS_APIS_AVAILABLE = True
     
@@ -77,7 +67,7 @@ except ImportError as e:
     # Create dummy objects to prevent import errors
     class DummyClass:
         pass
-    Quartz = AppKit = Foundation = objc = DummyClass()
+    Quartz = DummyClass()
 
 # Accessibility API imports
 try:
@@ -88,13 +78,150 @@ try:
         kAXPositionAttribute, kAXSizeAttribute, kAXWindowsAttribute, kAXFocusedWindowAttribute,
         kAXMinimizedAttribute, kAXMainAttribute, kAXChildrenAttribute, kAXParentAttribute,
         AXUIElementSetAttributeValue, kAXRaisedAttribute, AXUIElementPerformAction,
-        kAXRaiseAction, kAXPressAction, AXIsProcessTrusted, AXUIElementCopyParameterizedAttributeNames
+        kAXRaiseAction, kAXPressAction, AXIsProcessTrusted, AXUIElementCopyParameterizedAttributeNames,
+        AXValueGetValue, kAXValueCGPointType, kAXValueCGSizeType
     )
     ACCESSIBILITY_AVAILABLE = True
 except ImportError:
     print("Warning: Accessibility APIs not available")
     ACCESSIBILITY_AVAILABLE = False
 
+try:
+    from ApplicationServices import kAXErrorInvalidUIElement
+except ImportError:
+    kAXErrorInvalidUIElement = -25202
+
+try:
+    from ApplicationServices import AXUIElementSetMessagingTimeout
+except ImportError:
+    AXUIElementSetMessagingTimeout = None
+
+try:
+    from ApplicationServices import (
+        AXUIElementCopyMultipleAttributeValues, AXValueGetType, AXValueGetTypeID,
+        kAXValueAXErrorType
+    )
+    from CoreFoundation import CFGetTypeID
+except ImportError:
+    AXUIElementCopyMultipleAttributeValues = None
+
+# (property name, AX attribute) pairs read by _get_element_properties, in fetch order
+ELEMENT_PROPERTY_ATTRIBUTES = (
+    ('role', 'AXRole'),
+    ('title', 'AXTitle'),
+    ('description', 'AXDescription'),
+    ('role_description', 'AXRoleDescription'),
+    ('position', 'AXPosition'),
+    ('size', 'AXSize'),
+    ('enabled', 'AXEnabled'),
+    ('focusable', 'AXFocusable'),
+    ('minimized', 'AXMinimized'),
+)
+ELEMENT_ATTRIBUTE_NAMES = [attribute for _, attribute in ELEMENT_PROPERTY_ATTRIBUTES]
+
+# Longest an introspection AX request may block on an unresponsive app (default is ~6s)
+AX_MESSAGING_TIMEOUT = 0.15
+
+def _ax_bounded(element, timeout: float = AX_MESSAGING_TIMEOUT):
+    """Cap how long AX requests to this element may block; returns the element"""
+    if element and AXUIElementSetMessagingTimeout is not None:
+        try:
+            AXUIElementSetMessagingTimeout(element, timeout)
+        except Exception:
+            pass
+    return element
+
+def _ax_value(value, value_type):
+    """Unpack an AXValue (point/size) in one call; None if it holds another type"""
+    ok, unpacked = AXValueGetValue(value, value_type, None)
+    return unpacked if ok else None
+
+def _is_ax_error_value(value) -> bool:
+    """True for the AXValue placeholders AXUIElementCopyMultipleAttributeValues returns on failure"""
+    if value is None:
+        return True
+    return CFGetTypeID(value) == AXValueGetTypeID() and AXValueGetType(value) == kAXValueAXErrorType
+
+# Report separators
+_HR = "=" * 80
+_HR_THIN = "-" * 60
+_HR_SHORT = "=" * 50
+
+# print_structured_output row templates (filled with str.format_map)
+_REPORT_HDR = _HR + "\nMAC WINDOW MANAGER - {total_windows} windows across {total_displays} displays\n" + _HR + "\n"
+_DISPLAY_HDR = ("\n🖥️  DISPLAY {id}{main}\n"
+                "   Resolution: {width}x{height}\n"
+                "   Origin: ({x}, {y})\n"
+                "   Windows: {count}\n" + _HR_THIN + "\n")
+_APP_HDR = "\n   📱 {app}\n      Total: {tot} | Visible: {vis} | Minimized: {min}\n"
+_VISIBLE_ROW = ("      ├─ 👁️  {title}\n"
+                "      │   ID: {window_id}\n"
+                "      │   Position: ({x}, {y})\n"
+                "      │   Size: {width}x{height}\n")
+_MINIMIZED_ROW = "      ├─ 📦 {title} (minimized)\n      │   ID: {window_id}\n"
+
+def _short_title(title: str, limit: int = 50) -> str:
+    """Truncate a window title for tree output"""
+    return title[:limit] + "..." if len(title) > limit else title
+
+# Window list snapshots younger than this are reused across lookups
+WINDOW_LIST_CACHE_TTL = 0.05
+
+# Worker threads used by introspect_pids
+INTROSPECT_MAX_WORKERS = 8
+
+# Running-application lookups are served from a snapshot at most this old
+RUNNING_APPS_CACHE_TTL = 1.0
+
+# CGEventKeyboardSetUnicodeString only honours this many UTF-16 units per event
+UNICODE_EVENT_MAX_UNITS = 20
+
+# US-layout virtual key codes (Carbon HIToolbox Events.h) for typing ASCII text
+_BASE_KEYCODES = {
+    'a': 0x00, 's': 0x01, 'd': 0x02, 'f': 0x03, 'h': 0x04, 'g': 0x05, 'z': 0x06, 'x': 0x07,
+    'c': 0x08, 'v': 0x09, 'b': 0x0B, 'q': 0x0C, 'w': 0x0D, 'e': 0x0E, 'r': 0x0F, 'y': 0x10,
+    't': 0x11, '1': 0x12, '2': 0x13, '3': 0x14, '4': 0x15, '6': 0x16, '5': 0x17, '=': 0x18,
+    '9': 0x19, '7': 0x1A, '-': 0x1B, '8': 0x1C, '0': 0x1D, ']': 0x1E, 'o': 0x1F, 'u': 0x20,
+    '[': 0x21, 'i': 0x22, 'p': 0x23, 'l': 0x25, 'j': 0x26, "'": 0x27, 'k': 0x28, ';': 0x29,
+    '\\': 0x2A, ',': 0x2B, '/': 0x2C, 'n': 0x2D, 'm': 0x2E, '.': 0x2F, '`': 0x32,
+    ' ': 0x31, '\t': 0x30, '\n': 0x24, '\r': 0x24,
+}
+# Shifted symbol -> the unshifted key it lives on
+_SHIFTED_ASCII = {
+    '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6', '&': '7', '*': '8',
+    '(': '9', ')': '0', '_': '-', '+': '=', '{': '[', '}': ']', '|': '\\', ':': ';',
+    '"': "'", '<': ',', '>': '.', '?': '/', '~': '`',
+}
+# char -> (key code, needs shift)
+_ASCII_KEYCODES = {char: (code, False) for char, code in _BASE_KEYCODES.items()}
+_ASCII_KEYCODES.update({char.upper(): (code, True) for char, code in _BASE_KEYCODES.items() if char.isalpha()})
+_ASCII_KEYCODES.update({char: (_BASE_KEYCODES[base], True) for char, base in _SHIFTED_ASCII.items()})
+
+# AppleScript used when Unicode keyboard events are unavailable; text arrives via argv
+KEYSTROKE_SCRIPT_SOURCE = (
+    'on run argv\n'
+    '    tell application "System Events" to keystroke (item 1 of argv)\n'
+    'end run'
+)
+
+# Apple event codes for delivering argv to a script's run handler
+AE_CORE_EVENT_CLASS = 0x61657674     # 'aevt'
+AE_OPEN_APPLICATION = 0x6F617070     # 'oapp'
+AE_DIRECT_OBJECT = 0x2D2D2D2D        # '----'
+AE_AUTO_GENERATE_RETURN_ID = -1
+AE_ANY_TRANSACTION_ID = 0
+
+# Thread QoS class from <sys/qos.h>
+QOS_CLASS_USER_INTERACTIVE = 0x21
+
+def _set_thread_qos_user_interactive() -> bool:
+    """Raise the calling thread's QoS so posted HID events are not throttled"""
+    try:
+        libsystem = ctypes.CDLL('/usr/lib/libSystem.dylib')
+        return libsystem.pthread_set_qos_class_self_np(QOS_CLASS_USER_INTERACTIVE, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
 class MacWindowManager:
     def __init__(self):
         """Initialize the Mac Window Manager"""
@@ -107,12 +234,84 @@ class MacWindowManager:
             print("Please go to System Preferences > Security & Privacy > Privacy > Accessibility")
             print("and add your terminal application (Terminal, iTerm2, etc.) to the allowed list.")
             print("Some features may not work without accessibility permissions.")
-            
+
+        # Mouse/keyboard events are posted from this thread - run it at interactive QoS
+        _set_thread_qos_user_interactive()
+
         # Initialize display information
         self.displays = self._get_displays()
+        self._last_bounds = (1, 1, 0, 0, 1)  # (lo_x, lo_y, hi_x, hi_y, display_index) - empty until first hit
         self._previous_windows = {}  # Track windows for change detection
+        self._ax_app_cache: Dict[int, Any] = {}  # pid -> AXUIElement for the application
+        # (monotonic timestamp, options, window list, {window number: info}, (X, Y, Width, Height) per row) -
+        # replaced as one tuple so the refresh thread never exposes a list with another snapshot's index
+        self._winlist_cache = (0.0, None, None, {}, np.empty((0, 4), dtype=np.float64))
+        self._apps_cache = (0.0, {})  # (monotonic timestamp, {pid: NSRunningApplication})
+        self._flat_windows: List[Tuple[str, Dict]] = []  # (app name lowercased, window_data) per window
+        from AppKit import NSWorkspace
         self.workspace = NSWorkspace.sharedWorkspace()
-        
+        self._event_source = None  # Shared CGEventSource, created on first event (see _evt_source)
+        self._keystroke_script = None  # Compiled NSAppleScript, built on first fallback
+        self._computer_name = None  # Resolved on first get_computer_name()
+
+        # Cache display metrics that would otherwise cross into the WindowServer
+        # on every cursor move. Re-checked on use (main display ID) and from the
+        # controller's periodic refresh (full layout) - the reconfiguration callback
+        # only fires on a thread running a CFRunLoop, which the REPL never does
+        self._refresh_display_cache()
+        self._display_signature = self._read_display_signature()
+
+    def _refresh_display_cache(self):
+        """Refresh cached display metrics (main display ID and height)"""
+        self._main_display_id = Quartz.CGMainDisplayID()
+        # Height of the main display drives the top-left <-> bottom-left Y flip
+        self._screen_height = Quartz.CGDisplayBounds(self._main_display_id).size.height
+
+    def _read_display_signature(self) -> Tuple:
+        """(main display ID, (id, x, y, width, height) per active display) - changes with any
+        plug/unplug, rearrangement or resolution change"""
+        max_displays = 32
+        active_displays = (Quartz.CGDirectDisplayID * max_displays)()
+        display_count = Quartz.CGGetActiveDisplayList(max_displays, active_displays, None)
+        rects = []
+        for i in range(display_count):
+            bounds = Quartz.CGDisplayBounds(active_displays[i])
+            rects.append((int(active_displays[i]), bounds.origin.x, bounds.origin.y,
+                          bounds.size.width, bounds.size.height))
+        return Quartz.CGMainDisplayID(), tuple(rects)
+
+    def check_display_layout(self) -> bool:
+        """Re-read display metrics if the layout changed since the last check; returns True if it did"""
+        try:
+            signature = self._read_display_signature()
+        except Exception as e:
+            print(f"⚠️  Display layout check failed: {e}")
+            return False
+        if signature == self._display_signature:
+            return False
+        self._display_signature = signature
+        self._refresh_display_cache()
+        self.displays = self._get_displays()
+        # Display rectangles/indices may have changed: drop the _get_cursor_display
+        # fast-path hit (the empty box matches nothing)
+        self._last_bounds = (1, 1, 0, 0, 1)
+        return True
+
+    def _check_main_display(self):
+        """Cheap per-operation guard: a different main display means the cached metrics are stale"""
+        if Quartz.CGMainDisplayID() != self._main_display_id:
+            self.check_display_layout()
+
+    def _evt_source(self):
+        """Get the shared HID-state event source, creating it on first use"""
+        if self._event_source is None:
+            self._event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+        return self._event_source
+
+    def _to_cg(self, x: int, y: int):
+        """Convert top-left screen coordinates to a Core Graphics point"""
+        return Quartz.CGPoint(x, self._screen_height - y)
+
     def _get_displays(self) -> List[Dict]:
         """Get information about all connected displays"""
         displays = []
@@ -219,12 +418,12 @@ class MacWindowManager:
                 "window_count": 0
             }
         
+        flat_windows = []
+        ax_states = {}  # pid -> AX state; the lookup is per app, so do it once per app
+        
         try:
-            # Get all on-screen windows
-            window_list = Quartz.CGWindowListCopyWindowInfo(
-                kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-                kCGNullWindowID
-            )
+            # Get all on-screen windows (always a fresh snapshot, shared with later lookups)
+            window_list = self._copy_window_info(max_age=0)
             
             if not window_list:
                 return result
@@ -264,7 +463,9 @@ class MacWindowManager:
                         continue  # Skip if display not found
                     
                     # Get additional window state using Accessibility API
-                    window_state = self._get_window_state_ax(window_number, owner_pid)
+                    window_state = ax_states.get(owner_pid)
+                    if window_state is None:
+                        window_state = ax_states[owner_pid] = self._get_window_state_ax(window_number, owner_pid)
                     
                     # Generate window ID
                     window_id = self._generate_window_id(window_number, owner_pid, window_name)
@@ -307,6 +508,7 @@ class MacWindowManager:
                     
                     # Add to app data
                     app_data["windows"][window_id] = window_data
+                    flat_windows.append((owner_name.lower(), window_data))
                     app_data["window_count"] += 1
                     
                     if window_data["minimized"]:
@@ -329,7 +531,28 @@ class MacWindowManager:
             
         except Exception as e:
             print(f"Error getting windows: {e}")
-            
+        
+        # Publish only the finished list - find_window_by_app may run on another thread
+        self._flat_windows = flat_windows
+        return result
+
+    def get_structured_windows_with_state(self) -> Dict:
+        """get_structured_windows() with each window's "state" (minimized/maximized/normal) filled in"""
+        result = self.get_structured_windows()
+        for display_data in result["displays"].values():
+            display_width = display_data['size']['width']
+            display_height = display_data['size']['height']
+            for app_data in display_data["applications"].values():
+                for window_data in app_data["windows"].values():
+                    # Same rules as get_window_state, from data already fetched in this pass
+                    if window_data['minimized']:
+                        state = "minimized"
+                    elif (abs(window_data['size']['width'] - display_width) <= 50 and
+                          abs(window_data['size']['height'] - display_height) <= 100):
+                        state = "maximized"
+                    else:
+                        state = "normal"
+                    window_data['state'] = state
         return result
 
     def _get_window_state_ax(self, window_number: int, pid: int) -> Dict:
@@ -341,7 +564,7 @@ class MacWindowManager:
             
         try:
             # Create accessibility element for the application
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return state
                 
@@ -375,19 +598,7 @@ class MacWindowManager:
     def is_window_valid(self, window_number: int) -> bool:
         """Check if window is still valid"""
         try:
-            window_list = Quartz.CGWindowListCopyWindowInfo(
-                kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-                kCGNullWindowID
-            )
-            
-            if not window_list:
-                return False
-                
-            for window_info in window_list:
-                if window_info.get('kCGWindowNumber') == window_number:
-                    return True
-                    
-            return False
+            return self._get_window_info(window_number) is not None
         except Exception:
             return False
 
@@ -395,20 +606,7 @@ class MacWindowManager:
         """Get current window state"""
         try:
             # Find the window in current window list
-            window_list = Quartz.CGWindowListCopyWindowInfo(
-                kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-                kCGNullWindowID
-            )
-            
-            if not window_list:
-                return "invalid"
-                
-            window_info = None
-            for info in window_list:
-                if info.get('kCGWindowNumber') == window_number:
-                    window_info = info
-                    break
-                    
+            window_info = self._get_window_info(window_number)
             if not window_info:
                 return "invalid"
                 
@@ -449,6 +647,7 @@ class MacWindowManager:
     def maximize_window(self, window_number: int) -> Tuple[bool, str]:
         """Maximize a window (macOS doesn't have true maximize, so we'll resize to screen)"""
         try:
+            import Foundation
             time.sleep(0.1)
             
             if not self.is_window_valid(window_number):
@@ -482,7 +681,7 @@ class MacWindowManager:
             display = self.displays[display_index - 1]
             
             # Use Accessibility API to resize window
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return False, "Could not access application"
             
@@ -517,6 +716,7 @@ class MacWindowManager:
     def minimize_window(self, window_number: int) -> Tuple[bool, str]:
         """Minimize a window"""
         try:
+            import Foundation
             time.sleep(0.1)
             
             if not self.is_window_valid(window_number):
@@ -536,7 +736,7 @@ class MacWindowManager:
                 return False, "Accessibility API not available or no PID"
             
             # Use Accessibility API
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return False, "Could not access application"
             
@@ -589,7 +789,7 @@ class MacWindowManager:
                     return False, "Accessibility API not available and no app name"
             
             # Use Accessibility API
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return False, "Could not access application"
             
@@ -612,6 +812,7 @@ class MacWindowManager:
     def bring_to_foreground(self, window_number: int) -> Tuple[bool, str]:
         """Bring window to foreground"""
         try:
+            import Foundation
             time.sleep(0.1)
             
             if not self.is_window_valid(window_number):
@@ -629,21 +830,15 @@ class MacWindowManager:
                 return False, "No PID found"
             
             # First, activate the application
-            running_apps = NSWorkspace.sharedWorkspace().runningApplications()
-            target_app = None
-            
-            for app in running_apps:
-                if app.processIdentifier() == pid:
-                    target_app = app
-                    break
-            
+            target_app = self._running_app(pid)
             if target_app:
+                from AppKit import NSApplicationActivateIgnoringOtherApps
                 target_app.activateWithOptions_(NSApplicationActivateIgnoringOtherApps)
                 time.sleep(0.2)
             
             # Then try to bring specific window to front using Accessibility API
             if ACCESSIBILITY_AVAILABLE:
-                app_element = AXUIElementCreateApplication(pid)
+                app_element = self._ax_app_for(pid)
                 if app_element:
                     window_element = self._find_window_element(app_element, window_number)
                     if window_element:
@@ -661,6 +856,7 @@ class MacWindowManager:
     def resize_window(self, window_number: int, width: int, height: int) -> Tuple[bool, str]:
         """Resize window to specific dimensions"""
         try:
+            import Foundation
             time.sleep(0.1)
             
             if not self.is_window_valid(window_number):
@@ -676,7 +872,7 @@ class MacWindowManager:
                 return False, "Accessibility API not available or no PID"
             
             # Use Accessibility API
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return False, "Could not access application"
             
@@ -689,15 +885,16 @@ class MacWindowManager:
             new_size.width = width
             new_size.height = height
             
-            result = AXUIElementSetAttributeValue(window_element, kAXSizeAttribute,
-                                                Foundation.NSValue.valueWithSize_(new_size))
+            result, window_element = self._set_window_attribute(
+                pid, window_number, window_element, kAXSizeAttribute,
+                Foundation.NSValue.valueWithSize_(new_size))
             
             if result == 0:
                 # Verify the resize
                 time.sleep(0.1)
                 size_ref = AXUIElementCopyAttributeValue(window_element, kAXSizeAttribute, None)
-                if size_ref[0] == 0 and size_ref[1]:
-                    actual_size = Foundation.NSValue(size_ref[1]).sizeValue()
+                actual_size = _ax_value(size_ref[1], kAXValueCGSizeType) if size_ref[0] == 0 and size_ref[1] else None
+                if actual_size is not None:
                     return True, f"Window resized to {int(actual_size.width)}x{int(actual_size.height)}"
                 else:
                     return True, f"Window resize attempted (target: {width}x{height})"
@@ -710,6 +907,7 @@ class MacWindowManager:
     def move_window(self, window_number: int, x: int, y: int) -> Tuple[bool, str]:
         """Move window to specific coordinates"""
         try:
+            import Foundation
             time.sleep(0.1)
             
             if not self.is_window_valid(window_number):
@@ -725,7 +923,7 @@ class MacWindowManager:
                 return False, "Accessibility API not available or no PID"
             
             # Use Accessibility API
-            app_element = AXUIElementCreateApplication(pid)
+            app_element = self._ax_app_for(pid)
             if not app_element:
                 return False, "Could not access application"
             
@@ -738,15 +936,16 @@ class MacWindowManager:
             new_position.x = x
             new_position.y = y
             
-            result = AXUIElementSetAttributeValue(window_element, kAXPositionAttribute,
-                                                Foundation.NSValue.valueWithPoint_(new_position))
+            result, window_element = self._set_window_attribute(
+                pid, window_number, window_element, kAXPositionAttribute,
+                Foundation.NSValue.valueWithPoint_(new_position))
             
             if result == 0:
                 # Verify the move
                 time.sleep(0.1)
                 pos_ref = AXUIElementCopyAttributeValue(window_element, kAXPositionAttribute, None)
-                if pos_ref[0] == 0 and pos_ref[1]:
-                    actual_pos = Foundation.NSValue(pos_ref[1]).pointValue()
+                actual_pos = _ax_value(pos_ref[1], kAXValueCGPointType) if pos_ref[0] == 0 and pos_ref[1] else None
+                if actual_pos is not None:
                     return True, f"Window moved to ({int(actual_pos.x)}, {int(actual_pos.y)})"
                 else:
                     return True, f"Window move attempted (target: ({x}, {y}))"
@@ -800,25 +999,23 @@ class MacWindowManager:
     def get_cursor_position(self) -> Tuple[bool, str, Optional[Tuple[int, int]]]:
         """Get current cursor position"""
         try:
+            self._check_main_display()
             # Get cursor position using Core Graphics (most accurate)
             mouse_pos = Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
             
             # Core Graphics uses bottom-left origin, convert to top-left origin (screen coordinates)
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
             x = int(mouse_pos.x)
-            y = int(screen_height - mouse_pos.y)
+            y = int(self._screen_height - mouse_pos.y)
             
             display_id = self._get_cursor_display((x, y))
             return True, f"Cursor at ({x}, {y}) on Display {display_id}", (x, y)
         except Exception as e:
             # Fallback method using NSEvent
             try:
+                from AppKit import NSEvent
                 cursor_pos = NSEvent.mouseLocation()
-                main_screen = NSScreen.mainScreen()
-                screen_height = main_screen.frame().size.height
                 x = int(cursor_pos.x)
-                y = int(screen_height - cursor_pos.y)
+                y = int(self._screen_height - cursor_pos.y)
                 display_id = self._get_cursor_display((x, y))
                 return True, f"Cursor at ({x}, {y}) on Display {display_id}", (x, y)
             except Exception as e2:
@@ -827,16 +1024,11 @@ class MacWindowManager:
     def set_cursor_position(self, x: int, y: int) -> Tuple[bool, str]:
         """Set cursor position to absolute coordinates"""
         try:
+            self._check_main_display()
             time.sleep(0.05)
             
-            # Convert to Core Graphics coordinates (Y is inverted)
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            cg_y = screen_height - y
-            
-            # Use Core Graphics to move cursor
-            success = Quartz.CGDisplayMoveCursorToPoint(Quartz.CGMainDisplayID(), 
-                                                       Quartz.CGPoint(x, cg_y))
+            # Use Core Graphics to move cursor (Y is inverted)
+            success = Quartz.CGDisplayMoveCursorToPoint(self._main_display_id, self._to_cg(x, y))
             
             if success == 0:  # Success in Core Graphics is 0
                 display_id = self._get_cursor_display((x, y))
@@ -850,16 +1042,26 @@ class MacWindowManager:
     def _get_cursor_display(self, cursor_pos: Tuple[int, int]) -> int:
         """Determine which display the cursor is on"""
         x, y = cursor_pos
+
+        # Fast path: the cursor is almost always still on the last display it was seen on
+        lo_x, lo_y, hi_x, hi_y, idx = self._last_bounds
+        if lo_x <= x <= hi_x and lo_y <= y <= hi_y:
+            return idx
+
         for display in self.displays:
             bounds = display['bounds']
             if (bounds['x'] <= x <= bounds['x'] + bounds['width'] and
                 bounds['y'] <= y <= bounds['y'] + bounds['height']):
+                self._last_bounds = (bounds['x'], bounds['y'],
+                                     bounds['x'] + bounds['width'], bounds['y'] + bounds['height'],
+                                     display['index'])
                 return display['index']
         return 1
 
     def send_mouse_click(self, button: str = "left", x: int = None, y: int = None) -> Tuple[bool, str]:
         """Send mouse click at specified position or current cursor position"""
         try:
+            self._check_main_display()
             time.sleep(0.1)
             
             # Move cursor to position if specified
@@ -885,9 +1087,7 @@ class MacWindowManager:
                     return False, "Could not get cursor position"
             
             # Convert screen coordinates to Core Graphics coordinates for click event
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            cg_point = Quartz.CGPoint(x, screen_height - y)
+            cg_point = self._to_cg(x, y)
             
             # Map button to event types
             button_map = {
@@ -902,7 +1102,7 @@ class MacWindowManager:
             down_event, up_event, mouse_button = button_map[button.lower()]
             
             # Create event source
-            event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+            event_source = self._evt_source()
             
             # Create mouse down event
             mouse_down = CGEventCreateMouseEvent(event_source, down_event, cg_point, mouse_button)
@@ -962,6 +1162,7 @@ class MacWindowManager:
                              x: int = None, y: int = None) -> Tuple[bool, str]:
         """Send mouse long click (press and hold)"""
         try:
+            self._check_main_display()
             time.sleep(0.1)
             
             # Move cursor to position if specified
@@ -977,9 +1178,7 @@ class MacWindowManager:
                     return False, "Could not get cursor position"
             
             # Convert to Core Graphics coordinates
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            cg_point = Quartz.CGPoint(x, screen_height - y)
+            cg_point = self._to_cg(x, y)
             
             # Map button to event types
             button_map = {
@@ -994,7 +1193,7 @@ class MacWindowManager:
             down_event, up_event, mouse_button = button_map[button.lower()]
             
             # Create event source
-            event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+            event_source = self._evt_source()
             
             # Mouse down
             mouse_down = CGEventCreateMouseEvent(event_source, down_event, cg_point, mouse_button)
@@ -1016,6 +1215,7 @@ class MacWindowManager:
     def send_mouse_scroll(self, direction: str, amount: int = 3, x: int = None, y: int = None) -> Tuple[bool, str]:
         """Send mouse scroll (up, down, left, right)"""
         try:
+            self._check_main_display()
             # Move cursor to position if specified
             if x is not None and y is not None:
                 success, msg = self.set_cursor_position(x, y)
@@ -1029,9 +1229,7 @@ class MacWindowManager:
                     return False, "Could not get cursor position"
             
             # Convert to Core Graphics coordinates
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            cg_point = Quartz.CGPoint(x, screen_height - y)
+            cg_point = self._to_cg(x, y)
             
             # Map direction to scroll values
             direction_map = {
@@ -1047,7 +1245,7 @@ class MacWindowManager:
             scroll_y, scroll_x = direction_map[direction.lower()]
             
             # Create event source
-            event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+            event_source = self._evt_source()
             
             # Create scroll event using the correct function name
             try:
@@ -1097,9 +1295,15 @@ class MacWindowManager:
             return False, f"Failed to send scroll: {e}"
 
     def send_mouse_drag(self, start_x: int, start_y: int, end_x: int, end_y: int,
-                       button: str = "left", duration: float = 0.5) -> Tuple[bool, str]:
-        """Send mouse drag from start to end position"""
+                       button: str = "left", duration: float = 0.5,
+                       fast_mode: bool = False) -> Tuple[bool, str]:
+        """Send mouse drag from start to end position
+
+        fast_mode warps the cursor for intermediate steps instead of posting a
+        drag event per step; a single drag event is posted before mouse up.
+        """
         try:
+            self._check_main_display()
             # Map button to event types
             button_map = {
                 "left": (kCGEventLeftMouseDown, kCGEventLeftMouseUp, Quartz.kCGMouseButtonLeft),
@@ -1117,14 +1321,11 @@ class MacWindowManager:
             time.sleep(0.1)
             
             # Convert coordinates to Core Graphics
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            
-            start_cg = Quartz.CGPoint(start_x, screen_height - start_y)
-            end_cg = Quartz.CGPoint(end_x, screen_height - end_y)
+            start_cg = self._to_cg(start_x, start_y)
+            end_cg = self._to_cg(end_x, end_y)
             
             # Create event source
-            event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+            event_source = self._evt_source()
             
             # Mouse down at start
             mouse_down = CGEventCreateMouseEvent(event_source, down_event, start_cg, mouse_button)
@@ -1138,15 +1339,25 @@ class MacWindowManager:
                 current_y = int(start_y + (end_y - start_y) * progress)
                 
                 # Convert to CG coordinates
-                current_cg = Quartz.CGPoint(current_x, screen_height - current_y)
+                current_cg = self._to_cg(current_x, current_y)
                 
-                # Create drag event
-                drag_event = CGEventCreateMouseEvent(event_source, kCGEventLeftMouseDragged, 
-                                                   current_cg, mouse_button)
-                CGEventPost(kCGHIDEventTap, drag_event)
+                if fast_mode:
+                    # Just reposition the cursor - no event object per step
+                    Quartz.CGWarpMouseCursorPosition(current_cg)
+                else:
+                    # Create drag event
+                    drag_event = CGEventCreateMouseEvent(event_source, kCGEventLeftMouseDragged, 
+                                                       current_cg, mouse_button)
+                    CGEventPost(kCGHIDEventTap, drag_event)
                 
                 time.sleep(duration / steps)
             
+            if fast_mode:
+                # Deliver one drag event so the target app sees the drag at its final point
+                drag_event = CGEventCreateMouseEvent(event_source, kCGEventLeftMouseDragged,
+                                                   end_cg, mouse_button)
+                CGEventPost(kCGHIDEventTap, drag_event)
+            
             # Mouse up at end
             mouse_up = CGEventCreateMouseEvent(event_source, up_event, end_cg, mouse_button)
             CGEventPost(kCGHIDEventTap, mouse_up)
@@ -1304,7 +1515,7 @@ class MacWindowManager:
                 return False, "No valid keys specified"
             
             # Create event source
-            event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+            event_source = self._evt_source()
             
             # Find the main key (non-modifier)
             main_key = None
@@ -1340,60 +1551,141 @@ class MacWindowManager:
             # Try method 1: CGEventKeyboardSetUnicodeString if available
             if CGEventKeyboardSetUnicodeString is not None:
                 try:
-                    # Create event source
-                    event_source = CGEventSourceCreate(kCGEventSourceStateHIDSystemState)
+                    event_source = self._evt_source()
+                    encoded = text.encode('utf-16-le')
+                    total_units = len(encoded) // 2
+                    
+                    # Convert the whole string into one buffer up front; chunks below are views into it
+                    units = (ctypes.c_uint16 * total_units).from_buffer_copy(encoded)
                     
-                    for char in text:
-                        # Convert character to Unicode
-                        unicode_val = ord(char)
+                    # Hot-loop locals (LOAD_FAST instead of global lookups)
+                    _create = CGEventCreateKeyboardEvent
+                    _setuni = CGEventKeyboardSetUnicodeString
+                    _post = CGEventPost
+                    _view = ctypes.c_uint16
+                    tap = kCGHIDEventTap
+                    
+                    # One key down/up pair carries a whole chunk of the string instead
+                    # of one pair per character; chunks respect the per-event limit
+                    start = 0
+                    while start < total_units:
+                        end = min(start + UNICODE_EVENT_MAX_UNITS, total_units)
+                        if end < total_units and 0xD800 <= units[end - 1] <= 0xDBFF:
+                            end -= 1  # Don't split a surrogate pair across events
                         
-                        # Create keyboard event for this character
-                        key_down = CGEventCreateKeyboardEvent(event_source, 0, True)
-                        key_up = CGEventCreateKeyboardEvent(event_source, 0, False)
+                        count = end - start
+                        buf = (_view * count).from_buffer(units, start * 2)
                         
-                        # Set the unicode string for the event
-                        CGEventKeyboardSetUnicodeString(key_down, 1, ctypes.byref(ctypes.c_uint16(unicode_val)))
-                        CGEventKeyboardSetUnicodeString(key_up, 1, ctypes.byref(ctypes.c_uint16(unicode_val)))
+                        key_down = _create(event_source, 0, True)
+                        key_up = _create(event_source, 0, False)
+                        _setuni(key_down, count, buf)
+                        _setuni(key_up, count, buf)
                         
-                        # Post events
-                        CGEventPost(kCGHIDEventTap, key_down)
-                        time.sleep(0.01)  # Small delay between characters
-                        CGEventPost(kCGHIDEventTap, key_up)
-                        time.sleep(0.01)
+                        _post(tap, key_down)
+                        _post(tap, key_up)
+                        start = end
                     
                     return True, f"Sent text: '{text}' ({len(text)} characters)"
+                except Exception:
+                    pass  # Fall through to key code method
+            
+            # Fallback: plain ASCII can be typed with virtual key codes, still in-process
+            if all(char in _ASCII_KEYCODES for char in text):
+                try:
+                    self._send_text_keycodes(text)
+                    return True, f"Sent text via key codes: '{text}' ({len(text)} characters)"
                 except Exception:
                     pass  # Fall through to AppleScript method
             
-            # Fallback: use AppleScript for text input
+            # Last resort: use AppleScript for text input
             try:
-                # Escape quotes in the text for AppleScript
-                escaped_text = text.replace('"', '\\"').replace('\\', '\\\\')
-                script = f'tell application "System Events" to keystroke "{escaped_text}"'
-                subprocess.run(['osascript', '-e', script], check=True, capture_output=True)
-                return True, f"Sent text via AppleScript: '{text}' ({len(text)} characters)"
+                return self._send_text_applescript(text)
             except Exception as e2:
                 return False, f"Failed to send text via AppleScript: {e2}"
                 
         except Exception as e:
             return False, f"Failed to send text: {e}"
 
+    def _send_text_keycodes(self, text: str):
+        """Type ASCII text with one key down/up pair per character"""
+        event_source = self._evt_source()
+        shifted = False
+        
+        # Hot-loop locals (LOAD_FAST instead of global lookups)
+        _create = CGEventCreateKeyboardEvent
+        _set_flags = CGEventSetFlags
+        _post = CGEventPost
+        _keycodes = _ASCII_KEYCODES
+        tap = kCGHIDEventTap
+        shift_mask = Quartz.kCGEventFlagMaskShift
+        
+        for char in text:
+            key_code, needs_shift = _keycodes[char]
+            if needs_shift != shifted:
+                # Only modifier transitions need a moment to register
+                time.sleep(0.001)
+                shifted = needs_shift
+            flags = shift_mask if needs_shift else 0
+            
+            key_down = _create(event_source, key_code, True)
+            key_up = _create(event_source, key_code, False)
+            _set_flags(key_down, flags)
+            _set_flags(key_up, flags)
+            
+            _post(tap, key_down)
+            _post(tap, key_up)
+
+    def _send_text_applescript(self, text: str) -> Tuple[bool, str]:
+        """Type text through a cached, precompiled AppleScript (no osascript process)"""
+        from Foundation import NSAppleScript, NSAppleEventDescriptor
+        
+        if self._keystroke_script is None:
+            script = NSAppleScript.alloc().initWithSource_(KEYSTROKE_SCRIPT_SOURCE)
+            compiled, error = script.compileAndReturnError_(None)
+            if not compiled:
+                return False, f"Failed to compile AppleScript: {error}"
+            self._keystroke_script = script
+        
+        # Text is passed as argv, so no quoting/escaping is needed
+        argv = NSAppleEventDescriptor.listDescriptor()
+        argv.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(text), 0)
+        
+        run_event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            AE_CORE_EVENT_CLASS, AE_OPEN_APPLICATION,
+            NSAppleEventDescriptor.currentProcessDescriptor(),
+            AE_AUTO_GENERATE_RETURN_ID, AE_ANY_TRANSACTION_ID
+        )
+        run_event.setParamDescriptor_forKeyword_(argv, AE_DIRECT_OBJECT)
+        
+        result, error = self._keystroke_script.executeAppleEvent_error_(run_event, None)
+        if result is None:
+            return False, f"Failed to send text via AppleScript: {error}"
+        return True, f"Sent text via AppleScript: '{text}' ({len(text)} characters)"
+
     # =============== SYSTEM INFORMATION ===============
     
     def get_computer_name(self) -> Tuple[bool, str]:
         """Get computer name"""
         try:
-            computer_name = NSHost.currentHost().localizedName()
-            return True, f"Computer name: {computer_name}"
+            if self._computer_name is None:
+                # Local configuration read - unlike NSHost, never waits on name resolution
+                try:
+                    from SystemConfiguration import SCDynamicStoreCopyComputerName
+                    computer_name, _ = SCDynamicStoreCopyComputerName(None, None)
+                except ImportError:
+                    computer_name = None
+                self._computer_name = str(computer_name) if computer_name else socket.gethostname()
+            return True, f"Computer name: {self._computer_name}"
         except Exception as e:
             return False, f"Failed to get computer name: {e}"
 
     def get_user_name(self) -> Tuple[bool, str]:
         """Get current user name"""
         try:
-            user_name = getpass.getuser()
-            full_name = NSProcessInfo.processInfo().userName()
-            return True, f"User: {full_name} ({user_name})"
+            # One passwd lookup gives both the short name and the full name (GECOS)
+            entry = pwd.getpwuid(os.getuid())
+            full_name = entry.pw_gecos.split(',')[0] or entry.pw_name
+            return True, f"User: {full_name} ({entry.pw_name})"
         except Exception as e:
             return False, f"Failed to get user name: {e}"
 
@@ -1401,6 +1693,8 @@ class MacWindowManager:
                         width: int = 300, height: int = 150) -> Tuple[bool, str]:
         """Display a message box at specified location"""
         try:
+            from AppKit import NSAlert, NSInformationalAlertStyle, NSModalResponseOK
+            
             # Create alert
             alert = NSAlert.alloc().init()
             alert.setMessageText_(title)
@@ -1423,97 +1717,167 @@ class MacWindowManager:
     
     def find_window_by_app(self, app_name: str) -> List[Dict]:
         """Find windows by application name - returns list format for backwards compatibility"""
-        structured = self.get_structured_windows()
-        matching_windows = []
-        
+        self.get_structured_windows()  # Refreshes the flat window index
         app_name_lower = app_name.lower()
         
-        for display_data in structured["displays"].values():
-            for proc_name, app_data in display_data["applications"].items():
-                if app_name_lower in proc_name.lower():
-                    for window_data in app_data["windows"].values():
-                        # Convert to old format for compatibility
-                        matching_windows.append({
-                            "window_number": window_data["window_number"],
-                            "title": window_data["title"],
-                            "pid": window_data["pid"],
-                            "app_name": proc_name,
-                            "bounds": window_data["bounds"],
-                            "display": window_data["display"],
-                            "minimized": window_data["minimized"]
-                        })
-        
-        return matching_windows
+        # Convert to old format for compatibility
+        return [{
+            "window_number": window_data["window_number"],
+            "title": window_data["title"],
+            "pid": window_data["pid"],
+            "app_name": window_data["app_name"],
+            "bounds": window_data["bounds"],
+            "display": window_data["display"],
+            "minimized": window_data["minimized"]
+        } for app_lower, window_data in self._flat_windows if app_name_lower in app_lower]
 
     def print_structured_output(self, show_minimized: bool = True):
         """Print a clean, structured view of all windows"""
         data = self.get_structured_windows()
         
-        print("=" * 80)
-        print(f"MAC WINDOW MANAGER - {data['summary']['total_windows']} windows across {data['summary']['total_displays']} displays")
-        print("=" * 80)
+        buf = io.StringIO()
+        write = buf.write
+        write(_REPORT_HDR.format_map(data['summary']))
         
         for display_key, display_data in data["displays"].items():
-            main_indicator = " (MAIN)" if display_data['is_main'] else ""
-            print(f"\n🖥️  DISPLAY {display_data['id']}{main_indicator}")
-            print(f"   Resolution: {display_data['size']['width']}x{display_data['size']['height']}")
-            print(f"   Origin: ({display_data['origin']['x']}, {display_data['origin']['y']})")
-            print(f"   Windows: {display_data['window_count']}")
-            print("-" * 60)
+            write(_DISPLAY_HDR.format_map({
+                'id': display_data['id'],
+                'main': " (MAIN)" if display_data['is_main'] else "",
+                'width': display_data['size']['width'], 'height': display_data['size']['height'],
+                'x': display_data['origin']['x'], 'y': display_data['origin']['y'],
+                'count': display_data['window_count'],
+            }))
             
             if not display_data["applications"]:
-                print("   No applications on this display")
+                write("   No applications on this display\n")
                 continue
             
             for app_name, app_data in display_data["applications"].items():
                 visible_windows = [w for w in app_data["windows"].values() if not w["minimized"]]
                 minimized_windows = [w for w in app_data["windows"].values() if w["minimized"]]
                 
-                print(f"\n   📱 {app_name}")
-                print(f"      Total: {app_data['window_count']} | Visible: {len(visible_windows)} | Minimized: {len(minimized_windows)}")
+                write(_APP_HDR.format_map({
+                    'app': app_name, 'tot': app_data['window_count'],
+                    'vis': len(visible_windows), 'min': len(minimized_windows),
+                }))
                 
                 # Show visible windows
                 for window in visible_windows:
-                    title = window["title"][:50] + "..." if len(window["title"]) > 50 else window["title"]
-                    print(f"      ├─ 👁️  {title}")
-                    print(f"      │   ID: {window['window_id']}")
-                    print(f"      │   Position: ({window['position']['x']}, {window['position']['y']})")
-                    print(f"      │   Size: {window['size']['width']}x{window['size']['height']}")
+                    write(_VISIBLE_ROW.format_map({
+                        'title': _short_title(window["title"]), 'window_id': window['window_id'],
+                        'x': window['position']['x'], 'y': window['position']['y'],
+                        'width': window['size']['width'], 'height': window['size']['height'],
+                    }))
                 
                 # Show minimized windows if requested
                 if show_minimized and minimized_windows:
-                    print(f"      │")
+                    write("      │\n")
                     for window in minimized_windows:
-                        title = window["title"][:50] + "..." if len(window["title"]) > 50 else window["title"]
-                        print(f"      ├─ 📦 {title} (minimized)")
-                        print(f"      │   ID: {window['window_id']}")
+                        write(_MINIMIZED_ROW.format_map({
+                            'title': _short_title(window["title"]), 'window_id': window['window_id'],
+                        }))
         
-        print("\n" + "=" * 80)
+        write(f"\n{_HR}\n")
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
 
     # =============== HELPER METHODS ===============
     
     def _get_window_info(self, window_number: int) -> Optional[Dict]:
         """Get window info by window number"""
         try:
-            window_list = Quartz.CGWindowListCopyWindowInfo(
-                kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-                kCGNullWindowID
-            )
-            
-            if not window_list:
-                return None
-                
-            for window_info in window_list:
-                if window_info.get('kCGWindowNumber') == window_number:
-                    return window_info
-                    
-            return None
+            return self._window_snapshot()[3].get(window_number)
         except Exception:
             return None
 
+    def _window_snapshot(self, options: int = None, max_age: float = WINDOW_LIST_CACHE_TTL) -> Tuple:
+        """(timestamp, options, window list, by_number, bounds) - reused if taken within max_age seconds.
+        Read the tuple once and use its parts; they always belong to the same snapshot"""
+        if options is None:
+            options = ONSCREEN_WINDOW_OPTIONS
+        
+        snapshot = self._winlist_cache
+        timestamp, cached_options, window_list = snapshot[:3]
+        now = time.monotonic()
+        if cached_options == options and window_list is not None and now - timestamp < max_age:
+            return snapshot
+        
+        window_list = Quartz.CGWindowListCopyWindowInfo(options, kCGNullWindowID) or []
+        by_number = {info.get('kCGWindowNumber'): info for info in window_list}
+        bounds_rows = []
+        for info in window_list:
+            bounds = info.get('kCGWindowBounds', {})
+            bounds_rows.append((bounds.get('X', 0), bounds.get('Y', 0),
+                                bounds.get('Width', 0), bounds.get('Height', 0)))
+        bounds_array = np.array(bounds_rows, dtype=np.float64).reshape(-1, 4)
+        snapshot = (now, options, window_list, by_number, bounds_array)
+        self._winlist_cache = snapshot  # single assignment - readers see the old or the new snapshot
+        return snapshot
+
+    def _copy_window_info(self, options: int = None, max_age: float = WINDOW_LIST_CACHE_TTL):
+        """Get the on-screen window list, reusing a snapshot taken within max_age seconds"""
+        return self._window_snapshot(options, max_age)[2]
+
+    def _running_apps(self, max_age: float = RUNNING_APPS_CACHE_TTL) -> Dict[int, Any]:
+        """Get {pid: NSRunningApplication}, reusing a snapshot taken within max_age seconds"""
+        timestamp, apps = self._apps_cache
+        now = time.monotonic()
+        if now - timestamp >= max_age:
+            apps = {app.processIdentifier(): app for app in self.workspace.runningApplications()}
+            self._apps_cache = (now, apps)
+        return apps
+
+    def _running_app(self, pid: int):
+        """Look up a running application by PID (refreshes once on a miss)"""
+        app = self._running_apps().get(pid)
+        if app is None:
+            # Could have launched since the snapshot was taken
+            app = self._running_apps(max_age=0).get(pid)
+        return app
+
+    def _ax_app_for(self, pid: int):
+        """Get the (cached) accessibility element for an application"""
+        app_element = self._ax_app_cache.get(pid)
+        if app_element is None:
+            app_element = AXUIElementCreateApplication(pid)
+            if app_element:
+                self._ax_app_cache[pid] = app_element
+        return app_element
+
+    def last_op_settled(self) -> bool:
+        """Whether the frontmost app has stopped reporting itself busy (AXElementBusy)"""
+        try:
+            app = self.workspace.frontmostApplication()
+            if app is None:
+                return True
+            # Fresh element so the short timeout doesn't stick to the cached one
+            app_element = _ax_bounded(AXUIElementCreateApplication(app.processIdentifier()))
+            if not app_element:
+                return True
+            err, busy = AXUIElementCopyAttributeValue(app_element, "AXElementBusy", None)
+            # Most apps don't expose the attribute; nothing left to wait for then
+            return err != 0 or not busy
+        except Exception:
+            return True
+
+    def _set_window_attribute(self, pid: int, window_number: int, window_element,
+                              attribute, value) -> Tuple[int, Any]:
+        """Set a window attribute, rebuilding a stale cached app element once"""
+        result = AXUIElementSetAttributeValue(window_element, attribute, value)
+        if result == kAXErrorInvalidUIElement:
+            # App was relaunched or the element went away - evict and retry once
+            self._ax_app_cache.pop(pid, None)
+            app_element = self._ax_app_for(pid)
+            retry_element = self._find_window_element(app_element, window_number) if app_element else None
+            if retry_element:
+                window_element = retry_element
+                result = AXUIElementSetAttributeValue(window_element, attribute, value)
+        return result, window_element
+
     def _find_window_element(self, app_element, window_number: int):
         """Find accessibility element for specific window"""
         try:
+            _ax_bounded(app_element)
             windows_ref = AXUIElementCopyAttributeValue(app_element, kAXWindowsAttribute, None)
             if not windows_ref[0] or not windows_ref[1]:
                 return None
@@ -1531,6 +1895,11 @@ class MacWindowManager:
     def _find_close_button(self, window_element):
         """Find the close button in a window"""
         try:
+            # Windows expose their close button directly - one request instead of a child scan
+            close_ref = AXUIElementCopyAttributeValue(window_element, "AXCloseButton", None)
+            if close_ref[0] == 0 and close_ref[1]:
+                return close_ref[1]
+            
             children_ref = AXUIElementCopyAttributeValue(window_element, kAXChildrenAttribute, None)
             if not children_ref[0] or not children_ref[1]:
                 return None
@@ -1563,11 +1932,6 @@ class MacWindowManager:
             
             x, y = cursor_pos
             
-            # Convert to Core Graphics coordinates for element detection
-            main_screen = NSScreen.mainScreen()
-            screen_height = main_screen.frame().size.height
-            cg_point = Quartz.CGPoint(x, screen_height - y)
-            
             output = []
             output.append(f"🎯 ELEMENT UNDER CURSOR ({x}, {y})")
             output.append("=" * 50)
@@ -1575,7 +1939,7 @@ class MacWindowManager:
             if ACCESSIBILITY_AVAILABLE:
                 try:
                     # Get system-wide accessibility element
-                    system_element = AXUIElementCreateSystemWide()
+                    system_element = _ax_bounded(AXUIElementCreateSystemWide())
                     
                     # Get element at cursor position
                     element_ref = AXUIElementCopyElementAtPosition(system_element, x, y, None)
@@ -1598,12 +1962,10 @@ class MacWindowManager:
                         pid_ref = AXUIElementGetPid(element, None)
                         if pid_ref[0] == 0:
                             pid = pid_ref[1]
-                            running_apps = NSWorkspace.sharedWorkspace().runningApplications()
-                            for app in running_apps:
-                                if app.processIdentifier() == pid:
-                                    output.append(f"\n🏠 Parent Application: {app.localizedName()}")
-                                    output.append(f"📦 Bundle ID: {app.bundleIdentifier()}")
-                                    break
+                            app = self._running_app(pid)
+                            if app:
+                                output.append(f"\n🏠 Parent Application: {app.localizedName()}")
+                                output.append(f"📦 Bundle ID: {app.bundleIdentifier()}")
                     else:
                         output.append("❌ No accessibility element found at cursor position")
                         
@@ -1615,29 +1977,26 @@ class MacWindowManager:
             # Also try to get window information at cursor position
             try:
                 # Find window under cursor using Core Graphics
-                window_list = Quartz.CGWindowListCopyWindowInfo(
-                    kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-                    kCGNullWindowID
-                )
+                _, _, window_list, _, bounds = self._window_snapshot()
                 
                 if window_list:
-                    for window_info in window_list:
-                        bounds = window_info.get('kCGWindowBounds', {})
-                        window_x = bounds.get('X', 0)
-                        window_y = bounds.get('Y', 0)
-                        window_width = bounds.get('Width', 0)
-                        window_height = bounds.get('Height', 0)
+                    # Vectorised hit-test; the list is front-to-back so the first hit is the topmost window
+                    hits = ((bounds[:, 0] <= x) & (x <= bounds[:, 0] + bounds[:, 2]) &
+                            (bounds[:, 1] <= y) & (y <= bounds[:, 1] + bounds[:, 3]))
+                    if hits.any():
+                        window_info = window_list[int(hits.argmax())]
+                        window_bounds = window_info.get('kCGWindowBounds', {})
+                        window_x = window_bounds.get('X', 0)
+                        window_y = window_bounds.get('Y', 0)
+                        window_width = window_bounds.get('Width', 0)
+                        window_height = window_bounds.get('Height', 0)
                         
-                        if (window_x <= x <= window_x + window_width and
-                            window_y <= y <= window_y + window_height):
-                            
-                            output.append(f"\n🪟 Window Information:")
-                            output.append(f"   App: {window_info.get('kCGWindowOwnerName', 'Unknown')}")
-                            output.append(f"   Title: {window_info.get('kCGWindowName', 'Untitled')}")
-                            output.append(f"   Window ID: {window_info.get('kCGWindowNumber', 'Unknown')}")
-                            output.append(f"   Layer: {window_info.get('kCGWindowLayer', 'Unknown')}")
-                            output.append(f"   Bounds: {window_x}, {window_y}, {window_width}x{window_height}")
-                            break
+                        output.append(f"\n🪟 Window Information:")
+                        output.append(f"   App: {window_info.get('kCGWindowOwnerName', 'Unknown')}")
+                        output.append(f"   Title: {window_info.get('kCGWindowName', 'Untitled')}")
+                        output.append(f"   Window ID: {window_info.get('kCGWindowNumber', 'Unknown')}")
+                        output.append(f"   Layer: {window_info.get('kCGWindowLayer', 'Unknown')}")
+                        output.append(f"   Bounds: {window_x}, {window_y}, {window_width}x{window_height}")
                             
             except Exception as e:
                 output.append(f"❌ Window detection failed: {e}")
@@ -1650,8 +2009,6 @@ class MacWindowManager:
     def introspect_window(self, window_number: int) -> Tuple[bool, str]:
         """Deep introspection of a window"""
         try:
-            time.sleep(0.1)
-            
             if not self.is_window_valid(window_number):
                 return False, "Window is no longer valid"
             
@@ -1660,9 +2017,7 @@ class MacWindowManager:
             if not window_info:
                 return False, "Could not get window information"
             
-            output = []
-            output.append("🔍 WINDOW INTROSPECTION")
-            output.append("=" * 50)
+            buf = io.StringIO()
             
             # Basic window information
             app_name = window_info.get('kCGWindowOwnerName', 'Unknown')
@@ -1676,75 +2031,120 @@ class MacWindowManager:
             x = bounds.get('X', 0)
             y = bounds.get('Y', 0)
             
-            output.append(f"📱 Application: {app_name}")
-            output.append(f"🪟 Window: {window_name}")
-            output.append(f"🆔 Window Number: {window_number}")
-            output.append(f"🔢 Process ID: {pid}")
-            output.append(f"📏 Size: {width}x{height}")
-            output.append(f"📍 Position: ({x}, {y})")
-            output.append(f"🎚️  Layer: {layer}")
+            buf.write(f"""🔍 WINDOW INTROSPECTION
+{_HR_SHORT}
+📱 Application: {app_name}
+🪟 Window: {window_name}
+🆔 Window Number: {window_number}
+🔢 Process ID: {pid}
+📏 Size: {width}x{height}
+📍 Position: ({x}, {y})
+🎚️  Layer: {layer}""")
             
             # Get application information
             if pid:
-                running_apps = NSWorkspace.sharedWorkspace().runningApplications()
-                for app in running_apps:
-                    if app.processIdentifier() == pid:
-                        output.append(f"\n📦 Bundle ID: {app.bundleIdentifier()}")
-                        output.append(f"🚀 Launched: {app.launchDate()}")
-                        output.append(f"⚡ Active: {app.isActive()}")
-                        output.append(f"🔒 Hidden: {app.isHidden()}")
-                        break
+                app = self._running_app(pid)
+                if app:
+                    buf.write(f"""
+
+📦 Bundle ID: {app.bundleIdentifier()}
+🚀 Launched: {app.launchDate()}
+⚡ Active: {app.isActive()}
+🔒 Hidden: {app.isHidden()}""")
             
             # Accessibility introspection
             if ACCESSIBILITY_AVAILABLE and pid:
-                try:
-                    app_element = AXUIElementCreateApplication(pid)
-                    if app_element:
-                        # Get window elements
-                        windows_ref = AXUIElementCopyAttributeValue(app_element, kAXWindowsAttribute, None)
-                        if windows_ref[0] == 0 and windows_ref[1]:
-                            windows = windows_ref[1]
-                            window_count = CFArrayGetCount(windows)
-                            
-                            output.append(f"\n🪟 Accessibility Windows: {window_count}")
-                            
-                            # Analyze first window (main window)
-                            if window_count > 0:
-                                main_window = CFArrayGetValueAtIndex(windows, 0)
-                                window_props = self._get_element_properties(main_window)
-                                
-                                output.append(f"   🎯 Main Window Role: {window_props.get('role', 'Unknown')}")
-                                output.append(f"   🏷️  Title: {window_props.get('title', 'No title')}")
-                                output.append(f"   ✅ Enabled: {window_props.get('enabled', 'Unknown')}")
-                                output.append(f"   🎯 Focusable: {window_props.get('focusable', 'Unknown')}")
-                                output.append(f"   📦 Minimized: {window_props.get('minimized', 'Unknown')}")
-                                
-                                # Get child elements
-                                children_ref = AXUIElementCopyAttributeValue(main_window, kAXChildrenAttribute, None)
-                                if children_ref[0] == 0 and children_ref[1]:
-                                    children = children_ref[1]
-                                    child_count = CFArrayGetCount(children)
-                                    output.append(f"   👶 Child Elements: {child_count}")
-                                    
-                                    # Show first few children
-                                    for i in range(min(child_count, 5)):
-                                        child = CFArrayGetValueAtIndex(children, i)
-                                        child_props = self._get_element_properties(child)
-                                        role = child_props.get('role', 'Unknown')
-                                        title = child_props.get('title', 'No title')[:30]
-                                        output.append(f"      {i+1}. {role}: {title}")
-                                    
-                                    if child_count > 5:
-                                        output.append(f"      ... and {child_count - 5} more")
+                ax_info = self._introspect_one_pid(pid)
+                if ax_info['window_count'] is not None:
+                    buf.write(f"\n\n🪟 Accessibility Windows: {ax_info['window_count']}")
+                    
+                    # First window (main window)
+                    window_props = ax_info['main_window']
+                    if window_props is not None:
+                        buf.write(f"""
+   🎯 Main Window Role: {window_props.get('role', 'Unknown')}
+   🏷️  Title: {window_props.get('title', 'No title')}
+   ✅ Enabled: {window_props.get('enabled', 'Unknown')}
+   🎯 Focusable: {window_props.get('focusable', 'Unknown')}
+   📦 Minimized: {window_props.get('minimized', 'Unknown')}""")
                         
-                except Exception as e:
-                    output.append(f"❌ Accessibility introspection failed: {e}")
+                        child_count = ax_info['child_count']
+                        if child_count is not None:
+                            buf.write(f"\n   👶 Child Elements: {child_count}")
+                            for i, (role, title) in enumerate(ax_info['children']):
+                                buf.write(f"\n      {i+1}. {role}: {title}")
+                            if child_count > 5:
+                                buf.write(f"\n      ... and {child_count - 5} more")
+                
+                if ax_info['error']:
+                    buf.write(f"\n❌ Accessibility introspection failed: {ax_info['error']}")
             
-            return True, "\n".join(output)
+            return True, buf.getvalue()
             
         except Exception as e:
             return False, f"Failed to introspect window: {e}"
 
+    def _introspect_one_pid(self, pid: int) -> Dict:
+        """Collect accessibility details for one application's main window"""
+        info = {
+            'pid': pid,
+            'window_count': None,   # None when the app's windows couldn't be read
+            'main_window': None,    # Properties of the first AX window
+            'child_count': None,
+            'children': [],         # (role, title) for the first few children
+            'error': None
+        }
+        
+        try:
+            app_element = _ax_bounded(self._ax_app_for(pid))
+            if not app_element:
+                return info
+            
+            # Get window elements
+            windows_ref = AXUIElementCopyAttributeValue(app_element, kAXWindowsAttribute, None)
+            if windows_ref[0] == kAXErrorInvalidUIElement:
+                # Cached element is stale (app relaunched under a reused PID) - rebuild once
+                self._ax_app_cache.pop(pid, None)
+                app_element = _ax_bounded(self._ax_app_for(pid))
+                windows_ref = AXUIElementCopyAttributeValue(app_element, kAXWindowsAttribute, None)
+            if windows_ref[0] != 0 or not windows_ref[1]:
+                return info
+            
+            windows = windows_ref[1]
+            info['window_count'] = CFArrayGetCount(windows)
+            if info['window_count'] == 0:
+                return info
+            
+            main_window = CFArrayGetValueAtIndex(windows, 0)
+            info['main_window'] = self._get_element_properties(main_window)
+            
+            # Get child elements
+            children_ref = AXUIElementCopyAttributeValue(main_window, kAXChildrenAttribute, None)
+            if children_ref[0] == 0 and children_ref[1]:
+                children = children_ref[1]
+                info['child_count'] = CFArrayGetCount(children)
+                for i in range(min(info['child_count'], 5)):
+                    child_props = self._get_element_properties(CFArrayGetValueAtIndex(children, i))
+                    info['children'].append((child_props.get('role', 'Unknown'),
+                                             child_props.get('title', 'No title')[:30]))
+        except Exception as e:
+            info['error'] = str(e)
+        
+        return info
+
+    def introspect_pids(self, pids: List[int]) -> Dict[int, Dict]:
+        """Introspect several applications concurrently, keyed by PID
+
+        AX requests block on the target app in native code with the GIL
+        released, so independent apps can be queried in parallel.
+        """
+        if not ACCESSIBILITY_AVAILABLE:
+            return {}
+        
+        unique_pids = list(dict.fromkeys(pid for pid in pids if pid))
+        with ThreadPoolExecutor(max_workers=INTROSPECT_MAX_WORKERS) as executor:
+            return dict(zip(unique_pids, executor.map(self._introspect_one_pid, unique_pids)))
+
     def _get_element_properties(self, element) -> Dict:
         """Get properties of an accessibility element"""
         properties = {}
@@ -1753,73 +2153,50 @@ class MacWindowManager:
             return properties
         
         try:
-            # Get role
-            role_ref = AXUIElementCopyAttributeValue(element, kAXRoleAttribute, None)
-            if role_ref[0] == 0 and role_ref[1]:
-                properties['role'] = str(role_ref[1])
-            
-            # Get title
-            title_ref = AXUIElementCopyAttributeValue(element, kAXTitleAttribute, None)
-            if title_ref[0] == 0 and title_ref[1]:
-                properties['title'] = str(title_ref[1])
-            
-            # Get description
-            try:
-                desc_ref = AXUIElementCopyAttributeValue(element, "AXDescription", None)
-                if desc_ref[0] == 0 and desc_ref[1]:
-                    properties['description'] = str(desc_ref[1])
-            except:
-                pass
-            
-            # Get role description
-            try:
-                role_desc_ref = AXUIElementCopyAttributeValue(element, "AXRoleDescription", None)
-                if role_desc_ref[0] == 0 and role_desc_ref[1]:
-                    properties['role_description'] = str(role_desc_ref[1])
-            except:
-                pass
-            
-            # Get position
-            pos_ref = AXUIElementCopyAttributeValue(element, kAXPositionAttribute, None)
-            if pos_ref[0] == 0 and pos_ref[1]:
-                pos = Foundation.NSValue(pos_ref[1]).pointValue()
-                properties['position'] = f"({int(pos.x)}, {int(pos.y)})"
-            
-            # Get size
-            size_ref = AXUIElementCopyAttributeValue(element, kAXSizeAttribute, None)
-            if size_ref[0] == 0 and size_ref[1]:
-                size = Foundation.NSValue(size_ref[1]).sizeValue()
-                properties['size'] = f"{int(size.width)}x{int(size.height)}"
-            
-            # Get enabled state
-            try:
-                enabled_ref = AXUIElementCopyAttributeValue(element, "AXEnabled", None)
-                if enabled_ref[0] == 0 and enabled_ref[1]:
-                    properties['enabled'] = bool(enabled_ref[1])
-            except:
-                pass
-            
-            # Get focusable state
-            try:
-                focus_ref = AXUIElementCopyAttributeValue(element, "AXFocusable", None)
-                if focus_ref[0] == 0 and focus_ref[1]:
-                    properties['focusable'] = bool(focus_ref[1])
-            except:
-                pass
-            
-            # Get minimized state
+            values = self._copy_element_attributes(element)
+        except Exception:
+            return properties
+        
+        for (name, _), value in zip(ELEMENT_PROPERTY_ATTRIBUTES, values):
+            if not value:
+                continue
             try:
-                min_ref = AXUIElementCopyAttributeValue(element, kAXMinimizedAttribute, None)
-                if min_ref[0] == 0 and min_ref[1]:
-                    properties['minimized'] = bool(min_ref[1])
-            except:
+                if name == 'position':
+                    pos = _ax_value(value, kAXValueCGPointType)
+                    if pos is not None:
+                        properties['position'] = f"({int(pos.x)}, {int(pos.y)})"
+                elif name == 'size':
+                    size = _ax_value(value, kAXValueCGSizeType)
+                    if size is not None:
+                        properties['size'] = f"{int(size.width)}x{int(size.height)}"
+                elif name in ('enabled', 'focusable', 'minimized'):
+                    properties[name] = bool(value)
+                else:
+                    properties[name] = str(value)
+            except Exception:
                 pass
-                
-        except Exception:
-            pass
         
         return properties
 
+    def _copy_element_attributes(self, element) -> List[Any]:
+        """Fetch ELEMENT_PROPERTY_ATTRIBUTES values (None where missing) in one AX round-trip"""
+        if AXUIElementCopyMultipleAttributeValues is not None:
+            error, values = AXUIElementCopyMultipleAttributeValues(element, ELEMENT_ATTRIBUTE_NAMES, 0, None)
+            if error == 0 and values is not None:
+                # Attributes the element doesn't support come back as AXValue error entries
+                return [None if _is_ax_error_value(value) else value for value in values]
+        
+        # Fallback: one request per attribute
+        values = []
+        _copy = AXUIElementCopyAttributeValue
+        for attribute in ELEMENT_ATTRIBUTE_NAMES:
+            try:
+                value_ref = _copy(element, attribute, None)
+                values.append(value_ref[1] if value_ref[0] == 0 else None)
+            except Exception:
+                values.append(None)
+        return values
+
 # =============== CONVENIENCE FUNCTIONS ===============
 
 def find_window_by_app(app_name: str) -> List[Dict]:
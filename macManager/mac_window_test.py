@@ -4,406 +4,657 @@ Mac Window Test - Interactive interface for Mac Window Manager
 Equivalent to window_test.py but for macOS
 """
 
+import io
+import re
 import sys
 import os
 import time
+import threading
+from collections import defaultdict, namedtuple
+from functools import lru_cache
 from typing import Tuple
 
-# Import our Mac window manager
-from mac_window_manager import MacWindowManager
+# Window states derived during a refresh are trusted for this long (seconds)
+STATE_CACHE_TTL = 1.0
+
+# Commands that can change window topology; anything else skips the post-command refresh
+_MUTATES_WINDOWS = frozenset({'m', 'M', 'c', 'f', 'resize', 'move', 'display',
+                              'click', 'doubleclick', 'longclick', 'drag', 'r'})
+
+# Window-id suffixes are the last 8 hex digits of the title hash
+_HEX8_RE = re.compile(r'[0-9a-f]{8}\Z', re.IGNORECASE | re.ASCII)
+
+
+def _is_window_id(token: str) -> bool:
+    """Whether a token looks like a window-id suffix"""
+    return _HEX8_RE.match(token) is not None
+
+
+# Token sets matched by the command handlers
+_BUTTONS = frozenset(('left', 'right', 'middle'))
+_CASELESS_WINDOW_CMDS = frozenset(('c', 'f', 's', 'l', 'resize', 'move', 'display'))
+
+# Shared (success, message) results for the common input errors
+_ERR_EMPTY = (False, "Empty command")
+_ERR_COORDS = (False, "Invalid coordinates")
+_ERR_BAD_CURSOR_CMD = (False, "Invalid cursor command")
+_ERR_BAD_CURSOR = (False, "Invalid cursor coordinates")
+_ERR_LONGCLICK = (False, "Invalid longclick parameters")
+_ERR_SCROLL_DIR = (False, "Missing scroll direction")
+_ERR_SCROLL = (False, "Invalid scroll parameters")
+_ERR_DRAG_COORDS = (False, "Missing drag coordinates")
+_ERR_DRAG = (False, "Invalid drag parameters")
+_ERR_KEYS = (False, "Missing key combination")
+_ERR_TEXT = (False, "Missing text to type")
+_ERR_MSGBOX = (False, "Missing msgbox parameters")
+_ERR_RESIZE = (False, "Invalid resize dimensions")
+_ERR_MOVE = (False, "Invalid move coordinates")
+_ERR_DISPLAY = (False, "Invalid display ID")
+
+# Flattened per-window fields kept in window_lookup
+WinRec = namedtuple('WinRec', 'wn w h x y title full_id app disp')
+
+# Summary status column per window state
+_STATE_ICONS = {'minimized': "📦 MIN", 'maximized': "🔳 MAX", 'normal': "👁️  NOR"}
+
+# A refresh this soon after the previous one is skipped (seconds)
+REFRESH_DEBOUNCE = 0.2
+
+# Background refresh period when nothing has asked for one (seconds)
+REFRESH_INTERVAL = 0.5
+
+# Share of a chain step's delay that is always waited before polling for readiness
+CHAIN_MIN_DWELL_FRACTION = 0.33
+CHAIN_POLL_INTERVAL = 0.01
+
+# Longest wait after each chain step, by command (window commands keyed by their sub-command)
+_CMD_DELAY = {'click': 0.3, 'doubleclick': 0.3, 'longclick': 0.3, 'drag': 0.3, 'f': 0.3,
+              'send': 0.2, 'type': 0.2}
+CHAIN_DEFAULT_DELAY = 0.1
+
+
+@lru_cache(maxsize=256)
+def _parse(command_str: str) -> Tuple[Tuple[str, ...], str, str]:
+    """Tokenize a command once -> (parts, lowercased head, raw text after head); repeated macros hit the cache"""
+    stripped = command_str.strip()
+    parts = tuple(stripped.split())
+    if not parts:
+        return parts, '', ''
+    # Text after the first token keeps its inner whitespace (for type/send/msgbox)
+    return parts, parts[0].lower(), stripped[len(parts[0]):].lstrip()
+
+
+# Static console text, built once at import
+_EQ80 = "=" * 80
+_DASH60 = "-" * 60
+_DASH80 = "-" * 80
+
+_MAC_LEGEND = (
+    '\n📋 MAC COMMAND LEGEND:\n'
+    '   🪟 WINDOW COMMANDS:\n'
+    '   • M            - Maximize window (resize to screen)\n'
+    '   • m            - Minimize window\n'
+    '   • c            - Close window\n'
+    '   • s            - Show current size & state\n'
+    '   • l            - Show location on display\n'
+    '   • f            - Bring to foreground\n'
+    '   • i            - Deep introspection (accessibility analysis)\n'
+    '   • resize W H   - Resize to width x height\n'
+    '   • move X Y     - Move to absolute position\n'
+    '   • display D    - Move to display D (centered)\n'
+    '\n   🔍 INTROSPECTION COMMANDS:\n'
+    '   • hover        - Analyze element under mouse cursor\n'
+    "   • inspect      - Same as 'i' - full window analysis\n"
+    '   • detect       - Real-time cursor element detection\n'
+    '\n   🖱️  CURSOR & MOUSE COMMANDS:\n'
+    '   • cursor       - Get current cursor position\n'
+    '   • cursor X Y   - Set cursor position\n'
+    '   • click [left|right|middle] [X Y] - Click at position or cursor\n'
+    '   • doubleclick [left|right|middle] [X Y] - Double click\n'
+    '   • longclick [left|right|middle] DURATION [X Y] - Long click (hold)\n'
+    '   • scroll [up|down|left|right] [AMOUNT] [X Y] - Scroll\n'
+    '   • drag X1 Y1 X2 Y2 [left|right|middle] [DURATION] - Drag\n'
+    '\n   ⌨️  KEYBOARD & SYSTEM:\n'
+    '   • msgbox TITLE TEXT - Show message box\n'
+    '   • computer     - Get computer name\n'
+    '   • user         - Get user name\n'
+    '   • keys         - Show virtual key codes (Mac)\n'
+    '   • send KEYS    - Send key combination (e.g., send cmd+c)\n'
+    '   • type TEXT    - Type text\n'
+    '\n   ⚡ COMMAND CHAINING:\n'
+    "   • Use ' : ' to chain multiple commands\n"
+    '   • Commands execute in sequence with small delays\n'
+    '   • Chain stops if any command fails\n'
+    '\n   🔧 CONTROL:\n'
+    '   • r            - Refresh window list\n'
+    '   • q            - Quit\n'
+    '\n   Examples:\n'
+    '   • click 500 300 : send cmd+v                     - Click then paste\n'
+    '   • 1a2b3c4d f : click 100 100 : type hello       - Focus, click, type\n'
+    '   • cursor 200 200 : click : send cmd+c : send cmd+v - Move, click, copy, paste\n'
+    '   • 1a2b3c4d i                                     - Deep introspect window\n'
+    "   • hover                                          - Analyze what's under cursor\n"
+    '\n   🍎 MAC-SPECIFIC NOTES:\n'
+    "   • Use 'cmd' instead of 'ctrl' for most shortcuts\n"
+    '   • Accessibility permissions required for window control\n'
+    '   • Some apps may not support all window operations\n'
+    + _DASH80 + '\n'
+)
+
+_BANNER = (
+    "🍎 Starting Interactive Mac Window Manager...\n"
+    "⚠️  Note: Make sure you've granted accessibility permissions!\n"
+    "   Go to: System Preferences → Security & Privacy → Privacy → Accessibility\n"
+    "   Add your terminal application (Terminal, iTerm2, etc.)\n"
+)
 
 
 class MacWindowController:
     def __init__(self):
-        self.wm = MacWindowManager()
-        self.window_lookup = {}  # Maps last 8 digits to full window data
+        self.window_lookup = {}  # Maps last 8 digits -> WinRec
         self.previous_window_ids = {}  # Track ID changes
+        self.window_state_cache = {}  # window_number -> state, filled by refresh_windows
+        self._last_refresh = 0.0
+        self._mutated_since_refresh = False  # a window-changing command ran after the last snapshot
+        self._sorted_cache = {}  # display_key -> [(app_name, window_data)] sorted by app, title
+        
+        # Global command name -> handler; window commands are the fallback
+        self._handlers = {
+            'hover': self._h_hover,
+            'detect': self._h_hover,
+            'inspect': self._h_inspect,
+            'windows': self._h_windows,
+            'apps': self._h_apps,
+            'displays': self._h_displays,
+            'help': self._h_help,
+            'cursor': self._h_cursor,
+            'click': self._h_click,
+            'doubleclick': self._h_doubleclick,
+            'longclick': self._h_longclick,
+            'scroll': self._h_scroll,
+            'drag': self._h_drag,
+            'send': self._h_send,
+            'type': self._h_type,
+            'computer': self._h_computer,
+            'user': self._h_user,
+            'keys': self._h_keys,
+            'msgbox': self._h_msgbox,
+        }
+        
+        # Window command -> handler, entered only for window-id suffixes
+        self._window_handlers = {
+            'm': self._w_minimize,
+            'M': self._w_maximize,
+            'c': self._w_close,
+            'f': self._w_foreground,
+            's': self._w_size,
+            'l': self._w_location,
+            'resize': self._w_resize,
+            'move': self._w_move,
+            'display': self._w_display,
+            'i': self._w_inspect,
+            'inspect': self._w_inspect,
+            'hover': self._w_hover,
+            'detect': self._w_hover,
+        }
+        
+        # Window list is kept fresh by a daemon thread (started with the manager)
+        # so the prompt never waits on AX
+        self._refresh_lock = threading.Lock()
+        self._refresh_event = threading.Event()
+    
+    @property
+    def wm(self):
+        """Mac window manager, created (and PyObjC loaded) on first use"""
+        wm = self.__dict__.get('_wm')
+        if wm is None:
+            # Import our Mac window manager
+            from mac_window_manager import MacWindowManager
+            wm = self.__dict__['_wm'] = MacWindowManager()
+            threading.Thread(target=self._refresh_worker, daemon=True).start()
+        return wm
     
     def refresh_windows(self):
         """Refresh window data and update lookup table"""
-        data = self.wm.get_structured_windows()
-        self.window_lookup = {}
+        with self._refresh_lock:
+            return self._refresh_windows_locked()
+    
+    def _refresh_windows_locked(self):
+        # Cleared before the query, so a command landing mid-refresh keeps the flag set
+        self._mutated_since_refresh = False
+        # Plugged/unplugged/rearranged monitors are picked up here (the REPL runs no CFRunLoop
+        # for a reconfiguration callback), before windows are assigned to displays
+        self.wm.check_display_layout()
+        data = self.wm.get_structured_windows_with_state()
+        lookup = {}
+        states = {}
+        sorted_cache = {}
         
         # Build lookup table with last 8 digits of window ID
-        for display_data in data["displays"].values():
+        for display_key, display_data in data["displays"].items():
+            # Summary order is fixed per refresh, so sort once here rather than on every print
+            sorted_cache[display_key] = sorted(
+                ((app_name, window_data)
+                 for app_name, app_data in display_data["applications"].items()
+                 for window_data in app_data["windows"].values()),
+                key=lambda x: (x[0], x[1]['title']))
             for app_data in display_data["applications"].values():
-                for window_id, window_data in app_data["windows"].items():
-                    last_8 = window_id[-8:]
-                    self.window_lookup[last_8] = {
-                        'window_data': window_data,
-                        'app_name': app_data['process_name'],
-                        'full_id': window_id
-                    }
+                proc = app_data['process_name']
+                for wid, wd in app_data["windows"].items():
+                    size = wd['size']
+                    pos = wd['position']
+                    lookup[wid[-8:]] = WinRec(wd['window_number'], size['width'], size['height'],
+                                              pos['x'], pos['y'], wd['title'], wid, proc, wd['display'])
+                    # State comes with the snapshot instead of one AX query per window
+                    states[wd['window_number']] = wd['state']
         
+        # Rebinding is atomic, so readers see either the old or the new table
+        self.window_lookup = lookup
+        self.window_state_cache = states
+        self._sorted_cache = sorted_cache
+        self._last_refresh = time.monotonic()
         return data
     
+    def _refresh_worker(self):
+        """Refresh every REFRESH_INTERVAL seconds, or as soon as a command asks for it"""
+        while True:
+            self._refresh_event.wait(timeout=REFRESH_INTERVAL)
+            self._refresh_event.clear()
+            try:
+                self.refresh_windows()
+            except Exception:
+                pass  # Keep the last good snapshot; try again next round
+    
+    def _needs_refresh(self, commands) -> bool:
+        """Whether any of the commands could have changed the window list"""
+        if time.monotonic() - self._last_refresh < REFRESH_DEBOUNCE:
+            return False
+        for cmd in commands:
+            parts = cmd.split(None, 1)
+            if not parts:
+                continue
+            head = parts[0]
+            if head in _MUTATES_WINDOWS or _is_window_id(head):
+                return True
+        return False
+    
+    def get_window_state(self, window_number: int) -> str:
+        """Window state from the refresh cache, or a live query once it has gone stale
+        (or a window-changing command has run since the snapshot)"""
+        if not self._mutated_since_refresh and time.monotonic() - self._last_refresh < STATE_CACHE_TTL:
+            state = self.window_state_cache.get(window_number)
+            if state is not None:
+                return state
+        return self.wm.get_window_state(window_number)
+    
     def print_windows_summary(self):
         """Print a clean summary of all windows organized by display"""
         data = self.refresh_windows()
+        buf = io.StringIO()
+        w = buf.write
         
-        print("\n" + "="*80)
-        print(f"🍎 MAC WINDOW SUMMARY - {data['summary']['total_windows']} windows across {data['summary']['total_displays']} displays")
-        print("="*80)
+        w("\n"); w(_EQ80); w('\n')
+        w(f"🍎 MAC WINDOW SUMMARY - {data['summary']['total_windows']} windows across {data['summary']['total_displays']} displays"); w('\n')
+        w(_EQ80); w('\n')
         
         for display_key, display_data in data["displays"].items():
             main_indicator = " (MAIN)" if display_data['is_main'] else ""
-            print(f"\n🖥️  DISPLAY {display_data['id']}{main_indicator} - {display_data['size']['width']}x{display_data['size']['height']}")
-            print(f"   Origin: ({display_data['origin']['x']}, {display_data['origin']['y']})")
-            print("-" * 60)
+            w(f"\n🖥️  DISPLAY {display_data['id']}{main_indicator} - {display_data['size']['width']}x{display_data['size']['height']}"); w('\n')
+            w(f"   Origin: ({display_data['origin']['x']}, {display_data['origin']['y']})"); w('\n')
+            w(_DASH60); w('\n')
             
             if not display_data["applications"]:
-                print("   No applications on this display")
+                w("   No applications on this display"); w('\n')
                 continue
             
-            # Collect all windows for this display
-            all_windows = []
-            for app_name, app_data in display_data["applications"].items():
-                for window_data in app_data["windows"].values():
-                    all_windows.append({
-                        'app': app_name,
-                        'window': window_data
-                    })
-            
-            # Sort by app name, then by title
-            all_windows.sort(key=lambda x: (x['app'], x['window']['title']))
-            
+            # Windows sorted by app name, then by title (built by refresh_windows)
             current_app = None
-            for item in all_windows:
-                app_name = item['app']
-                window = item['window']
-                window_number = window['window_number']
-                
+            states = self.window_state_cache
+            for app_name, window in self._sorted_cache.get(display_key, ()):
                 # Print app header if it's a new app
                 if app_name != current_app:
-                    print(f"\n   📱 {app_name}")
+                    w(f"\n   📱 {app_name}\n")
                     current_app = app_name
                 
-                # Get current window state
-                current_state = self.wm.get_window_state(window_number)
-                
-                # Window info with state indicators
-                if current_state == "minimized":
-                    status = "📦 MIN"
-                elif current_state == "maximized":
-                    status = "🔳 MAX"
-                else:
-                    status = "👁️  NOR"
+                # Window state was derived by refresh_windows above
+                status = _STATE_ICONS[states.get(window['window_number'], "normal")]
                 
-                title = window['title'][:40] + "..." if len(window['title']) > 40 else window['title']
-                last_8 = window['window_id'][-8:]
+                title = window['title']
+                if len(title) > 40:
+                    title = title[:40] + "..."
+                pos = window['position']
+                size = window['size']
                 
-                print(f"      {status} {title}")
-                print(f"         ID: ...{last_8} | Pos: ({window['position']['x']}, {window['position']['y']}) | Size: {window['size']['width']}x{window['size']['height']}")
+                w(f"      {status} {title}\n"
+                  f"         ID: ...{window['window_id'][-8:]} | Pos: ({pos['x']}, {pos['y']}) | Size: {size['width']}x{size['height']}\n")
         
-        print("\n" + "="*80)
-        print("   States: 📦 MIN=Minimized | 🔳 MAX=Maximized | 👁️  NOR=Normal")
+        w("\n"); w(_EQ80); w('\n')
+        w("   States: 📦 MIN=Minimized | 🔳 MAX=Maximized | 👁️  NOR=Normal"); w('\n')
+        
+        # One bulk write instead of a flush per line
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
     
     def print_legend(self):
         """Print command legend for Mac"""
-        print("\n📋 MAC COMMAND LEGEND:")
-        print("   🪟 WINDOW COMMANDS:")
-        print("   • M            - Maximize window (resize to screen)")
-        print("   • m            - Minimize window") 
-        print("   • c            - Close window")
-        print("   • s            - Show current size & state")
-        print("   • l            - Show location on display")
-        print("   • f            - Bring to foreground")
-        print("   • i            - Deep introspection (accessibility analysis)")
-        print("   • resize W H   - Resize to width x height")
-        print("   • move X Y     - Move to absolute position")
-        print("   • display D    - Move to display D (centered)")
-        print("\n   🔍 INTROSPECTION COMMANDS:")
-        print("   • hover        - Analyze element under mouse cursor")
-        print("   • inspect      - Same as 'i' - full window analysis")
-        print("   • detect       - Real-time cursor element detection")
-        print("\n   🖱️  CURSOR & MOUSE COMMANDS:")
-        print("   • cursor       - Get current cursor position")
-        print("   • cursor X Y   - Set cursor position")
-        print("   • click [left|right|middle] [X Y] - Click at position or cursor")
-        print("   • doubleclick [left|right|middle] [X Y] - Double click")
-        print("   • longclick [left|right|middle] DURATION [X Y] - Long click (hold)")
-        print("   • scroll [up|down|left|right] [AMOUNT] [X Y] - Scroll")
-        print("   • drag X1 Y1 X2 Y2 [left|right|middle] [DURATION] - Drag")
-        print("\n   ⌨️  KEYBOARD & SYSTEM:")
-        print("   • msgbox TITLE TEXT - Show message box")
-        print("   • computer     - Get computer name")
-        print("   • user         - Get user name")
-        print("   • keys         - Show virtual key codes (Mac)")
-        print("   • send KEYS    - Send key combination (e.g., send cmd+c)")
-        print("   • type TEXT    - Type text")
-        print("\n   ⚡ COMMAND CHAINING:")
-        print("   • Use ' : ' to chain multiple commands")
-        print("   • Commands execute in sequence with small delays")
-        print("   • Chain stops if any command fails")
-        print("\n   🔧 CONTROL:")
-        print("   • r            - Refresh window list")
-        print("   • q            - Quit")
-        print("\n   Examples:")
-        print("   • click 500 300 : send cmd+v                     - Click then paste")
-        print("   • 1a2b3c4d f : click 100 100 : type hello       - Focus, click, type")
-        print("   • cursor 200 200 : click : send cmd+c : send cmd+v - Move, click, copy, paste")
-        print("   • 1a2b3c4d i                                     - Deep introspect window")
-        print("   • hover                                          - Analyze what's under cursor")
-        print("\n   🍎 MAC-SPECIFIC NOTES:")
-        print("   • Use 'cmd' instead of 'ctrl' for most shortcuts")
-        print("   • Accessibility permissions required for window control")
-        print("   • Some apps may not support all window operations")
-        print("-" * 80)
+        sys.stdout.write(_MAC_LEGEND)
+        sys.stdout.flush()
     
     def _execute_single_command(self, command_str: str) -> Tuple[bool, str]:
         """Execute a single command - internal method for chaining"""
-        parts = command_str.strip().split()
+        parts, head, rest = _parse(command_str)
         if not parts:
-            return False, "Empty command"
+            return _ERR_EMPTY
         
-        # Global introspection commands (don't need window ID)
-        if parts[0].lower() in ['hover', 'detect']:
-            return self.wm.get_element_under_cursor()
-        elif parts[0].lower() == 'inspect' and len(parts) == 1:
-            return self.wm.get_element_under_cursor()
-        
-        # Window listing commands
-        elif parts[0].lower() == 'windows':
-            self.print_windows_summary()
-            return True, "Window list displayed"
-        elif parts[0].lower() == 'apps':
-            data = self.refresh_windows()
-            app_summary = {}
-            for display_data in data["displays"].values():
-                for app_name, app_data in display_data["applications"].items():
-                    if app_name not in app_summary:
-                        app_summary[app_name] = {"total": 0, "visible": 0, "minimized": 0}
-                    app_summary[app_name]["total"] += app_data["window_count"]
-                    app_summary[app_name]["visible"] += app_data["visible_count"]
-                    app_summary[app_name]["minimized"] += app_data["minimized_count"]
-            
-            result = ["📱 APPLICATION SUMMARY:"]
-            for app, counts in sorted(app_summary.items()):
-                result.append(f"   {app}: {counts['total']} total | {counts['visible']} visible | {counts['minimized']} minimized")
-            return True, "\n".join(result)
-        elif parts[0].lower() == 'displays':
-            result = ["🖥️  DISPLAY INFORMATION:"]
-            for i, display in enumerate(self.wm.displays):
-                main_text = " (MAIN)" if display['is_main'] else ""
-                result.append(f"   Display {display['index']}{main_text}: {display['size']['width']}x{display['size']['height']} at ({display['origin']['x']}, {display['origin']['y']})")
-            return True, "\n".join(result)
-        elif parts[0].lower() == 'help':
-            self.print_legend()
-            return True, "Help displayed"
+        # Window commands (require window ID) and global commands use disjoint tables
+        if _is_window_id(head):
+            if len(parts) >= 2:
+                command = parts[1]
+                if command in _MUTATES_WINDOWS or command.lower() in _MUTATES_WINDOWS:
+                    return self._run_mutating(self._execute_window_command, parts)
+                return self._execute_window_command(parts)
+        else:
+            handler = self._handlers.get(head)
+            if handler is not None:
+                if head in _MUTATES_WINDOWS:
+                    return self._run_mutating(handler, parts, rest)
+                return handler(parts, rest)
         
-        # Cursor commands
-        elif parts[0].lower() == 'cursor':
-            if len(parts) == 1:
-                success, message, pos = self.wm.get_cursor_position()
-                return success, message
-            elif len(parts) == 3:
-                try:
-                    x, y = int(parts[1]), int(parts[2])
-                    return self.wm.set_cursor_position(x, y)
-                except ValueError:
-                    return False, "Invalid cursor coordinates"
-            else:
-                return False, "Invalid cursor command"
+        return False, f"Unknown command: {parts[0]}"
+    
+    def _run_mutating(self, handler, *args) -> Tuple[bool, str]:
+        """Run a window-changing handler, flagging the snapshot as stale before and after
+        (a background refresh that starts mid-command clears the flag but captures old geometry)"""
+        self._mutated_since_refresh = True
+        try:
+            return handler(*args)
+        finally:
+            self._mutated_since_refresh = True
+    
+    # Global introspection commands (don't need window ID)
+    def _h_hover(self, parts, rest) -> Tuple[bool, str]:
+        return self.wm.get_element_under_cursor()
+    
+    def _h_inspect(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) == 1:
+            return self.wm.get_element_under_cursor()
+        return False, f"Unknown command: {parts[0]}"
+    
+    # Window listing commands
+    def _h_windows(self, parts, rest) -> Tuple[bool, str]:
+        self.print_windows_summary()
+        return True, "Window list displayed"
+    
+    def _h_apps(self, parts, rest) -> Tuple[bool, str]:
+        data = self.refresh_windows()
+        totals = defaultdict(lambda: [0, 0, 0])  # app -> [total, visible, minimized]
+        for display_data in data["displays"].values():
+            for app_name, app_data in display_data["applications"].items():
+                t = totals[app_name]
+                t[0] += app_data["window_count"]
+                t[1] += app_data["visible_count"]
+                t[2] += app_data["minimized_count"]
         
-        # Click commands
-        elif parts[0].lower() == 'click':
-            button = "left"
-            x, y = None, None
-            
-            if len(parts) >= 2 and parts[1].lower() in ['left', 'right', 'middle']:
-                button = parts[1].lower()
-                if len(parts) >= 4:
-                    try:
-                        x, y = int(parts[2]), int(parts[3])
-                    except ValueError:
-                        return False, "Invalid coordinates"
-            elif len(parts) >= 3:
-                try:
-                    x, y = int(parts[1]), int(parts[2])
-                except ValueError:
-                    return False, "Invalid coordinates"
-            
-            return self.wm.send_mouse_click(button, x, y)
+        result = ["📱 APPLICATION SUMMARY:"]
+        result.extend(f"   {app}: {t[0]} total | {t[1]} visible | {t[2]} minimized"
+                      for app, t in sorted(totals.items()))
+        return True, "\n".join(result)
+    
+    def _h_displays(self, parts, rest) -> Tuple[bool, str]:
+        result = ["🖥️  DISPLAY INFORMATION:"]
+        for i, display in enumerate(self.wm.displays):
+            main_text = " (MAIN)" if display['is_main'] else ""
+            result.append(f"   Display {display['index']}{main_text}: {display['size']['width']}x{display['size']['height']} at ({display['origin']['x']}, {display['origin']['y']})")
+        return True, "\n".join(result)
+    
+    def _h_help(self, parts, rest) -> Tuple[bool, str]:
+        self.print_legend()
+        return True, "Help displayed"
+    
+    # Cursor commands
+    def _h_cursor(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) == 1:
+            success, message, pos = self.wm.get_cursor_position()
+            return success, message
+        elif len(parts) == 3:
+            try:
+                x, y = int(parts[1]), int(parts[2])
+                return self.wm.set_cursor_position(x, y)
+            except ValueError:
+                return _ERR_BAD_CURSOR
+        else:
+            return _ERR_BAD_CURSOR_CMD
+    
+    def _parse_click_args(self, parts):
+        """Parse '[button] [X Y]' click arguments -> (button, x, y) or None on bad coordinates"""
+        button = "left"
+        x, y = None, None
         
-        # Double click commands
-        elif parts[0].lower() == 'doubleclick':
-            button = "left"
-            x, y = None, None
-            
-            if len(parts) >= 2 and parts[1].lower() in ['left', 'right', 'middle']:
-                button = parts[1].lower()
-                if len(parts) >= 4:
-                    try:
-                        x, y = int(parts[2]), int(parts[3])
-                    except ValueError:
-                        return False, "Invalid coordinates"
-            elif len(parts) >= 3:
+        btn = parts[1].lower() if len(parts) >= 2 else ''
+        if btn in _BUTTONS:
+            button = btn
+            if len(parts) >= 4:
                 try:
-                    x, y = int(parts[1]), int(parts[2])
+                    x, y = int(parts[2]), int(parts[3])
                 except ValueError:
-                    return False, "Invalid coordinates"
-            
-            return self.wm.send_mouse_double_click(button, x, y)
-        
-        # Long click commands
-        elif parts[0].lower() == 'longclick':
-            button = "left"
-            duration = 1.0
-            x, y = None, None
-            
+                    return None
+        elif len(parts) >= 3:
             try:
-                if len(parts) >= 2 and parts[1].lower() in ['left', 'right', 'middle']:
-                    button = parts[1].lower()
-                    if len(parts) >= 3:
-                        duration = float(parts[2])
-                    if len(parts) >= 5:
-                        x, y = int(parts[3]), int(parts[4])
-                elif len(parts) >= 2:
-                    duration = float(parts[1])
-                    if len(parts) >= 4:
-                        x, y = int(parts[2]), int(parts[3])
-                
-                return self.wm.send_mouse_long_click(button, duration, x, y)
+                x, y = int(parts[1]), int(parts[2])
             except ValueError:
-                return False, "Invalid longclick parameters"
+                return None
         
-        # Scroll commands
-        elif parts[0].lower() == 'scroll':
-            if len(parts) < 2:
-                return False, "Missing scroll direction"
-            
-            direction = parts[1].lower()
-            amount = 3
-            x, y = None, None
-            
-            try:
-                if len(parts) >= 3 and parts[2].isdigit():
-                    amount = int(parts[2])
+        return button, x, y
+    
+    # Click commands
+    def _h_click(self, parts, rest) -> Tuple[bool, str]:
+        args = self._parse_click_args(parts)
+        if args is None:
+            return _ERR_COORDS
+        return self.wm.send_mouse_click(*args)
+    
+    # Double click commands
+    def _h_doubleclick(self, parts, rest) -> Tuple[bool, str]:
+        args = self._parse_click_args(parts)
+        if args is None:
+            return _ERR_COORDS
+        return self.wm.send_mouse_double_click(*args)
+    
+    # Long click commands
+    def _h_longclick(self, parts, rest) -> Tuple[bool, str]:
+        button = "left"
+        duration = 1.0
+        x, y = None, None
+        
+        btn = parts[1].lower() if len(parts) >= 2 else ''
+        try:
+            if btn in _BUTTONS:
+                button = btn
+                if len(parts) >= 3:
+                    duration = float(parts[2])
                 if len(parts) >= 5:
                     x, y = int(parts[3]), int(parts[4])
-                elif len(parts) >= 4 and not parts[2].isdigit():
+            elif len(parts) >= 2:
+                duration = float(parts[1])
+                if len(parts) >= 4:
                     x, y = int(parts[2]), int(parts[3])
-                
-                return self.wm.send_mouse_scroll(direction, amount, x, y)
-            except ValueError:
-                return False, "Invalid scroll parameters"
-        
-        # Drag commands
-        elif parts[0].lower() == 'drag':
-            if len(parts) < 5:
-                return False, "Missing drag coordinates"
             
-            try:
-                x1, y1, x2, y2 = int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])
-                button = "left"
-                duration = 0.5
-                
-                if len(parts) >= 6 and parts[5].lower() in ['left', 'right', 'middle']:
-                    button = parts[5].lower()
-                if len(parts) >= 7:
-                    duration = float(parts[6])
-                elif len(parts) >= 6 and parts[5].replace('.', '').isdigit():
-                    duration = float(parts[5])
-                
-                return self.wm.send_mouse_drag(x1, y1, x2, y2, button, duration)
-            except ValueError:
-                return False, "Invalid drag parameters"
+            return self.wm.send_mouse_long_click(button, duration, x, y)
+        except ValueError:
+            return _ERR_LONGCLICK
+    
+    # Scroll commands
+    def _h_scroll(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) < 2:
+            return _ERR_SCROLL_DIR
         
-        # Keyboard commands
-        elif parts[0].lower() == 'send':
-            if len(parts) < 2:
-                return False, "Missing key combination"
-            
-            key_combo = ' '.join(parts[1:])
-            return self.wm.send_key_combination(key_combo)
+        direction = parts[1].lower()
+        amount = 3
+        x, y = None, None
         
-        elif parts[0].lower() == 'type':
-            if len(parts) < 2:
-                return False, "Missing text to type"
+        try:
+            if len(parts) >= 3 and parts[2].isdigit():
+                amount = int(parts[2])
+            if len(parts) >= 5:
+                x, y = int(parts[3]), int(parts[4])
+            elif len(parts) >= 4 and not parts[2].isdigit():
+                x, y = int(parts[2]), int(parts[3])
             
-            text = ' '.join(parts[1:])
-            return self.wm.send_text(text)
+            return self.wm.send_mouse_scroll(direction, amount, x, y)
+        except ValueError:
+            return _ERR_SCROLL
+    
+    # Drag commands
+    def _h_drag(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) < 5:
+            return _ERR_DRAG_COORDS
         
-        # System commands
-        elif parts[0].lower() == 'computer':
-            return self.wm.get_computer_name()
+        try:
+            x1, y1, x2, y2 = int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4])
+            button = "left"
+            duration = 0.5
+            
+            btn = parts[5].lower() if len(parts) >= 6 else ''
+            if btn in _BUTTONS:
+                button = btn
+            if len(parts) >= 7:
+                duration = float(parts[6])
+            elif len(parts) >= 6 and parts[5].replace('.', '').isdigit():
+                duration = float(parts[5])
+            
+            return self.wm.send_mouse_drag(x1, y1, x2, y2, button, duration)
+        except ValueError:
+            return _ERR_DRAG
+    
+    # Keyboard commands
+    def _h_send(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) < 2:
+            return _ERR_KEYS
         
-        elif parts[0].lower() == 'user':
-            return self.wm.get_user_name()
+        return self.wm.send_key_combination(rest)
+    
+    def _h_type(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) < 2:
+            return _ERR_TEXT
         
-        elif parts[0].lower() == 'keys':
-            return self.wm.get_virtual_key_codes()
+        # Slice the raw text so repeated spaces are typed as entered
+        return self.wm.send_text(rest)
+    
+    # System commands
+    def _h_computer(self, parts, rest) -> Tuple[bool, str]:
+        return self.wm.get_computer_name()
+    
+    def _h_user(self, parts, rest) -> Tuple[bool, str]:
+        return self.wm.get_user_name()
+    
+    def _h_keys(self, parts, rest) -> Tuple[bool, str]:
+        return self.wm.get_virtual_key_codes()
+    
+    # Message box command
+    def _h_msgbox(self, parts, rest) -> Tuple[bool, str]:
+        if len(parts) < 3:
+            return _ERR_MSGBOX
         
-        # Message box command
-        elif parts[0].lower() == 'msgbox':
-            if len(parts) < 3:
-                return False, "Missing msgbox parameters"
-            
-            title = parts[1]
-            text = ' '.join(parts[2:])
-            return self.wm.show_message_box(title, text)
+        title = parts[1]
+        text = rest[len(title):].lstrip()
+        return self.wm.show_message_box(title, text)
+    
+    def _execute_window_command(self, parts) -> Tuple[bool, str]:
+        """Execute '<window id suffix> <command> [args]'"""
+        window_id_suffix = parts[0]
+        command = parts[1]
         
-        # Window commands (require window ID)
-        elif len(parts) >= 2:
-            window_id_suffix = parts[0]
-            command = parts[1]
-            
-            # Find window
-            if window_id_suffix not in self.window_lookup:
-                return False, f"Window ID '{window_id_suffix}' not found"
-            
-            window_info = self.window_lookup[window_id_suffix]
-            window_data = window_info['window_data']
-            window_number = window_data['window_number']
-            
-            # Execute window command
-            if command == 'm':
-                return self.wm.minimize_window(window_number)
-            elif command == 'M':
-                return self.wm.maximize_window(window_number)
-            elif command.lower() == 'c':
-                return self.wm.close_window(window_number)
-            elif command.lower() == 'f':
-                return self.wm.bring_to_foreground(window_number)
-            elif command.lower() == 's':
-                current_state = self.wm.get_window_state(window_number)
-                return True, f"Size: {window_data['size']['width']}x{window_data['size']['height']} | State: {current_state.upper()}"
-            elif command.lower() == 'l':
-                current_state = self.wm.get_window_state(window_number)
-                if current_state == "minimized":
-                    return True, f"Position: MINIMIZED (last: {window_data['position']['x']}, {window_data['position']['y']}) Display {window_data['display']} | State: {current_state.upper()}"
-                else:
-                    return True, f"Position: ({window_data['position']['x']}, {window_data['position']['y']}) Display {window_data['display']} | State: {current_state.upper()}"
-            elif command.lower() == 'resize' and len(parts) == 4:
-                try:
-                    width, height = int(parts[2]), int(parts[3])
-                    return self.wm.resize_window(window_number, width, height)
-                except ValueError:
-                    return False, "Invalid resize dimensions"
-            elif command.lower() == 'move' and len(parts) == 4:
-                try:
-                    x, y = int(parts[2]), int(parts[3])
-                    return self.wm.move_window(window_number, x, y)
-                except ValueError:
-                    return False, "Invalid move coordinates"
-            elif command.lower() == 'display' and len(parts) == 3:
-                try:
-                    display_id = int(parts[2])
-                    return self.wm.move_window_to_display(window_number, display_id)
-                except ValueError:
-                    return False, "Invalid display ID"
-            elif command == 'i' or command == 'inspect':
-                # Deep introspection 
-                success, result = self.wm.introspect_window(window_number)
-                return success, result
-            elif command == 'hover' or command == 'detect':
-                # Analyze element under cursor
-                success, result = self.wm.get_element_under_cursor()
-                return success, result
-            else:
-                return False, f"Unknown window command: {command}"
+        # Find window
+        rec = self.window_lookup.get(window_id_suffix)
+        if rec is None:
+            return False, f"Window ID '{window_id_suffix}' not found"
         
-        return False, f"Unknown command: {parts[0]}"
+        # m/M and the introspection commands are case-sensitive, the rest are not
+        handler = self._window_handlers.get(command)
+        if handler is None and command.lower() in _CASELESS_WINDOW_CMDS:
+            handler = self._window_handlers[command.lower()]
+        if handler is None:
+            return False, f"Unknown window command: {command}"
+        return handler(parts, rec)
+    
+    def _w_minimize(self, parts, rec) -> Tuple[bool, str]:
+        return self.wm.minimize_window(rec.wn)
+    
+    def _w_maximize(self, parts, rec) -> Tuple[bool, str]:
+        return self.wm.maximize_window(rec.wn)
+    
+    def _w_close(self, parts, rec) -> Tuple[bool, str]:
+        return self.wm.close_window(rec.wn)
+    
+    def _w_foreground(self, parts, rec) -> Tuple[bool, str]:
+        return self.wm.bring_to_foreground(rec.wn)
+    
+    def _current_rec(self, rec):
+        """rec re-read from a fresh snapshot if a window-changing command ran since the last refresh
+        (the background refresh is debounced, so e.g. '<id> r 800 600 : <id> s' would see old sizes)"""
+        if self._mutated_since_refresh:
+            self.refresh_windows()
+            # The id suffix can change with the title, so match on the window number
+            rec = next((r for r in self.window_lookup.values() if r.wn == rec.wn), rec)
+        return rec
+    
+    def _w_size(self, parts, rec) -> Tuple[bool, str]:
+        rec = self._current_rec(rec)
+        current_state = self.wm.get_window_state(rec.wn)
+        return True, f"Size: {rec.w}x{rec.h} | State: {current_state.upper()}"
+    
+    def _w_location(self, parts, rec) -> Tuple[bool, str]:
+        rec = self._current_rec(rec)
+        current_state = self.wm.get_window_state(rec.wn)
+        if current_state == "minimized":
+            return True, f"Position: MINIMIZED (last: {rec.x}, {rec.y}) Display {rec.disp} | State: {current_state.upper()}"
+        else:
+            return True, f"Position: ({rec.x}, {rec.y}) Display {rec.disp} | State: {current_state.upper()}"
+    
+    def _w_resize(self, parts, rec) -> Tuple[bool, str]:
+        if len(parts) != 4:
+            return False, f"Unknown window command: {parts[1]}"
+        try:
+            width, height = int(parts[2]), int(parts[3])
+            return self.wm.resize_window(rec.wn, width, height)
+        except ValueError:
+            return _ERR_RESIZE
+    
+    def _w_move(self, parts, rec) -> Tuple[bool, str]:
+        if len(parts) != 4:
+            return False, f"Unknown window command: {parts[1]}"
+        try:
+            x, y = int(parts[2]), int(parts[3])
+            return self.wm.move_window(rec.wn, x, y)
+        except ValueError:
+            return _ERR_MOVE
+    
+    def _w_display(self, parts, rec) -> Tuple[bool, str]:
+        if len(parts) != 3:
+            return False, f"Unknown window command: {parts[1]}"
+        try:
+            display_id = int(parts[2])
+            return self.wm.move_window_to_display(rec.wn, display_id)
+        except ValueError:
+            return _ERR_DISPLAY
+    
+    def _w_inspect(self, parts, rec) -> Tuple[bool, str]:
+        # Deep introspection 
+        return self.wm.introspect_window(rec.wn)
+    
+    def _w_hover(self, parts, rec) -> Tuple[bool, str]:
+        # Analyze element under cursor
+        return self.wm.get_element_under_cursor()
+    
+    def _wait_until_settled(self, delay: float):
+        """Wait up to delay seconds, returning early once the frontmost app is idle"""
+        start = time.monotonic()
+        deadline = start + delay
+        time.sleep(delay * CHAIN_MIN_DWELL_FRACTION)
+        while time.monotonic() < deadline:
+            if self.wm.last_op_settled():
+                break
+            time.sleep(CHAIN_POLL_INTERVAL)
     
     def process_command(self, user_input):
         """Process user command (supports chaining with ' : ')"""
@@ -439,13 +690,14 @@ class MacWindowController:
                     print(f"   ⚠️  Chain stopped at step {i+1}")
                     break
                 
-                # Adaptive delay based on command type
-                if 'click' in cmd.lower() or 'focus' in cmd.lower() or cmd.lower().endswith('f'):
-                    time.sleep(0.3)  # Longer delay after focus/click operations
-                elif 'send' in cmd.lower() or 'type' in cmd.lower():
-                    time.sleep(0.2)  # Medium delay for keyboard operations
-                else:
-                    time.sleep(0.1)  # Short delay for other operations
+                # Adaptive delay based on command type: longer after focus/click, medium for keyboard
+                parts, head, _ = _parse(cmd)
+                if len(parts) >= 2 and _is_window_id(head):
+                    head = parts[1].lower()
+                self._wait_until_settled(_CMD_DELAY.get(head, CHAIN_DEFAULT_DELAY))
+            
+            if self._needs_refresh(commands):
+                self._refresh_event.set()
             
             if overall_success:
                 return True, f"✅ Command chain completed successfully ({len(commands)} steps)"
@@ -456,17 +708,15 @@ class MacWindowController:
         success, message = self._execute_single_command(user_input)
         
         # Check if ID changed after operation (for window commands)
-        self.refresh_windows()
+        if self._needs_refresh((user_input,)):
+            self._refresh_event.set()
         
         status = "✅" if success else "❌"
         return True, f"{status} {message}"
     
     def run_interactive_mode(self):
         """Run the interactive Mac window controller"""
-        print("🍎 Starting Interactive Mac Window Manager...")
-        print("⚠️  Note: Make sure you've granted accessibility permissions!")
-        print("   Go to: System Preferences → Security & Privacy → Privacy → Accessibility")
-        print("   Add your terminal application (Terminal, iTerm2, etc.)")
+        sys.stdout.write(_BANNER)
         
         # Initial display
         self.print_windows_summary()
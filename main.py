@@ -8,31 +8,57 @@ import time
 import json
 import cv2
 import numpy as np
-from functools import wraps
+from collections import defaultdict
+from dataclasses import astuple
+from functools import wraps, lru_cache
 from PIL import Image
 from datetime import datetime
 from utils.yolo_detector import YOLODetector, YOLOConfig
-from utils.ocr_detector import OCRDetector, OCRDetConfig
+from utils.ocr_detector import OCRDetector, OCRDetConfig, rgb_array_to_pil
 from utils.bbox_merger import BBoxMerger
 from utils.beautiful_visualizer import BeautifulVisualizer
 from utils.seraphine_processor import FinalSeraphineProcessor, convert_detections_to_seraphine_format
 from utils.seraphine_generator import FinalGroupImageGenerator
 import asyncio
-from utils.gemini_integration import run_gemini_analysis, integrate_gemini_results
+from utils.gemini_integration import run_gemini_analysis, run_gemini_analysis_streaming, integrate_gemini_results
 from utils.pipeline_exporter import save_enhanced_pipeline_json
 from concurrent.futures import ThreadPoolExecutor
 from utils.parallel_processor import ParallelProcessor
-from utils.helpers import load_configuration, debug_print
+from utils.helpers import load_configuration, debug_print, set_debug_mode
 
 
 
 
+# Pre-formatted pipeline IDs ("Y001", "O001", "M001", ...) for typical screen densities
+ID_TABLE_SIZE = 4096
+_Y_IDS = tuple(f"Y{i:03d}" for i in range(1, ID_TABLE_SIZE + 1))
+_O_IDS = tuple(f"O{i:03d}" for i in range(1, ID_TABLE_SIZE + 1))
+_M_IDS = tuple(f"M{i:03d}" for i in range(1, ID_TABLE_SIZE + 1))
+
+def id_table(prefix_ids, count):
+    """First `count` IDs from a pre-formatted table, formatting only the overflow"""
+    if count <= len(prefix_ids):
+        return prefix_ids[:count]
+    prefix = prefix_ids[0][0]
+    return prefix_ids + tuple(f"{prefix}{i:03d}" for i in range(len(prefix_ids) + 1, count + 1))
+
+def resolve_model_path(model_path, config):
+    """With use_int8_models, prefer the quantized <model>_int8.onnx (see utils/quantize_models.py) when present"""
+    if not config.get("use_int8_models", False):
+        return model_path
+    root, ext = os.path.splitext(model_path)
+    int8_path = f"{root}_int8{ext}"
+    if os.path.exists(int8_path):
+        return int8_path
+    debug_print(f"⚠️  use_int8_models is set but {int8_path} not found, using {model_path}")
+    return model_path
+
 def setup_detector_configs(config):
     """Setup YOLO and OCR configurations from config.json"""
     
     # Configure YOLO from config.json
     yolo_config = YOLOConfig(
-        model_path=config.get("yolo_model_path", "models/model_dynamic.onnx"),
+        model_path=resolve_model_path(config.get("yolo_model_path", "models/model_dynamic.onnx"), config),
         conf_threshold=config.get("yolo_conf_threshold", 0.1),
         iou_threshold=config.get("yolo_iou_threshold", 0.1),
         enable_timing=config.get("yolo_enable_timing", True),
@@ -41,7 +67,7 @@ def setup_detector_configs(config):
     
     # Configure OCR from config.json
     ocr_config = OCRDetConfig(
-        model_path=config.get("ocr_model_path", "models/ch_PP-OCRv3_det_infer.onnx"),
+        model_path=resolve_model_path(config.get("ocr_model_path", "models/ch_PP-OCRv3_det_infer.onnx"), config),
         det_threshold=config.get("ocr_det_threshold", 0.3),
         max_side_len=config.get("ocr_max_side_len", 960),
         enable_timing=config.get("ocr_enable_timing", True),
@@ -54,28 +80,46 @@ def setup_detector_configs(config):
     
     return yolo_config, ocr_config
 
-def load_image_opencv(image_path):
-    """Load image using OpenCV (no PIL)"""
-    if not os.path.exists(image_path):
-        debug_print(f"❌ Error: Image file '{image_path}' not found!")
-        return None
+def load_image_opencv(image_path, max_side_len=None):
+    """
+    Load image using OpenCV. When max_side_len is given and the image is at least
+    2x/4x larger than that, it is decoded at 1/2 or 1/4 size (IMREAD_REDUCED_COLOR_*).
     
-    # Load with OpenCV
-    img_bgr = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    Returns:
+        (img_bgr or None, scale) - multiply detection coordinates by scale for original-image space
+    """
+    # Header-only size peek (PIL doesn't decode pixels until asked)
+    read_flag, scale = cv2.IMREAD_COLOR, 1
+    if max_side_len:
+        try:
+            with Image.open(image_path) as header:
+                longest_side = max(header.size)
+            if longest_side >= 4 * max_side_len:
+                read_flag, scale = cv2.IMREAD_REDUCED_COLOR_4, 4
+            elif longest_side >= 2 * max_side_len:
+                read_flag, scale = cv2.IMREAD_REDUCED_COLOR_2, 2
+        except Exception:
+            pass  # missing/unreadable files are reported by the imread check below
+    
+    # Load with OpenCV (returns None for a missing file too, so no separate exists() stat)
+    img_bgr = cv2.imread(image_path, read_flag)
     if img_bgr is None:
-        debug_print(f"❌ Error: Could not load image '{image_path}'")
-        return None
+        debug_print(f"❌ Error: Image file '{image_path}' not found or could not be loaded")
+        return None, 1
     
-    debug_print(f"📸 Image loaded: {img_bgr.shape[1]}x{img_bgr.shape[0]} pixels")
-    return img_bgr
+    debug_print(f"📸 Image loaded: {img_bgr.shape[1]}x{img_bgr.shape[0]} pixels" + (f" (decoded at 1/{scale})" if scale > 1 else ""))
+    return img_bgr, scale
+
+def scale_detection_bboxes(detections, scale):
+    """Map bboxes detected on a reduced decode back to original-image pixels (new lists, never in place)"""
+    for detection in detections:
+        detection['bbox'] = [int(round(v * scale)) for v in detection['bbox']]
 
 def convert_bgr_to_pil_for_ocr(img_bgr):
-    """Convert OpenCV BGR to PIL RGB for OCR detector (temporary until we optimize OCR)"""
-    # Convert BGR to RGB
+    """Convert OpenCV BGR to PIL RGB (OCRDetector.detect also takes the arrays directly)"""
+    # Convert BGR to RGB once; the PIL image shares that buffer
     img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    # Convert to PIL (OCR still needs PIL for now)
-    pil_image = Image.fromarray(img_rgb)
-    return pil_image
+    return rgb_array_to_pil(img_rgb)
 
 def assign_intelligent_ids(yolo_detections, ocr_detections):
     """
@@ -86,18 +130,14 @@ def assign_intelligent_ids(yolo_detections, ocr_detections):
     debug_print("🔖 Assigning simple, clean IDs for pipeline tracking...")
     
     # Assign YOLO IDs - CLEAN VERSION (remove 'id' field)
-    for i, detection in enumerate(yolo_detections):
-        detection['y_id'] = f"Y{i+1:03d}"
-        # Remove redundant 'id' field completely
-        if 'id' in detection:
-            del detection['id']
+    for detection, y_id in zip(yolo_detections, id_table(_Y_IDS, len(yolo_detections))):
+        detection['y_id'] = y_id
+        detection.pop('id', None)
     
     # Assign OCR IDs - CLEAN VERSION (remove 'id' field)
-    for i, detection in enumerate(ocr_detections):
-        detection['o_id'] = f"O{i+1:03d}"
-        # Remove redundant 'id' field completely  
-        if 'id' in detection:
-            del detection['id']
+    for detection, o_id in zip(ocr_detections, id_table(_O_IDS, len(ocr_detections))):
+        detection['o_id'] = o_id
+        detection.pop('id', None)
     
     debug_print(f"  ✅ Assigned {len(yolo_detections)} YOLO IDs (Y001-Y{len(yolo_detections):03d})")
     debug_print(f"  ✅ Assigned {len(ocr_detections)} OCR IDs (O001-O{len(ocr_detections):03d})")
@@ -110,6 +150,14 @@ def create_intelligent_merger(config):
     class IntelligentBBoxMerger(BBoxMerger):
         """Enhanced merger with clean ID tracking and proper field ordering"""
         
+        # Internal merge bookkeeping plus the fields placed explicitly at the front
+        _EXCLUDED = frozenset({'id', 'merged_id', 'merge_id', 'source_ids', 'relationship',
+                               'original_id', 'yolo_id', 'ocr_id', 'y_id', 'o_id', 'm_id',
+                               'bbox', 'type', 'source', 'confidence'})
+        
+        # source -> (id field that source keeps, prefix for a missing id); the other id is "NA"
+        _SRC_MAP = {'yolo': ('y_id', 'Y'), 'ocr_det': ('o_id', 'O')}
+        
         def merge_detections(self, yolo_detections, ocr_detections):
             """Enhanced merge with CLEAN ID tracking and m_id first"""
             import time
@@ -118,47 +166,34 @@ def create_intelligent_merger(config):
             # Call parent merge method
             merged_detections, merge_stats = super().merge_detections(yolo_detections, ocr_detections)
             
-            # Create new, properly ordered detections
-            cleaned_merged = []
+            # Reorder each detection in place: m_id, y_id, o_id, core fields, then the rest
+            m_ids = id_table(_M_IDS, len(merged_detections))
+            excluded = IntelligentBBoxMerger._EXCLUDED
+            src_map = IntelligentBBoxMerger._SRC_MAP
             
             for i, detection in enumerate(merged_detections):
-                # Create new detection with proper field order: m_id, y_id, o_id
-                cleaned_detection = {}
+                # 1. Primary ID first, then source tracking (y_id, o_id - "NA" for the other source)
+                ordered = {'m_id': m_ids[i], 'y_id': "NA", 'o_id': "NA"}
                 
-                # 1. Primary ID first (most important)
-                cleaned_detection['m_id'] = f"M{i+1:03d}"
+                # 2. Keep the id of the source the box came from (unknown sources keep both "NA")
+                kept = src_map.get(detection['source'])
+                if kept:
+                    id_field, prefix = kept
+                    source_id = detection.get(id_field)
+                    ordered[id_field] = source_id if source_id is not None else f"{prefix}{i+1:03d}"
                 
-                # 2. Source tracking (in logical order)
-                if detection['source'] == 'yolo':
-                    # Came from YOLO - has y_id, no o_id
-                    cleaned_detection['y_id'] = detection.get('y_id', f"Y{i+1:03d}")
-                    cleaned_detection['o_id'] = "NA"
-                elif detection['source'] == 'ocr_det':
-                    # Came from OCR - has o_id, no y_id  
-                    cleaned_detection['y_id'] = "NA"
-                    cleaned_detection['o_id'] = detection.get('o_id', f"O{i+1:03d}")
-                else:
-                    # Shouldn't happen, but future-proofing
-                    cleaned_detection['y_id'] = "NA"
-                    cleaned_detection['o_id'] = "NA"
-                
-                # 3. Copy other important fields (in original order)
-                for key in ['bbox', 'type', 'source', 'confidence']:
+                # 3. Core fields (in original order)
+                for key in ('bbox', 'type', 'source', 'confidence'):
                     if key in detection:
-                        cleaned_detection[key] = detection[key]
+                        ordered[key] = detection[key]
                 
-                # Add any other fields except the ones we want to remove
-                excluded_fields = {'id', 'merged_id', 'merge_id', 'source_ids', 'relationship', 
-                                 'original_id', 'yolo_id', 'ocr_id', 'y_id', 'o_id', 'm_id',
-                                 'bbox', 'type', 'source', 'confidence'}
+                # Any other fields follow the core ones; merge bookkeeping is dropped
+                ordered.update((key, value) for key, value in detection.items() if key not in excluded)
                 
-                for key, value in detection.items():
-                    if key not in excluded_fields:
-                        cleaned_detection[key] = value
-                
-                cleaned_merged.append(cleaned_detection)
+                detection.clear()
+                detection.update(ordered)
             
-            return cleaned_merged, merge_stats
+            return merged_detections, merge_stats
     
     return IntelligentBBoxMerger(
         iou_threshold=config.get("merger_iou_threshold", 0.05),
@@ -167,9 +202,40 @@ def create_intelligent_merger(config):
         enable_timing=True
     )
 
-def run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config):
+# Detectors shared by every pipeline run, keyed on their full config
+_YOLO_SINGLETON = {}
+_OCR_SINGLETON = {}
+
+def get_yolo(yolo_config):
+    """YOLODetector for this config, built once per process"""
+    key = astuple(yolo_config)
+    detector = _YOLO_SINGLETON.get(key)
+    if detector is None:
+        detector = _YOLO_SINGLETON[key] = YOLODetector(yolo_config)
+    return detector
+
+def get_ocr(ocr_config):
+    """OCRDetector for this config, built once per process"""
+    key = astuple(ocr_config)
+    detector = _OCR_SINGLETON.get(key)
+    if detector is None:
+        detector = _OCR_SINGLETON[key] = OCRDetector(ocr_config)
+    return detector
+
+# Caps how many pipelines run detection at once (created on first use, per config)
+_detection_semaphore = None
+
+def get_detection_semaphore(config):
+    """Shared semaphore limiting concurrent detector runs (config: ocr_concurrency)"""
+    global _detection_semaphore
+    if _detection_semaphore is None:
+        _detection_semaphore = asyncio.Semaphore(config.get("ocr_concurrency", os.cpu_count() or 1))
+    return _detection_semaphore
+
+async def run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config, scale=1):
     """
     Step 1: Run YOLO + OCR detection + intelligent merging (FIXED - using ParallelProcessor!)
+    scale: reduction factor from load_image_opencv; bboxes are returned in original-image space
     """
     debug_print("\n🔄 Step 1: Parallel YOLO + OCR Detection + Intelligent Merging (FIXED)")
     debug_print("=" * 60)
@@ -181,63 +247,66 @@ def run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config):
         merger_iou_threshold=config.get("merger_iou_threshold"),
         enable_timing=config.get("yolo_enable_timing", True),
         create_visualizations=False,  # We handle visualizations separately
-        save_intermediate_results=False  # We handle JSON separately
+        save_intermediate_results=False,  # We handle JSON separately
+        yolo_detector=get_yolo(yolo_config),
+        ocr_detector=get_ocr(ocr_config)
     )
     
-    # For now, save BGR as temp file for ParallelProcessor 
-    # (until ParallelProcessor supports direct PIL/numpy input)
-    temp_image_path = "temp_detection_image.jpg"
-    cv2.imwrite(temp_image_path, img_bgr)
+    detection_start = time.time()
     
-    try:
-        detection_start = time.time()
-        
-        # 🎯 Use the PROPER ParallelProcessor with full merging logic!
-        results = parallel_processor.process_image(temp_image_path, "temp")
-        
-        total_detection_time = time.time() - detection_start
-        
-        # Extract results (ParallelProcessor returns proper structure)
-        yolo_detections = results['yolo_detections']
-        ocr_detections = results['ocr_detections'] 
-        merged_detections = results['merged_detections']
-        merge_stats = results['merge_stats']
-        
-        # Assign intelligent IDs for tracking (same as before)
-        yolo_detections, ocr_detections = assign_intelligent_ids(yolo_detections, ocr_detections)
-        
-        # Update merged detections with proper IDs
-        for i, detection in enumerate(merged_detections):
-            detection['m_id'] = f"M{i+1:03d}"
-        
-        debug_print(f"\n📊 FIXED Detection + Merge Results:")
-        debug_print(f"  🎯 YOLO detections: {len(yolo_detections)} (Y001-Y{len(yolo_detections):03d})")
-        debug_print(f"  📝 OCR detections: {len(ocr_detections)} (O001-O{len(ocr_detections):03d})")
-        debug_print(f"  🔗 MERGED detections: {len(merged_detections)} (M001-M{len(merged_detections):03d})")
-        debug_print(f"  ⏱️  Total time: {total_detection_time:.3f}s")
-        debug_print(f"  🎯 PROPER 3-stage merging logic restored!")
-        debug_print(f"  📈 Merge efficiency: {len(yolo_detections) + len(ocr_detections)} → {len(merged_detections)} ({len(yolo_detections) + len(ocr_detections) - len(merged_detections)} removed)")
-        
-        return {
-            'yolo_detections': yolo_detections,
-            'ocr_detections': ocr_detections, 
-            'merged_detections': merged_detections,
-            'merge_stats': merge_stats,
-            'timing': {
-                'total_detection_time': total_detection_time,
-                'parallel_detection_time': results['timing']['parallel_detection_time'],
-                'merge_time': results['timing']['merge_time']
-            }
+    # 🎯 Use the PROPER ParallelProcessor with full merging logic!
+    # The BGR array goes straight to the detectors (no temp JPEG encode/decode);
+    # YOLO and OCR are awaited together so the event loop isn't blocked meanwhile
+    async with get_detection_semaphore(config):
+        results = await parallel_processor.process_image_array_async(img_bgr, "temp")
+    
+    total_detection_time = time.time() - detection_start
+    
+    # Extract results (ParallelProcessor returns proper structure)
+    yolo_detections = results['yolo_detections']
+    ocr_detections = results['ocr_detections'] 
+    merged_detections = results['merged_detections']
+    merge_stats = results['merge_stats']
+    
+    # Merged detections are shallow copies sharing bbox lists, so each list is replaced, not scaled in place
+    if scale != 1:
+        for detections in (yolo_detections, ocr_detections, merged_detections):
+            scale_detection_bboxes(detections, scale)
+    
+    # Assign intelligent IDs for tracking (same as before)
+    yolo_detections, ocr_detections = assign_intelligent_ids(yolo_detections, ocr_detections)
+    
+    # Update merged detections with proper IDs and build the seraphine input in the same pass
+    seraphine_detections = []
+    for detection, m_id in zip(merged_detections, id_table(_M_IDS, len(merged_detections))):
+        detection['m_id'] = m_id
+        seraphine_detections.append(to_seraphine_detection(detection, m_id))
+    
+    debug_print(f"\n📊 FIXED Detection + Merge Results:")
+    debug_print(f"  🎯 YOLO detections: {len(yolo_detections)} (Y001-Y{len(yolo_detections):03d})")
+    debug_print(f"  📝 OCR detections: {len(ocr_detections)} (O001-O{len(ocr_detections):03d})")
+    debug_print(f"  🔗 MERGED detections: {len(merged_detections)} (M001-M{len(merged_detections):03d})")
+    debug_print(f"  ⏱️  Total time: {total_detection_time:.3f}s")
+    debug_print(f"  🎯 PROPER 3-stage merging logic restored!")
+    debug_print(f"  📈 Merge efficiency: {len(yolo_detections) + len(ocr_detections)} → {len(merged_detections)} ({len(yolo_detections) + len(ocr_detections) - len(merged_detections)} removed)")
+    
+    return {
+        'yolo_detections': yolo_detections,
+        'ocr_detections': ocr_detections, 
+        'merged_detections': merged_detections,
+        'seraphine_detections': seraphine_detections,
+        'merge_stats': merge_stats,
+        'timing': {
+            'total_detection_time': total_detection_time,
+            'parallel_detection_time': results['timing']['parallel_detection_time'],
+            'merge_time': results['timing']['merge_time']
         }
-        
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
+    }
 
-def run_seraphine_grouping(merged_detections, config):
+def run_seraphine_grouping(merged_detections, config, seraphine_detections=None):
     """
     Step 2: Run Seraphine intelligent grouping with perfect m_id tracking
+    (seraphine_detections: already-converted input from step 1, converted here if omitted)
     """
     debug_print("\n🧠 Step 2: Seraphine Intelligent Grouping & Layout Analysis")
     debug_print("=" * 60)
@@ -249,7 +318,8 @@ def run_seraphine_grouping(merged_detections, config):
     seraphine_start = time.time()
     
     # Convert merged detections to seraphine format with PERFECT m_id mapping
-    seraphine_detections = convert_merged_to_seraphine_format(merged_detections)
+    if seraphine_detections is None:
+        seraphine_detections = convert_merged_to_seraphine_format(merged_detections)
     
     # Initialize seraphine processor
     seraphine_processor = FinalSeraphineProcessor(
@@ -283,6 +353,20 @@ def run_seraphine_grouping(merged_detections, config):
     
     return enhanced_analysis
 
+def to_seraphine_detection(detection, m_id):
+    """One merged detection in seraphine input format, keyed by its m_id (bbox is shared, not copied)"""
+    return {
+        'bbox': detection['bbox'],
+        'id': m_id,  # CRITICAL: This will be used by seraphine for group mapping
+        'merged_id': m_id,  # Keep reference
+        'type': detection.get('type', 'unknown'),
+        'source': detection.get('source', 'merged'),
+        'confidence': detection.get('confidence', 1.0),
+        # Keep original tracking info for reference
+        'y_id': detection.get('y_id', 'NA'),
+        'o_id': detection.get('o_id', 'NA')
+    }
+
 def convert_merged_to_seraphine_format(merged_detections):
     """
     Convert merged detections to seraphine format with PERFECT m_id preservation
@@ -290,25 +374,8 @@ def convert_merged_to_seraphine_format(merged_detections):
     """
     debug_print("🔗 Converting merged detections to seraphine format (preserving m_ids)...")
     
-    seraphine_detections = []
-    
-    for detection in merged_detections:
-        # CRITICAL: Use m_id as the primary ID for seraphine
-        m_id = detection['m_id']  # e.g., "M001"
-        
-        seraphine_detection = {
-            'bbox': detection['bbox'],
-            'id': m_id,  # CRITICAL: This will be used by seraphine for group mapping
-            'merged_id': m_id,  # Keep reference
-            'type': detection.get('type', 'unknown'),
-            'source': detection.get('source', 'merged'),
-            'confidence': detection.get('confidence', 1.0),
-            # Keep original tracking info for reference
-            'y_id': detection.get('y_id', 'NA'),
-            'o_id': detection.get('o_id', 'NA')
-        }
-        
-        seraphine_detections.append(seraphine_detection)
+    # CRITICAL: Use m_id as the primary ID for seraphine
+    seraphine_detections = [to_seraphine_detection(detection, detection['m_id']) for detection in merged_detections]
     
     debug_print(f"  ✅ Converted {len(seraphine_detections)} detections with preserved m_ids")
     return seraphine_detections
@@ -326,11 +393,10 @@ def create_seraphine_id_mapping(seraphine_analysis, merged_detections):
     m_id_to_group = bbox_processor.bbox_to_group_mapping
     
     # Create reverse mapping for easy lookup
-    group_to_m_ids = {}
+    group_to_m_ids = defaultdict(list)
     for m_id, group_label in m_id_to_group.items():
-        if group_label not in group_to_m_ids:
-            group_to_m_ids[group_label] = []
         group_to_m_ids[group_label].append(m_id)
+    group_to_m_ids = dict(group_to_m_ids)
     
     # Enhance the original analysis with tracking info
     enhanced_analysis = seraphine_analysis.copy()
@@ -354,9 +420,20 @@ def create_seraphine_id_mapping(seraphine_analysis, merged_detections):
     
     return enhanced_analysis
 
-def create_visualizations(image_path, detection_results, seraphine_analysis, config, gemini_results=None):
+@lru_cache(maxsize=4)
+def get_visualizer(output_dir):
+    """BeautifulVisualizer reused across pipeline runs (config is refreshed by the caller)"""
+    return BeautifulVisualizer(output_dir=output_dir)
+
+@lru_cache(maxsize=4)
+def get_group_image_generator(output_dir, save_mapping=False):
+    """FinalGroupImageGenerator reused across pipeline runs"""
+    return FinalGroupImageGenerator(output_dir=output_dir, save_mapping=save_mapping)
+
+def create_visualizations(image_path, detection_results, seraphine_analysis, config, gemini_results=None, img_rgb=None):
     """
     Step 6: Create beautiful visualizations (respecting config settings)
+    img_rgb: the already-decoded screenshot; image_path is only re-read when it is missing
     """
     if not config.get("save_visualizations", False):
         debug_print("\n⏭️  Visualizations disabled in config (save_visualizations: false)")
@@ -366,15 +443,19 @@ def create_visualizations(image_path, detection_results, seraphine_analysis, con
     debug_print("=" * 70)
     
     import time
-    from utils.beautiful_visualizer import BeautifulVisualizer
     
     output_dir = config.get("output_dir", "outputs")
     filename_base = os.path.splitext(os.path.basename(image_path))[0]
     
     viz_start = time.time()
     
-    # Initialize visualizer with config
-    visualizer = BeautifulVisualizer(output_dir=output_dir, config=config)
+    # Reuse the cached visualizer with this run's config
+    visualizer = get_visualizer(output_dir)
+    visualizer.config = config
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # One RGB image shared by every visualization (they only read from it)
+    original_image = rgb_array_to_pil(img_rgb) if img_rgb is not None else Image.open(image_path).convert('RGB')
     
     # Create traditional visualizations (respecting config)
     viz_results = {
@@ -387,7 +468,8 @@ def create_visualizations(image_path, detection_results, seraphine_analysis, con
     visualization_paths = visualizer.create_all_visualizations(
         image_path=image_path,
         results=viz_results,
-        filename_base=f"v1_{filename_base}"
+        filename_base=f"v1_{filename_base}",
+        image=original_image
     )
     
     # Create seraphine group visualization using existing method
@@ -395,7 +477,8 @@ def create_visualizations(image_path, detection_results, seraphine_analysis, con
         seraphine_path = visualizer.create_seraphine_group_visualization(
             image_path=image_path,
             seraphine_analysis=seraphine_analysis,
-            filename_base=f"v1_{filename_base}"
+            filename_base=f"v1_{filename_base}",
+            image=original_image
         )
         if seraphine_path:
             visualization_paths['seraphine_groups'] = seraphine_path
@@ -404,9 +487,6 @@ def create_visualizations(image_path, detection_results, seraphine_analysis, con
     if gemini_results and config.get("save_gemini_visualization", True):
         debug_print("🎨 Creating Gemini analysis visualization...")
         try:
-            from PIL import Image as PILImage
-            original_image = PILImage.open(image_path)
-            
             # Use the EXACT gemini_results format - the visualizer expects this!
             gemini_viz_path = visualizer._create_gemini_visualization(
                 image=original_image,
@@ -484,15 +564,34 @@ def display_enhanced_pipeline_summary(image_path, detection_results, seraphine_a
 
     debug_print(f"🔗 Perfect ID Traceability: Y/O IDs → M IDs → Seraphine Groups → Gemini Analysis")
 
-async def main(image_path):
-    """Main enhanced pipeline execution - MODE AWARE"""
+def _fastpath_result(mode, detection_results, total_time):
+    """Result for frames with too few detections to group: same shape as a full run, no groups"""
+    if mode == "deploy_mcp":
+        print(f"Pipeline completed in {total_time:.3f}s, found 0 icons.")
+        return {'total_time': total_time, 'total_icons_found': 0, 'seraphine_groups': {}}
+    
+    debug_print(f"⏭️  Only {len(detection_results['merged_detections'])} detections - skipping grouping and Gemini ({total_time:.3f}s)")
+    return None, {
+        'total_time': total_time,
+        'detection_summary': {
+            'yolo_count': len(detection_results['yolo_detections']),
+            'ocr_count': len(detection_results['ocr_detections']),
+            'merged_count': len(detection_results['merged_detections'])
+        },
+        'seraphine_groups': {}
+    }
+
+async def main(image_path, config=None):
+    """Main enhanced pipeline execution - MODE AWARE (config: pre-loaded config.json, else read here)"""
     pipeline_start = time.time()
     
-    config = load_configuration()
+    # Work on a copy: deploy mode overrides below must not leak into the caller's config
+    config = dict(config) if config else load_configuration()
     if not config:
         return None
     
     mode = config.get("mode", "debug")
+    set_debug_mode(config.get("mode", ""))
     
     # Force disable ALL debug output in deploy mode
     if mode == "deploy_mcp":
@@ -507,6 +606,9 @@ async def main(image_path):
             "save_json": False,
             "save_gemini_visualization": False,
             "save_gemini_json": False,
+            "save_grouped_images": False,
+            # Gemini gets the group images in memory - file mode would write combined_groups_*.png
+            "gemini_return_images_b64": True,
         })
     
     debug_print("🚀 ENHANCED AI PIPELINE V1.2: Detection + Merging + Seraphine + Gemini + Export")
@@ -516,39 +618,54 @@ async def main(image_path):
     if not image_path:
         # image_path = "images/word.png"
         image_path = "images/calculator.png"
-    img_bgr = load_image_opencv(image_path)
-    # if img_bgr is None:
-    #     return None
+    # No detector looks at more than this many pixels per side, so decode no larger than needed
+    detector_max_side = max(max(yolo_config.max_resolution), ocr_config.max_side_len)
+    img_bgr, decode_scale = load_image_opencv(image_path, detector_max_side)
+    if img_bgr is None:
+        return None
     
     debug_print(f"📸 Image loaded: {img_bgr.shape[1]}x{img_bgr.shape[0]} pixels")
     
+    # RGB copy made once for everything downstream that wants the screenshot (crops, visualizations);
+    # a reduced decode doesn't match original-image coordinates, so those steps re-read the file instead
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB) if decode_scale == 1 else None
+    original_image = rgb_array_to_pil(img_rgb) if img_rgb is not None else None
+    
     try:
         # Step 1: Detection + Merging
-        detection_results = run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config)
+        detection_results = await run_parallel_detection_and_merge(img_bgr, yolo_config, ocr_config, config,
+                                                                    scale=decode_scale)
+        
+        # Blank/near-blank frames: nothing to group, skip seraphine, image generation and Gemini
+        if len(detection_results['merged_detections']) < config.get("min_detections_for_grouping", 1):
+            return _fastpath_result(mode, detection_results, time.time() - pipeline_start)
         
         # Step 2: Seraphine Grouping
-        seraphine_analysis = run_seraphine_grouping(detection_results['merged_detections'], config)
+        seraphine_analysis = run_seraphine_grouping(detection_results['merged_detections'], config,
+                                                    detection_results['seraphine_detections'])
+        
+        # Gemini in direct-image mode consumes the grouped images while they are generated
+        stream_to_gemini = config.get("gemini_enabled", False) and config.get("gemini_return_images_b64", True)
         
         # Step 3: Generate Grouped Images
         grouped_image_paths = None
-        if config.get("generate_grouped_images", True):
+        # Written to disk only when kept (save_grouped_images) or Gemini reads them back in file mode
+        wants_group_files = config.get("save_grouped_images", True) or config.get("gemini_enabled", False)
+        if config.get("generate_grouped_images", True) and not stream_to_gemini and wants_group_files:
             debug_print("\n🖼️  Step 3: Generating Seraphine Grouped Images")
             
-            from utils.seraphine_generator import FinalGroupImageGenerator
             # image_path = 'temp_detection_image.jpg'  # Use the temp image path from detection step
             
             output_dir = config.get("output_dir", "outputs")
             filename_base = os.path.splitext(os.path.basename(image_path))[0]
             
-            final_group_generator = FinalGroupImageGenerator(
-                output_dir=output_dir,
-                save_mapping=False
-            )
+            final_group_generator = get_group_image_generator(output_dir)
             
             grouped_image_paths = final_group_generator.create_grouped_images(
                 image_path, 
                 seraphine_analysis, 
-                filename_base
+                filename_base,
+                original_image=original_image
             )
             
             debug_print(f"✅ Generated {len(grouped_image_paths)} grouped images")
@@ -557,9 +674,17 @@ async def main(image_path):
         gemini_results = None
         if config.get("gemini_enabled", False):
             try:
-                gemini_results = await run_gemini_analysis(
-                    seraphine_analysis, grouped_image_paths, image_path, config
-                )
+                if stream_to_gemini:
+                    output_dir = config.get("output_dir", "outputs")
+                    gemini_results, grouped_image_paths = await run_gemini_analysis_streaming(
+                        seraphine_analysis, image_path, config, get_group_image_generator(output_dir),
+                        save_to_disk=config.get("save_grouped_images", True),
+                        original_image=original_image
+                    )
+                else:
+                    gemini_results = await run_gemini_analysis(
+                        seraphine_analysis, grouped_image_paths, image_path, config
+                    )
                 
                 if gemini_results:
                     seraphine_analysis = integrate_gemini_results(seraphine_analysis, gemini_results)
@@ -578,12 +703,8 @@ async def main(image_path):
             # 🎯 DEPLOY MODE: Clean, emoji-free output
             print(f"Pipeline completed in {total_time:.3f}s, found {icon_count} icons.")
             
-            # 🧹 COMPLETE FILE CLEANUP
-            output_dir = config.get("output_dir", "outputs")
-            if os.path.exists(output_dir):
-                import shutil
-                shutil.rmtree(output_dir)
-                os.makedirs(output_dir, exist_ok=True)
+            # Nothing to clean up: the save_* switches are off and Gemini streams in-memory
+            # images (forced above), so no files were written
             
             # Return only essential data
             field_name = 'seraphine_gemini_groups' if gemini_results else 'seraphine_groups'
@@ -598,7 +719,7 @@ async def main(image_path):
             pipeline_results, json_path = save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysis, gemini_results, config) # type: ignore
             
             # Step 6: Create Visualizations
-            # visualization_paths = create_visualizations(image_path, detection_results, seraphine_analysis, config, gemini_results)
+            # visualization_paths = create_visualizations(image_path, detection_results, seraphine_analysis, config, gemini_results, img_rgb)
             
             # Summary
             # display_enhanced_pipeline_summary(image_path, detection_results, seraphine_analysis, gemini_results, visualization_paths, json_path, config)
@@ -635,7 +756,8 @@ async def extract_elements_from_seraphine_gemini_groups(seraphine_groups):
     'seraphine_gemini_groups' structure into a single list.
 
     Args:
-        seraphine_groups (dict): The dictionary containing the 'seraphine_groups' data.
+        seraphine_groups (dict): The 'seraphine_groups' data - flat {"H0_1": element, ...},
+            or the older nested {"H0": {"H0_1": element, ...}} layout.
 
     Returns:
         list: A list of dictionaries, where each dictionary is an extracted element
@@ -643,28 +765,26 @@ async def extract_elements_from_seraphine_gemini_groups(seraphine_groups):
     """
     extracted_elements = []
 
-    # Iterate through each group type (e.g., "H0", "H1", "V0", "HL0")
-    for group_type_key, group_type_value in seraphine_groups.items():
-        if isinstance(group_type_value, dict):
-            # Iterate through each specific group within the type (e.g., "H0_1", "H1_1")
-            for specific_group_key, element_data in group_type_value.items():
-                if isinstance(element_data, dict):
-                    # Check if the element has both 'bbox' and 'g_icon_name'
-                    if "bbox" in element_data and "g_icon_name" in element_data:
-                        # You can choose to extract the whole element_data dictionary
-                        # or just specific keys if needed. Here, we take the whole dict.
-                        extracted_elements.append(element_data)
+    for value in seraphine_groups.values():
+        if not isinstance(value, dict):
+            continue
+        # Flat layout: the value is the element itself; nested layout: a group of elements
+        elements = (value,) if "bbox" in value else value.values()
+        for element_data in elements:
+            # Check if the element has both 'bbox' and 'g_icon_name'
+            if isinstance(element_data, dict) and "bbox" in element_data and "g_icon_name" in element_data:
+                extracted_elements.append(element_data)
     
     return extracted_elements
 
-async def process_os_image(image_path: str = "temp_screenshots/temp_screenshot.png"):
+async def process_os_image(image_path: str = "temp_screenshots/temp_screenshot.png", config=None):
     """
     Process an OS image (e.g., from screenshot) to run the pipeline
     This is a placeholder for future integration with OS-specific image capture
     """
     # For now, just return the image as-is
     extracted_elements = []
-    gemini_results, pipeline_results = await main(image_path=image_path)  # type: ignore
+    gemini_results, pipeline_results = await main(image_path=image_path, config=config)  # type: ignore
     if not pipeline_results:
         debug_print("❌ Pipeline failed to process OS image")
         return None
@@ -680,10 +800,29 @@ async def process_os_image(image_path: str = "temp_screenshots/temp_screenshot.p
     
     return extracted_elements
 
+# One event loop (and warm executor threads) shared by every synchronous pipeline run
+_pipeline_loop = None
+
+def get_pipeline_loop():
+    """Long-lived event loop whose default executor runs the detectors and image generation"""
+    global _pipeline_loop
+    if _pipeline_loop is None or _pipeline_loop.is_closed():
+        _pipeline_loop = asyncio.new_event_loop()
+        _pipeline_loop.set_default_executor(ThreadPoolExecutor(max_workers=os.cpu_count()))
+        asyncio.set_event_loop(_pipeline_loop)
+    return _pipeline_loop
+
+def run_pipeline(image_path: str = "temp_screenshots/temp_screenshot.png", config=None):
+    """
+    Synchronous entry point for repeated runs (servers, scripts): unlike asyncio.run,
+    the loop and its thread pool are kept between calls
+    """
+    return get_pipeline_loop().run_until_complete(process_os_image(image_path, config))
+
 
 if __name__ == "__main__":
     try:
-        results = asyncio.run(process_os_image())
+        results = run_pipeline()
         print(results)
     except Exception as e:
         print(f"Critical startup error: {e}")
\ No newline at end of file
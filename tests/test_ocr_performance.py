@@ -1,69 +1,197 @@
 import sys
 import os
 import time
-import glob
-import tempfile
-import shutil
+import hashlib
+import pickle
+import sqlite3
 import argparse
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
 from PIL import Image
 
 # Add parent directory to path so we can import utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
 
 from utils.ocr_detector import OCRDetector, OCRDetConfig
 from utils.beautiful_visualizer import BeautifulVisualizer
 
+# Shared, never-mutated config for detectors that don't need timing output
+QUIET_CONFIG = OCRDetConfig(enable_timing=False)
+
+# Per-process detector for the batch worker pool (built once by the initializer)
+_worker_detector = None
+
+def _init_worker():
+    """Build one OCRDetector per worker process so the model is never pickled
+    
+    The pool already runs one process per core, so each session gets a single
+    intra-op thread - the default (half the cores each) would oversubscribe the CPU.
+    """
+    global _worker_detector
+    _worker_detector = OCRDetector(replace(QUIET_CONFIG, intra_op_threads=1))
+
+def _worker_detect(img_path):
+    """Run OCR detection on one image inside a worker process"""
+    return _worker_detector.detect(img_path)
+
+# Disk-backed detection cache: (image sha256, config key) -> pickled detections
+# (anchored at the repo root like the images dir, not the CWD)
+DETECT_CACHE_PATH = os.path.join(REPO_ROOT, "outputs", ".ocr_detect_cache.sqlite")
+_detect_cache_conn = None
+
+def _get_detect_cache():
+    """Open (and create) the SQLite detection cache on first use"""
+    global _detect_cache_conn
+    if _detect_cache_conn is None:
+        os.makedirs(os.path.dirname(DETECT_CACHE_PATH), exist_ok=True)
+        _detect_cache_conn = sqlite3.connect(DETECT_CACHE_PATH)
+        _detect_cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections (key TEXT PRIMARY KEY, pickle BLOB)"
+        )
+    return _detect_cache_conn
+
+@lru_cache(maxsize=None)
+def _file_sha256(path):
+    """Content hash of an image file (read once per path)"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+@lru_cache(maxsize=8)
+def load_rgb_array(path):
+    """Decode an image once into a read-only RGB array shared by every detector variant"""
+    img_np = np.asarray(Image.open(path).convert("RGB"))
+    img_np.flags.writeable = False
+    return img_np
+
+def _cached_detect(detector, path, cfg_key, compute=None):
+    """detector.detect(path), memoized on disk by image content + config key
+    
+    compute() replaces the detect call on a miss (e.g. post-processing a
+    shared probability map).
+    """
+    key = _file_sha256(path) + "|" + cfg_key
+    
+    conn = _get_detect_cache()
+    row = conn.execute("SELECT pickle FROM detections WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+        return pickle.loads(row[0])
+    
+    if compute is not None:
+        detections = compute()
+    else:
+        detections = detector.detect(path)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO detections (key, pickle) VALUES (?, ?)",
+            (key, pickle.dumps(detections, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+    return detections
+
+def _model_tag(model_path):
+    """Model file identity - replacing the .onnx in place invalidates its cached detections"""
+    try:
+        stat = os.stat(model_path)
+        return f"{model_path}@{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return model_path
+
+def _ocr_cfg_key(config):
+    """Cache key for the model file and every OCRDetConfig field that changes the detections"""
+    return (f"{_model_tag(config.model_path)}|t={config.det_threshold}|d={config.use_dilation}"
+            f"|s={config.max_side_len}|b={config.min_box_size}|px={config.padding_x}"
+            f"|py={config.padding_y_percent}|mpy={config.min_padding_y}")
+
+def _postprocess_variants(path, variants):
+    """Detections for QUIET_CONFIG with each variant's post-processing overrides
+    (det_threshold / use_dilation) on one image. Cached variants skip the model;
+    the misses share a single forward pass."""
+    detector = OCRDetector(QUIET_CONFIG)
+    prob = []  # forward pass, run on the first miss only
+    
+    def run(overrides):
+        if not prob:
+            prob.append(detector._forward(load_rgb_array(path), is_rgb=True))
+        return detector._postprocess(prob[0], **overrides)
+    
+    return [
+        _cached_detect(detector, path, _ocr_cfg_key(replace(QUIET_CONFIG, **overrides)),
+                       compute=lambda o=overrides: run(o))
+        for overrides in variants
+    ]
+
 def get_test_images():
     """Automatically discover all images in the images folder"""
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.webp']
-    images_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'images')
+    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+    images_dir = os.path.join(REPO_ROOT, 'images')
     
-    all_images = []
-    for ext in image_extensions:
-        pattern = os.path.join(images_dir, ext)
-        all_images.extend(glob.glob(pattern))
-        # Also check uppercase extensions
-        pattern = os.path.join(images_dir, ext.upper())
-        all_images.extend(glob.glob(pattern))
+    if not os.path.isdir(images_dir):
+        return []
     
-    return sorted(list(set(all_images)))  # Remove duplicates and sort
+    # Single directory pass, case-insensitive extension match
+    with os.scandir(images_dir) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in image_extensions
+        )
+
+def _resize_one(args):
+    """Load one image and resize it to target_size, returns an RGB array (None on error)"""
+    img_path, target_size = args
+    try:
+        # Load and resize to exact target size - draft() lets libjpeg downscale
+        # in the DCT domain (no-op for non-JPEG), NEAREST is enough for a same-size batch
+        img = Image.open(img_path)
+        img.draft("RGB", target_size)
+        img_resized = img.convert("RGB").resize(target_size, Image.Resampling.NEAREST)
+        return np.asarray(img_resized)
+        
+    except Exception as e:
+        print(f"⚠️  Error processing {img_path}: {e}")
+        return None
 
 def create_batch_test_images(image_paths, target_size=(1920, 1280)):
     """
-    Create temporary resized copies of images for batch testing
+    Create resized in-memory RGB copies of images for batch testing
     All images will be exactly the same size for batch compatibility
+    Pass them to OCRDetector.detect(img, is_rgb=True) - no temp files involved
     """
-    temp_dir = tempfile.mkdtemp(prefix='ocr_batch_test_')
-    temp_images = []
-    
     print(f"📏 Creating batch test images ({target_size[0]}x{target_size[1]})...")
     
-    for i, img_path in enumerate(image_paths):
-        try:
-            # Load and resize to exact target size
-            img = Image.open(img_path).convert("RGB")
-            img_resized = img.resize(target_size)
-            
-            # Save to temp directory
-            base_name = f"batch_{i:03d}_{os.path.basename(img_path)}"
-            temp_path = os.path.join(temp_dir, base_name)
-            img_resized.save(temp_path)
-            temp_images.append(temp_path)
-            
-        except Exception as e:
-            print(f"⚠️  Error processing {img_path}: {e}")
+    # Pillow holds the GIL for most of decode+resize, so use processes rather than threads
+    num_workers = os.cpu_count() or 1
+    chunksize = max(1, len(image_paths) // (4 * num_workers))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        results = executor.map(_resize_one, [(path, target_size) for path in image_paths], chunksize=chunksize)
+        batch_images = [img for img in results if img is not None]
     
-    print(f"✅ Created {len(temp_images)} batch-ready images in {temp_dir}")
-    return temp_images, temp_dir
+    print(f"✅ Created {len(batch_images)} batch-ready images in memory")
+    return batch_images
+
+def get_image_info(image_paths):
+    """Precompute (path, basename, stem) once per image"""
+    info = []
+    for path in image_paths:
+        name = os.path.basename(path)
+        info.append((path, name, os.path.splitext(name)[0]))
+    return info
+
+# Shared visualizer, created on the first visualization
+_VIZ = None
 
-def create_visualization_if_enabled(image_path, detections, show_flag, test_name="test"):
+def create_visualization_if_enabled(image_path, detections, show_flag, test_name="test", stem=None):
     """Create and save visualization if --show flag is enabled"""
     if not show_flag:
         return
     
     try:
-        # Initialize visualizer
-        visualizer = BeautifulVisualizer(output_dir="outputs")
+        # Reuse one visualizer for every --show call
+        global _VIZ
+        if _VIZ is None:
+            _VIZ = BeautifulVisualizer(output_dir="outputs")
+        visualizer = _VIZ
         
         # Prepare results in the format expected by the visualizer
         results = {
@@ -71,7 +199,9 @@ def create_visualization_if_enabled(image_path, detections, show_flag, test_name
         }
         
         # Create filename base
-        filename_base = f"ocr_{test_name}_{os.path.splitext(os.path.basename(image_path))[0]}"
+        if stem is None:
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+        filename_base = f"ocr_{test_name}_{stem}"
         
         # Create visualization
         viz_paths = visualizer.create_all_visualizations(
@@ -90,62 +220,65 @@ def create_visualization_if_enabled(image_path, detections, show_flag, test_name
         print(f"⚠️  OCR Visualization error: {e}")
         return None
 
-def test_single_image(original_images, show_flag=False):
+def test_single_image(image_info, show_flag=False):
     """Test single image OCR processing"""
     print("\n1️⃣ Single Image OCR Processing Test")
     config = OCRDetConfig(enable_timing=True)
     detector = OCRDetector(config)
     
-    if original_images:
+    if image_info:
+        path, name, stem = image_info[0]
         start = time.time()
-        detections = detector.detect(original_images[0])
+        detections = detector.detect(path)
         end = time.time()
-        print(f"   {os.path.basename(original_images[0])}: {len(detections)} OCR detections in {end-start:.3f}s")
+        print(f"   {name}: {len(detections)} OCR detections in {end-start:.3f}s")
         
         # Create visualization if requested
         if show_flag:
             create_visualization_if_enabled(
-                original_images[0], detections, show_flag, "single_image"
+                path, detections, show_flag, "single_image", stem
             )
         
         return detector, detections
     return None, []
 
-def test_batch_processing(original_images, show_flag=False):
+def test_batch_processing(image_info, show_flag=False):
     """Test batch OCR processing"""
+    original_images = [path for path, _, _ in image_info]
     print(f"\n2️⃣ Batch OCR Processing Test ({len(original_images)} images)")
     
-    config = OCRDetConfig(enable_timing=True)
-    detector = OCRDetector(config)
+    # OCR doesn't have built-in batch processing - fan the images out over a process pool
+    num_workers = max(1, min(os.cpu_count() or 1, len(original_images)))
+    print(f"   Using {num_workers} worker processes")
+    
+    # Stream results as they arrive - only the first few detection lists are kept (for --show)
+    total_detections = 0
+    viz_cache = []
     
-    # OCR doesn't have built-in batch processing, so we'll process individually
+    print(f"\n📊 Per-Image OCR Results:")
     start = time.time()
-    batch_results = []
     
-    for i, img_path in enumerate(original_images):
-        print(f"   Processing image {i+1}/{len(original_images)}: {os.path.basename(img_path)}")
-        detections = detector.detect(img_path)
-        batch_results.append(detections)
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker) as executor:
+        results = executor.map(_worker_detect, original_images, chunksize=1)
+        for i, ((orig_path, orig_name, stem), dets) in enumerate(zip(image_info, results)):
+            total_detections += len(dets)
+            print(f"   {i+1:2d}. {orig_name:<20} {len(dets):3d} OCR detections")
+            if show_flag and len(viz_cache) < 3:
+                viz_cache.append((orig_path, stem, dets))
     
     end = time.time()
-    total_detections = sum(len(dets) for dets in batch_results)
     print(f"   Batch: {total_detections} total OCR detections in {end-start:.3f}s")
     print(f"   Per image: {(end-start)/len(original_images):.3f}s average")
     
-    print(f"\n📊 Per-Image OCR Results:")
-    for i, (orig_path, dets) in enumerate(zip(original_images, batch_results)):
-        orig_name = os.path.basename(orig_path)
-        print(f"   {i+1:2d}. {orig_name:<20} {len(dets):3d} OCR detections")
-    
     # Create visualizations for first few images if requested
     if show_flag:
         print(f"\n🎨 Creating batch OCR visualizations...")
-        for i, (orig_path, dets) in enumerate(zip(original_images[:3], batch_results[:3])):
+        for i, (orig_path, stem, dets) in enumerate(viz_cache):
             create_visualization_if_enabled(
-                orig_path, dets, show_flag, f"batch_{i+1:02d}"
+                orig_path, dets, show_flag, f"batch_{i+1:02d}", stem
             )
     
-    return detector, batch_results
+    return total_detections
 
 def test_model_cache(detector, original_images, show_flag=False):
     """Test OCR model cache functionality"""
@@ -168,21 +301,12 @@ def test_threshold_comparison(original_images, show_flag=False):
     """Test OCR detection threshold comparison"""
     print("\n4️⃣ OCR Threshold Comparison Test")
     
-    # Low threshold (more sensitive)
-    config_low = OCRDetConfig(det_threshold=0.1, enable_timing=False)
-    detector_low = OCRDetector(config_low)
-    
-    # Standard threshold  
-    config_std = OCRDetConfig(det_threshold=0.3, enable_timing=False)
-    detector_std = OCRDetector(config_std)
-    
-    # High threshold (less sensitive)
-    config_high = OCRDetConfig(det_threshold=0.6, enable_timing=False)
-    detector_high = OCRDetector(config_high)
-    
-    dets_low = detector_low.detect(original_images[0])
-    dets_std = detector_std.detect(original_images[0])
-    dets_high = detector_high.detect(original_images[0])
+    # det_threshold only affects post-processing: at most one forward pass, three thresholds
+    dets_low, dets_std, dets_high = _postprocess_variants(original_images[0], [
+        {'det_threshold': 0.1},    # more sensitive
+        {'det_threshold': 0.3},
+        {'det_threshold': 0.6},    # less sensitive
+    ])
     
     print(f"   Low threshold (0.1): {len(dets_low)} detections")
     print(f"   Standard threshold (0.3): {len(dets_std)} detections")
@@ -205,14 +329,11 @@ def test_dilation_comparison(original_images, show_flag=False):
     """Test OCR dilation on/off comparison"""
     print("\n5️⃣ OCR Dilation Comparison Test")
     
-    config_no_dilation = OCRDetConfig(use_dilation=False, enable_timing=False)
-    detector_no_dilation = OCRDetector(config_no_dilation)
-    
-    config_with_dilation = OCRDetConfig(use_dilation=True, enable_timing=False)
-    detector_with_dilation = OCRDetector(config_with_dilation)
-    
-    dets_no_dilation = detector_no_dilation.detect(original_images[0])
-    dets_with_dilation = detector_with_dilation.detect(original_images[0])
+    # Dilation is applied to the binarized map: at most one forward pass, two post-process branches
+    dets_no_dilation, dets_with_dilation = _postprocess_variants(original_images[0], [
+        {'use_dilation': False},
+        {'use_dilation': True},
+    ])
     
     print(f"   Without dilation: {len(dets_no_dilation)} detections")
     print(f"   With dilation: {len(dets_with_dilation)} detections")
@@ -236,6 +357,7 @@ def test_resolution_comparison(original_images, show_flag=False):
         
     print(f"\n6️⃣ OCR Resolution Comparison (first image)")
     test_image = original_images[0]
+    img_np = load_rgb_array(test_image)  # decoded once, shared read-only
     
     # Low resolution
     config_low_res = OCRDetConfig(max_side_len=480, enable_timing=False)
@@ -249,17 +371,17 @@ def test_resolution_comparison(original_images, show_flag=False):
     config_high_res = OCRDetConfig(max_side_len=1440, enable_timing=False)
     detector_high_res = OCRDetector(config_high_res)
     
-    # Time each resolution
+    # Time each resolution - always real inference, the detection cache would time SQLite lookups
     start = time.time()
-    dets_low_res = detector_low_res.detect(test_image)
+    dets_low_res = detector_low_res.detect(img_np, is_rgb=True)
     time_low = time.time() - start
     
     start = time.time()
-    dets_std_res = detector_std_res.detect(test_image)
+    dets_std_res = detector_std_res.detect(img_np, is_rgb=True)
     time_std = time.time() - start
     
     start = time.time()
-    dets_high_res = detector_high_res.detect(test_image)
+    dets_high_res = detector_high_res.detect(img_np, is_rgb=True)
     time_high = time.time() - start
     
     print(f"   Low res (480): {len(dets_low_res)} detections in {time_low:.3f}s")
@@ -322,6 +444,7 @@ Examples:
     
     # Discover test images
     original_images = get_test_images()
+    image_info = get_image_info(original_images)
     
     if not original_images:
         print("❌ No images found in 'images' folder!")
@@ -329,7 +452,7 @@ Examples:
         return
     
     print(f"🚀 Testing OCR Detection Optimizations with {len(original_images)} images")
-    print(f"📁 Found images: {[os.path.basename(img) for img in original_images[:5]]}")
+    print(f"📁 Found images: {[name for _, name, _ in image_info[:5]]}")
     if len(original_images) > 5:
         print(f"   ... and {len(original_images) - 5} more")
     print(f"🎯 Running modes: {', '.join(args.mode)}")
@@ -348,9 +471,9 @@ Examples:
     # Run selected tests
     for mode in modes:
         if mode == "single":
-            detector, _ = test_single_image(original_images, args.show)
+            detector, _ = test_single_image(image_info, args.show)
         elif mode == "batch":
-            test_batch_processing(original_images, args.show)
+            test_batch_processing(image_info, args.show)
         elif mode == "cache":
             if detector is None:
                 detector = OCRDetector(OCRDetConfig(enable_timing=True))
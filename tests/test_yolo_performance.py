@@ -1,69 +1,139 @@
 import sys
 import os
 import time
-import glob
-import tempfile
-import shutil
+import hashlib
+import pickle
+import sqlite3
 import argparse
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import cv2
+import numpy as np
+import psutil
 
 # Add parent directory to path so we can import utils
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
 
 from utils.yolo_detector import YOLODetector, YOLOConfig
 from utils.beautiful_visualizer import BeautifulVisualizer
 
+# Disk-backed detection cache: (image sha256, config key) -> pickled detections
+# (anchored at the repo root like the images dir, not the CWD)
+DETECT_CACHE_PATH = os.path.join(REPO_ROOT, "outputs", ".yolo_detect_cache.sqlite")
+_detect_cache_conn = None
+
+def _get_detect_cache():
+    """Open (and create) the SQLite detection cache on first use"""
+    global _detect_cache_conn
+    if _detect_cache_conn is None:
+        os.makedirs(os.path.dirname(DETECT_CACHE_PATH), exist_ok=True)
+        _detect_cache_conn = sqlite3.connect(DETECT_CACHE_PATH)
+        _detect_cache_conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections (key TEXT PRIMARY KEY, pickle BLOB)"
+        )
+    return _detect_cache_conn
+
+def _cached_detect(detector, path, cfg_key):
+    """detector.detect(path), memoized on disk by image content + config key"""
+    with open(path, 'rb') as f:
+        key = hashlib.sha256(f.read()).hexdigest() + "|" + cfg_key
+    
+    conn = _get_detect_cache()
+    row = conn.execute("SELECT pickle FROM detections WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+        return pickle.loads(row[0])
+    
+    detections = detector.detect(path)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO detections (key, pickle) VALUES (?, ?)",
+            (key, pickle.dumps(detections, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+    return detections
+
+def _model_tag(model_path):
+    """Model file identity - replacing the .onnx in place invalidates its cached detections"""
+    try:
+        stat = os.stat(model_path)
+        return f"{model_path}@{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return model_path
+
+def _yolo_cfg_key(config):
+    """Cache key for the model file and every YOLOConfig field that changes the detections"""
+    return (f"{_model_tag(config.model_path)}|c={config.conf_threshold}|i={config.iou_threshold}"
+            f"|r={config.max_resolution}|f={config.enable_content_filtering}|p={config.min_content_pixels}")
+
 def get_test_images():
     """Automatically discover all images in the images folder"""
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.webp']
-    images_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'images')
+    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+    images_dir = os.path.join(REPO_ROOT, 'images')
     
-    all_images = []
-    for ext in image_extensions:
-        pattern = os.path.join(images_dir, ext)
-        all_images.extend(glob.glob(pattern))
-        # Also check uppercase extensions
-        pattern = os.path.join(images_dir, ext.upper())
-        all_images.extend(glob.glob(pattern))
+    if not os.path.isdir(images_dir):
+        return []
     
-    return sorted(list(set(all_images)))  # Remove duplicates and sort
+    # Single directory pass, case-insensitive extension match
+    with os.scandir(images_dir) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in image_extensions
+        )
+
+@lru_cache(maxsize=None)
+def get_detector(**config_fields):
+    """One YOLODetector per distinct YOLOConfig, shared across test modes"""
+    return YOLODetector(YOLOConfig(**config_fields))
+
+def _prep_one(img_path, target_size):
+    """Load one image and resize it to target_size, returns a BGR array (None on error)"""
+    try:
+        # Load (BGR, same as YOLODetector) and resize to exact target size with OpenCV -
+        # decode and resize run outside the GIL on SIMD code paths
+        img = cv2.imread(img_path, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("could not decode image")
+        return cv2.resize(img, target_size, interpolation=cv2.INTER_AREA)
+        
+    except Exception as e:
+        print(f"⚠️  Error processing {img_path}: {e}")
+        return None
 
 def create_batch_test_images(image_paths, target_size=(1920, 1280)):
     """
-    Create temporary resized copies of images for batch testing
-    All images will be exactly the same size for batch compatibility
+    Create resized in-memory BGR copies of images for batch testing
+    All images will be exactly the same size for batch compatibility, so they are
+    returned as one contiguous (N, H, W, 3) uint8 array that detect_batch takes directly
     """
-    temp_dir = tempfile.mkdtemp(prefix='yolo_batch_test_')
-    temp_images = []
-    
     print(f"📏 Creating batch test images ({target_size[0]}x{target_size[1]})...")
     
-    for i, img_path in enumerate(image_paths):
-        try:
-            # Load and resize to exact target size
-            img = Image.open(img_path).convert("RGB")
-            img_resized = img.resize(target_size)
-            
-            # Save to temp directory
-            base_name = f"batch_{i:03d}_{os.path.basename(img_path)}"
-            temp_path = os.path.join(temp_dir, base_name)
-            img_resized.save(temp_path)
-            temp_images.append(temp_path)
-            
-        except Exception as e:
-            print(f"⚠️  Error processing {img_path}: {e}")
+    # OpenCV releases the GIL, so threads scale across cores; map keeps the input order
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(_prep_one, image_paths, [target_size] * len(image_paths))
+        batch_images = [img for img in results if img is not None]
     
-    print(f"✅ Created {len(temp_images)} batch-ready images in {temp_dir}")
-    return temp_images, temp_dir
-
-def create_visualization_if_enabled(image_path, detections, show_flag, test_name="test"):
-    """Create and save visualization if --show flag is enabled"""
-    if not show_flag:
-        return
+    # One allocation + copy for the whole batch instead of N separate arrays
+    height, width = target_size[1], target_size[0]
+    batch_images = np.stack(batch_images) if batch_images else np.empty((0, height, width, 3), dtype=np.uint8)
     
+    print(f"✅ Created {len(batch_images)} batch-ready images in memory")
+    return batch_images
+
+# Shared visualizer, created on the first visualization
+_VIZ = None
+
+# Visualizations are drawn in the background so they overlap the next test's detection work
+_VIZ_POOL = None
+_VIZ_FUTURES = []
+
+def _create_visualization(image_path, detections, test_name):
+    """Draw and save the visualizations for one result (runs on _VIZ_POOL)"""
     try:
-        # Initialize visualizer
-        visualizer = BeautifulVisualizer(output_dir="outputs")
+        # Reuse one visualizer for every --show call
+        global _VIZ
+        if _VIZ is None:
+            _VIZ = BeautifulVisualizer(output_dir="outputs")
+        visualizer = _VIZ
         
         # Prepare results in the format expected by the visualizer
         results = {
@@ -90,16 +160,36 @@ def create_visualization_if_enabled(image_path, detections, show_flag, test_name
         print(f"⚠️  Visualization error: {e}")
         return None
 
+def create_visualization_if_enabled(image_path, detections, show_flag, test_name="test"):
+    """Queue a visualization in the background if --show flag is enabled, returns its future"""
+    if not show_flag:
+        return None
+    
+    global _VIZ_POOL
+    if _VIZ_POOL is None:
+        _VIZ_POOL = ThreadPoolExecutor(max_workers=4)
+    future = _VIZ_POOL.submit(_create_visualization, image_path, detections, test_name)
+    _VIZ_FUTURES.append(future)
+    return future
+
+def wait_for_visualizations():
+    """Block until every queued visualization has been written"""
+    for future in _VIZ_FUTURES:
+        future.result()
+    _VIZ_FUTURES.clear()
+    if _VIZ_POOL is not None:
+        _VIZ_POOL.shutdown(wait=True)
+
 def test_single_image(original_images, show_flag=False):
     """Test single image processing"""
     print("\n1️⃣ Single Image Processing Test")
-    config = YOLOConfig(enable_timing=True)
-    detector = YOLODetector(config)
+    detector = get_detector(enable_timing=True)
+    detector.warmup()  # keep session load / first-run cost out of the timing
     
     if original_images:
-        start = time.time()
+        start = time.perf_counter()
         detections = detector.detect(original_images[2])
-        end = time.time()
+        end = time.perf_counter()
         print(f"   {os.path.basename(original_images[2])}: {len(detections)} detections in {end-start:.3f}s")
         
         # Create visualization if requested
@@ -115,45 +205,40 @@ def test_batch_processing(original_images, show_flag=False):
     """Test batch processing with resized images"""
     print(f"\n2️⃣ Batch Processing Test ({len(original_images)} images @ 1920x1280)")
     
-    batch_images, temp_dir = create_batch_test_images(original_images, target_size=(1920, 1280))
+    batch_images = create_batch_test_images(original_images, target_size=(1920, 1280))
     
-    try:
-        batch_config = YOLOConfig(enable_timing=True, max_resolution=(1920, 1280))
-        batch_detector = YOLODetector(batch_config)
-        
-        start = time.time()
-        batch_results = batch_detector.detect_batch(batch_images)
-        end = time.time()
-        total_detections = sum(len(dets) for dets in batch_results)
-        print(f"   Batch: {total_detections} total detections in {end-start:.3f}s")
-        print(f"   Per image: {(end-start)/len(batch_images):.3f}s average")
-        
-        print(f"\n📊 Per-Image Results:")
-        for i, (orig_path, dets) in enumerate(zip(original_images, batch_results)):
-            orig_name = os.path.basename(orig_path)
-            print(f"   {i+1:2d}. {orig_name:<20} {len(dets):3d} detections")
-        
-        # Create visualizations for first few images if requested
-        if show_flag:
-            print(f"\n🎨 Creating batch visualizations...")
-            for i, (orig_path, dets) in enumerate(zip(original_images[:3], batch_results[:3])):
-                create_visualization_if_enabled(
-                    orig_path, dets, show_flag, f"batch_{i+1:02d}"
-                )
-        
-        return batch_detector, batch_results
+    batch_detector = get_detector(enable_timing=True, max_resolution=(1920, 1280))
+    batch_detector.warmup((1920, 1280))
+    
+    start = time.perf_counter()
+    batch_results = batch_detector.detect_batch(batch_images)
+    end = time.perf_counter()
+    total_detections = sum(len(dets) for dets in batch_results)
+    print(f"   Batch: {total_detections} total detections in {end-start:.3f}s")
+    print(f"   Per image: {(end-start)/len(batch_images):.3f}s average")
     
-    finally:
-        shutil.rmtree(temp_dir)
-        print(f"🧹 Cleaned up temporary files")
+    print(f"\n📊 Per-Image Results:")
+    image_names = [os.path.basename(path) for path in original_images]
+    for i, (orig_name, dets) in enumerate(zip(image_names, batch_results)):
+        print(f"   {i+1:2d}. {orig_name:<20} {len(dets):3d} detections")
+    
+    # Create visualizations for first few images if requested
+    if show_flag:
+        print(f"\n🎨 Creating batch visualizations...")
+        for i, (orig_path, dets) in enumerate(zip(original_images[:3], batch_results[:3])):
+            create_visualization_if_enabled(
+                orig_path, dets, show_flag, f"batch_{i+1:02d}"
+            )
+    
+    return batch_detector, batch_results
 
 def test_model_cache(detector, original_images, show_flag=False):
     """Test model cache reset functionality"""
     print("\n3️⃣ Model Cache Test")
-    start = time.time()
+    start = time.perf_counter()
     detector.reset_model_cache()
     detections = detector.detect(original_images[2])
-    end = time.time()
+    end = time.perf_counter()
     print(f"   Cache reset + reload: {end-start:.3f}s")
     
     # Create visualization if requested
@@ -165,14 +250,11 @@ def test_model_cache(detector, original_images, show_flag=False):
 def test_content_filtering(original_images, show_flag=False):
     """Test content filtering comparison"""
     print("\n4️⃣ Content Filtering Test")
-    config_no_filter = YOLOConfig(enable_content_filtering=False, enable_timing=False)
-    detector_no_filter = YOLODetector(config_no_filter)
-    
-    config_with_filter = YOLOConfig(enable_content_filtering=True, enable_timing=False)
-    detector_with_filter = YOLODetector(config_with_filter)
+    detector_no_filter = get_detector(enable_content_filtering=False, enable_timing=False)
+    detector_with_filter = get_detector(enable_content_filtering=True, enable_timing=False)
     
-    dets_no_filter = detector_no_filter.detect(original_images[2])
-    dets_with_filter = detector_with_filter.detect(original_images[2])
+    dets_no_filter = _cached_detect(detector_no_filter, original_images[2], _yolo_cfg_key(detector_no_filter.config))
+    dets_with_filter = _cached_detect(detector_with_filter, original_images[2], _yolo_cfg_key(detector_with_filter.config))
     
     filtered_out = len(dets_no_filter) - len(dets_with_filter)
     print(f"   Without filtering: {len(dets_no_filter)} detections")
@@ -198,43 +280,73 @@ def test_batch_vs_individual(original_images, show_flag=False):
     print(f"\n5️⃣ Batch vs Individual Comparison (first 3 images)")
     test_subset = original_images[:3]
     
-    batch_subset, temp_dir_subset = create_batch_test_images(test_subset, target_size=(1920, 1280))
+    batch_subset = create_batch_test_images(test_subset, target_size=(1920, 1280))
     
-    try:
-        # Individual processing
-        detector = YOLODetector(YOLOConfig(enable_timing=False))
-        detector.reset_model_cache()
-        start = time.time()
-        individual_results = []
-        for img in test_subset:
-            individual_results.append(detector.detect(img))
-        individual_time = time.time() - start
-        
-        # Batch processing
-        batch_detector = YOLODetector(YOLOConfig(enable_timing=False, max_resolution=(1920, 1280)))
-        batch_detector.reset_model_cache()
-        start = time.time()
-        batch_subset_results = batch_detector.detect_batch(batch_subset)
-        batch_subset_time = time.time() - start
+    # Individual processing
+    detector = get_detector(enable_timing=False)
+    detector.reset_model_cache()
+    detector.warmup((1920, 1280))  # both sides start from a warm session
+    start = time.perf_counter()
+    individual_results = []
+    for img in test_subset:
+        individual_results.append(detector.detect(img))
+    individual_time = time.perf_counter() - start
+    
+    # Batch processing
+    batch_detector = get_detector(enable_timing=False, max_resolution=(1920, 1280))
+    batch_detector.reset_model_cache()
+    batch_detector.warmup((1920, 1280), batch_size=len(batch_subset))
+    start = time.perf_counter()
+    batch_subset_results = batch_detector.detect_batch(batch_subset)
+    batch_subset_time = time.perf_counter() - start
+    
+    print(f"   Individual (3 images): {individual_time:.3f}s")
+    print(f"   Batch (3 images):      {batch_subset_time:.3f}s")
+    if batch_subset_time > 0:
+        print(f"   Batch speedup:         {individual_time/batch_subset_time:.1f}x")
+    
+    # Create comparison visualizations if requested
+    if show_flag:
+        print(f"\n🎨 Creating comparison visualizations...")
+        for i, (orig_path, ind_dets, batch_dets) in enumerate(zip(test_subset, individual_results, batch_subset_results)):
+            create_visualization_if_enabled(
+                orig_path, ind_dets, show_flag, f"individual_{i+1:02d}"
+            )
+            create_visualization_if_enabled(
+                orig_path, batch_dets, show_flag, f"batch_comp_{i+1:02d}"
+            )
+
+def test_batch_size_sweep(original_images, batch_sizes):
+    """Sweep detect_batch over batch sizes and report latency/throughput per size"""
+    print(f"\n6️⃣ Batch Size Sweep ({len(original_images)} images @ 1920x1280, sizes: {batch_sizes})")
+    
+    batch_images = create_batch_test_images(original_images, target_size=(1920, 1280))
+    if len(batch_images) == 0:
+        print("   ⚠️  No images to sweep")
+        return []
+    
+    detector = get_detector(enable_timing=False, max_resolution=(1920, 1280))
+    process = psutil.Process(os.getpid())
+    rows = []
+    
+    for bs in batch_sizes:
+        detector.warmup((1920, 1280), runs=1, batch_size=min(bs, len(batch_images)))
         
-        print(f"   Individual (3 images): {individual_time:.3f}s")
-        print(f"   Batch (3 images):      {batch_subset_time:.3f}s")
-        if batch_subset_time > 0:
-            print(f"   Batch speedup:         {individual_time/batch_subset_time:.1f}x")
+        elapsed = 0.0
+        for i in range(0, len(batch_images), bs):
+            start = time.perf_counter()
+            detector.detect_batch(batch_images[i:i + bs])
+            elapsed += time.perf_counter() - start
         
-        # Create comparison visualizations if requested
-        if show_flag:
-            print(f"\n🎨 Creating comparison visualizations...")
-            for i, (orig_path, ind_dets, batch_dets) in enumerate(zip(test_subset, individual_results, batch_subset_results)):
-                create_visualization_if_enabled(
-                    orig_path, ind_dets, show_flag, f"individual_{i+1:02d}"
-                )
-                create_visualization_if_enabled(
-                    orig_path, batch_dets, show_flag, f"batch_comp_{i+1:02d}"
-                )
-    
-    finally:
-        shutil.rmtree(temp_dir_subset)
+        rows.append((bs, elapsed * 1000 / len(batch_images), len(batch_images) / elapsed, process.memory_info().rss >> 20))
+    
+    print(f"\n   {'batch':>5}  {'ms/img':>8}  {'imgs/s':>7}  {'RSS MB':>7}")
+    for bs, ms_per_img, imgs_per_s, rss_mb in rows:
+        print(f"   {bs:>5}  {ms_per_img:>8.1f}  {imgs_per_s:>7.2f}  {rss_mb:>7}")
+    
+    best = min(rows, key=lambda row: row[1])
+    print(f"   🏆 Fastest per image: batch {best[0]} ({best[1]:.1f} ms/img)")
+    return rows
 
 def main():
     """Main function with CLI arguments"""
@@ -257,6 +369,7 @@ Examples:
   python test_yolo_performance.py --show             # Single test with visualization
   python test_yolo_performance.py --mode all --show  # All tests with visualizations
   python test_yolo_performance.py -m cache filter --show # Cache and filter tests with viz
+  python test_yolo_performance.py --batch-sizes 1,2,4,8  # Batch size sweep only
         """
     )
     
@@ -264,8 +377,8 @@ Examples:
         "--mode", "-m",
         nargs="+",
         choices=["single", "batch", "cache", "filter", "compare", "all"],
-        default=["single"],
-        help="Test mode(s) to run (default: single)"
+        default=None,
+        help="Test mode(s) to run (default: single, or none when --batch-sizes is given)"
     )
     
     parser.add_argument(
@@ -274,7 +387,16 @@ Examples:
         help="Create and save beautiful visualizations of detection results (saved to outputs/ folder)"
     )
     
+    parser.add_argument(
+        "--batch-sizes",
+        type=lambda value: [int(bs) for bs in value.split(",") if bs.strip()],
+        default=None,
+        help="Comma-separated batch sizes to sweep with detect_batch, e.g. 1,2,4,8,16"
+    )
+    
     args = parser.parse_args()
+    if args.mode is None:
+        args.mode = [] if args.batch_sizes else ["single"]
     
     # Discover test images
     original_images = get_test_images()
@@ -288,7 +410,7 @@ Examples:
     print(f"📁 Found images: {[os.path.basename(img) for img in original_images[:5]]}")
     if len(original_images) > 5:
         print(f"   ... and {len(original_images) - 5} more")
-    print(f"🎯 Running modes: {', '.join(args.mode)}")
+    print(f"🎯 Running modes: {', '.join(args.mode + (['batch-sweep'] if args.batch_sizes else []))}")
     if args.show:
         print(f"🎨 Visualization: ENABLED (outputs saved to outputs/ folder)")
     print("=" * 50)
@@ -309,14 +431,18 @@ Examples:
             test_batch_processing(original_images, args.show)
         elif mode == "cache":
             if detector is None:
-                detector = YOLODetector(YOLOConfig(enable_timing=True))
+                detector = get_detector(enable_timing=True)
             test_model_cache(detector, original_images, args.show)
         elif mode == "filter":
             test_content_filtering(original_images, args.show)
         elif mode == "compare":
             test_batch_vs_individual(original_images, args.show)
     
+    if args.batch_sizes:
+        test_batch_size_sweep(original_images, args.batch_sizes)
+    
     if args.show:
+        wait_for_visualizations()
         print(f"\n✅ All visualizations saved to: outputs/ folder")
         print(f"🔍 Check the outputs/ directory for beautiful YOLO detection visualizations!")
 
@@ -344,5 +470,8 @@ if __name__ == "__main__":
 # # All tests with beautiful visualizations
 # uv run tests/test_yolo_performance.py --mode all --show
 
+# # Batch size sweep (latency / throughput per batch size)
+# uv run tests/test_yolo_performance.py --batch-sizes 1,2,4,8,16
+
 # # Help
 # uv run tests/test_yolo_performance.py --help
\ No newline at end of file
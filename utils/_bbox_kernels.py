@@ -0,0 +1,76 @@
+"""
+Pairwise bbox kernels for BBoxMerger
+Numba-compiled when numba is installed, NumPy broadcasting otherwise.
+Boxes are [N, 4] float64 arrays in [x1, y1, x2, y2] format.
+"""
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def _pairwise_intersection_np(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    wh = np.minimum(a[:, None, 2:], b[None, :, 2:]) - np.maximum(a[:, None, :2], b[None, :, :2])
+    return np.maximum(wh, 0.0).prod(-1)
+
+def _pairwise_iou_np(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    inter = _pairwise_intersection_np(a, b)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+def _pairwise_inside_np(inner: np.ndarray, outer: np.ndarray, threshold: float) -> np.ndarray:
+    inter = _pairwise_intersection_np(inner, outer)
+    inner_area = (inner[:, 2] - inner[:, 0]) * (inner[:, 3] - inner[:, 1])
+    ratio = np.divide(inter, inner_area[:, None], out=np.zeros_like(inter), where=inner_area[:, None] > 0)
+    return (inter > 0) & (ratio >= threshold)
+
+if NUMBA_AVAILABLE:
+    # No fastmath: IoU values are compared against thresholds and must match the scalar code
+    @numba.njit(parallel=True, cache=True)
+    def _pairwise_iou_nb(a, b):
+        n, m = a.shape[0], b.shape[0]
+        out = np.zeros((n, m), dtype=np.float64)
+        for i in numba.prange(n):
+            area_a = (a[i, 2] - a[i, 0]) * (a[i, 3] - a[i, 1])
+            for j in range(m):
+                w = min(a[i, 2], b[j, 2]) - max(a[i, 0], b[j, 0])
+                h = min(a[i, 3], b[j, 3]) - max(a[i, 1], b[j, 1])
+                if w <= 0.0 or h <= 0.0:
+                    continue
+                inter = w * h
+                union = area_a + (b[j, 2] - b[j, 0]) * (b[j, 3] - b[j, 1]) - inter
+                if union > 0.0:
+                    out[i, j] = inter / union
+        return out
+    
+    @numba.njit(parallel=True, cache=True)
+    def _pairwise_inside_nb(inner, outer, threshold):
+        n, m = inner.shape[0], outer.shape[0]
+        out = np.zeros((n, m), dtype=np.bool_)
+        for i in numba.prange(n):
+            inner_area = (inner[i, 2] - inner[i, 0]) * (inner[i, 3] - inner[i, 1])
+            if inner_area <= 0.0:
+                continue
+            for j in range(m):
+                w = min(inner[i, 2], outer[j, 2]) - max(inner[i, 0], outer[j, 0])
+                h = min(inner[i, 3], outer[j, 3]) - max(inner[i, 1], outer[j, 1])
+                if w > 0.0 and h > 0.0:
+                    out[i, j] = (w * h) / inner_area >= threshold
+        return out
+
+def pairwise_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU matrix [len(a), len(b)] (same rules as bbox_merger.calculate_iou)"""
+    if NUMBA_AVAILABLE:
+        return _pairwise_iou_nb(np.ascontiguousarray(a, dtype=np.float64), np.ascontiguousarray(b, dtype=np.float64))
+    return _pairwise_iou_np(a, b)
+
+def pairwise_inside(inner: np.ndarray, outer: np.ndarray, threshold: float = 0.8) -> np.ndarray:
+    """Boolean matrix [len(inner), len(outer)]: is_box_inside(inner[i], outer[j], threshold)"""
+    if NUMBA_AVAILABLE:
+        return _pairwise_inside_nb(np.ascontiguousarray(inner, dtype=np.float64),
+                                   np.ascontiguousarray(outer, dtype=np.float64), float(threshold))
+    return _pairwise_inside_np(inner, outer, threshold)
@@ -4,8 +4,13 @@ Implements overlap rules for YOLO and OCR detection results.
 No imports from original files allowed.
 """
 import numpy as np
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Tuple
 from utils.helpers import debug_print
+from utils._bbox_kernels import pairwise_iou, pairwise_inside
+
+# source_mask values in DetectionsSoA
+SOURCE_CODES = {'yolo': 1, 'ocr_det': 2}
 
 def calculate_iou(box1: List[int], box2: List[int]) -> float:
     """Calculate IoU between two boxes in [x1, y1, x2, y2] format"""
@@ -60,6 +65,33 @@ def calculate_box_area(box: List[int]) -> float:
     
     return width * height
 
+@dataclass
+class DetectionsSoA:
+    """
+    Column view of a detection list for vectorized bbox math.
+    meta keeps the original dicts (by reference) so results map straight back.
+    """
+    xyxy: np.ndarray                      # [N, 4] float64
+    conf: np.ndarray                      # [N] float32
+    source_mask: np.ndarray               # [N] uint8, see SOURCE_CODES
+    meta: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @classmethod
+    def from_detections(cls, detections: List[Dict[str, Any]]) -> "DetectionsSoA":
+        n = len(detections)
+        xyxy = np.array([d['bbox'] for d in detections], dtype=np.float64).reshape(n, 4)
+        conf = np.fromiter((d.get('confidence', 0.0) for d in detections), dtype=np.float32, count=n)
+        source_mask = np.fromiter((SOURCE_CODES.get(d.get('source'), 0) for d in detections),
+                                  dtype=np.uint8, count=n)
+        return cls(xyxy, conf, source_mask, list(detections))
+    
+    def __len__(self):
+        return len(self.meta)
+    
+    @property
+    def areas(self) -> np.ndarray:
+        return (self.xyxy[:, 2] - self.xyxy[:, 0]) * (self.xyxy[:, 3] - self.xyxy[:, 1])
+
 def filter_valid_boxes(detections: List[Dict[str, Any]], min_area: float = 1.0) -> List[Dict[str, Any]]:
     """
     Filter out boxes with zero or very small areas
@@ -118,32 +150,20 @@ class BBoxMerger:
         if self.enable_timing:
             debug_print(f"  🔄 Stage 1: Removing YOLO self-overlaps...")
         
-        filtered_yolo = []
+        soa = DetectionsSoA.from_detections(yolo_detections)
+        areas = soa.areas
+        iou = pairwise_iou(soa.xyxy, soa.xyxy)
         
-        for i, yolo1 in enumerate(yolo_detections):
-            bbox1 = yolo1['bbox']
-            area1 = calculate_box_area(bbox1)
-            is_valid_box = True
-            
-            # Check against all other YOLO boxes
-            for j, yolo2 in enumerate(yolo_detections):
-                if i == j:
-                    continue
-                    
-                bbox2 = yolo2['bbox']
-                area2 = calculate_box_area(bbox2)
-                
-                iou = calculate_iou(bbox1, bbox2)
-                
-                # If significant overlap and current box is larger, discard it (keep smaller box)
-                if iou > self.iou_threshold and area1 > area2:
-                    is_valid_box = False
-                    if self.enable_timing:
-                        debug_print(f"    🗑️ Discarding larger YOLO box (area: {area1:.1f}) in favor of smaller (area: {area2:.1f}), IoU: {iou:.3f}")
-                    break
-            
-            if is_valid_box:
-                filtered_yolo.append(yolo1)
+        # Box i loses to any other box j it overlaps that is smaller (diagonal has area1 == area2)
+        discard = (iou > self.iou_threshold) & (areas[:, None] > areas[None, :])
+        keep = ~discard.any(axis=1)
+        
+        if self.enable_timing:
+            for i in np.flatnonzero(~keep):
+                j = int(np.argmax(discard[i]))
+                debug_print(f"    🗑️ Discarding larger YOLO box (area: {areas[i]:.1f}) in favor of smaller (area: {areas[j]:.1f}), IoU: {iou[i, j]:.3f}")
+        
+        filtered_yolo = [det for det, kept in zip(yolo_detections, keep) if kept]
         
         if self.enable_timing:
             debug_print(f"    ✅ YOLO self-overlap removal: {len(yolo_detections)} -> {len(filtered_yolo)} boxes")
@@ -170,22 +190,16 @@ class BBoxMerger:
         
         filtered_yolo = []
         
-        for yolo_det in yolo_detections:
-            yolo_bbox = yolo_det['bbox']
-            ocr_inside_count = 0
-            
-            # Count how many OCR boxes are inside this YOLO box
-            for ocr_det in ocr_detections:
-                ocr_bbox = ocr_det['bbox']
-                
-                # Check if OCR box is inside YOLO box
-                if is_box_inside(ocr_bbox, yolo_bbox, self.containment_threshold):
-                    ocr_inside_count += 1
-                    
-                    # Early exit if we exceed the threshold
-                    if ocr_inside_count > max_ocr_inside:
-                        break
-            
+        # Count how many OCR boxes are inside each YOLO box
+        if yolo_detections and ocr_detections:
+            ocr_inside = pairwise_inside(DetectionsSoA.from_detections(ocr_detections).xyxy,
+                                         DetectionsSoA.from_detections(yolo_detections).xyxy,
+                                         self.containment_threshold)
+            ocr_inside_counts = ocr_inside.sum(axis=0)
+        else:
+            ocr_inside_counts = np.zeros(len(yolo_detections), dtype=np.int64)
+        
+        for yolo_det, ocr_inside_count in zip(yolo_detections, ocr_inside_counts.tolist()):
             if ocr_inside_count <= max_ocr_inside:
                 filtered_yolo.append(yolo_det)
                 if self.enable_timing and ocr_inside_count > 0:
@@ -219,40 +233,46 @@ class BBoxMerger:
         merged_detections = []
         ocr_used = [False] * len(ocr_detections)
         
+        # All pairwise geometry up front; the loop below only visits overlapping pairs
+        if yolo_detections and ocr_detections:
+            yolo_xyxy = DetectionsSoA.from_detections(yolo_detections).xyxy
+            ocr_xyxy = DetectionsSoA.from_detections(ocr_detections).xyxy
+            iou_matrix = pairwise_iou(yolo_xyxy, ocr_xyxy)
+            yolo_in_ocr = pairwise_inside(yolo_xyxy, ocr_xyxy, self.containment_threshold)
+            ocr_in_yolo = pairwise_inside(ocr_xyxy, yolo_xyxy, self.containment_threshold).T
+            overlaps = iou_matrix > self.iou_threshold
+        else:
+            overlaps = None
+        
         # Process each YOLO box
-        for yolo_det in yolo_detections:
-            yolo_bbox = yolo_det['bbox']
+        for i, yolo_det in enumerate(yolo_detections):
             box_added = False
+            candidates = np.flatnonzero(overlaps[i]).tolist() if overlaps is not None else ()
             
-            # Check relationships with all OCR boxes
-            for j, ocr_det in enumerate(ocr_detections):
+            # Check relationships with the overlapping OCR boxes (in order)
+            for j in candidates:
                 if ocr_used[j]:
                     continue
-                    
-                ocr_bbox = ocr_det['bbox']
-                iou = calculate_iou(yolo_bbox, ocr_bbox)
                 
-                if iou > self.iou_threshold:
-                    # Check containment relationships
-                    yolo_inside_ocr = is_box_inside(yolo_bbox, ocr_bbox, self.containment_threshold)
-                    ocr_inside_yolo = is_box_inside(ocr_bbox, yolo_bbox, self.containment_threshold)
-                    
-                    if yolo_inside_ocr:
-                        # YOLO inside OCR -> Keep OCR, discard YOLO
-                        if not box_added:  # Only add once
-                            merged_detections.append(ocr_det.copy())
-                            box_added = True
-                            if self.enable_timing:
-                                debug_print(f"    🔄 YOLO inside OCR -> Keeping OCR (IoU: {iou:.3f})")
-                        ocr_used[j] = True
-                        break  # YOLO can only be inside one OCR box
-                        
-                    elif ocr_inside_yolo:
-                        # OCR inside YOLO -> Keep YOLO, mark OCR as used
-                        # Note: We'll add the YOLO box after checking all OCR boxes
-                        ocr_used[j] = True
+                iou = iou_matrix[i, j]
+                
+                # Check containment relationships
+                if yolo_in_ocr[i, j]:
+                    # YOLO inside OCR -> Keep OCR, discard YOLO
+                    if not box_added:  # Only add once
+                        merged_detections.append(ocr_detections[j].copy())
+                        box_added = True
                         if self.enable_timing:
-                            debug_print(f"    🔄 OCR inside YOLO -> Will keep YOLO (IoU: {iou:.3f})")
+                            debug_print(f"    🔄 YOLO inside OCR -> Keeping OCR (IoU: {iou:.3f})")
+                    ocr_used[j] = True
+                    break  # YOLO can only be inside one OCR box
+                    
+                elif ocr_in_yolo[i, j]:
+                    # OCR inside YOLO -> Keep YOLO, mark OCR as used
+                    # Note: We'll add the YOLO box after checking all OCR boxes
+                    ocr_used[j] = True
+                    if self.enable_timing:
+                        debug_print(f"    🔄 OCR inside YOLO -> Will keep YOLO (IoU: {iou:.3f})")
             
             # If YOLO wasn't absorbed into an OCR box, add it
             if not box_added:
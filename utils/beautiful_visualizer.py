@@ -58,7 +58,7 @@ class BeautifulVisualizer:
         ]
     
     def create_all_visualizations(self, image_path: str, results: Dict[str, Any], 
-                                filename_base: str = None) -> Dict[str, str]:
+                                filename_base: str = None, image: Image.Image = None) -> Dict[str, str]:
         """
         Create all visualizations based on config settings
         
@@ -66,6 +66,7 @@ class BeautifulVisualizer:
             image_path: Path to original image
             results: Dictionary containing all detection results
             filename_base: Base filename (auto-detected if None)
+            image: Already-loaded RGB image (skips reading image_path)
             
         Returns:
             Dictionary mapping visualization type to saved file path
@@ -78,7 +79,8 @@ class BeautifulVisualizer:
         debug_print(f"🎨 Creating beautiful visualizations...")
         
         # Load image
-        image = Image.open(image_path).convert('RGB')
+        if image is None:
+            image = Image.open(image_path).convert('RGB')
         
         # Auto-detect filename if not provided
         if filename_base is None:
@@ -125,9 +127,10 @@ class BeautifulVisualizer:
         return visualization_paths
     
     def create_seraphine_group_visualization(self, image_path: str, seraphine_analysis: Dict, 
-                                           filename_base: str = None) -> Optional[str]:
+                                           filename_base: str = None, image: Image.Image = None) -> Optional[str]:
         """
         Create CLEAN seraphine group visualization (same style as YOLO/OCR visualizations)
+        (image: already-loaded RGB image, skips reading image_path)
         """
         # Check if seraphine visualization is enabled in config
         if not self.config.get("save_seraphine_viz", True):
@@ -141,7 +144,8 @@ class BeautifulVisualizer:
         debug_print("🧠 Creating Seraphine group visualization...")
         
         # Load image
-        image = Image.open(image_path).convert('RGB')
+        if image is None:
+            image = Image.open(image_path).convert('RGB')
         
         # Auto-detect filename if not provided
         if filename_base is None:
@@ -123,7 +123,7 @@ class StochasticCropExtractor:
         debug_print(f"📂 Loading detection results from: {json_file_path}")
         
         # Load JSON data
-        with open(json_file_path, 'r') as f:
+        with open(json_file_path, 'r', encoding='utf-8') as f:
             detections = json.load(f)
         
         debug_print(f"📊 Found {len(detections)} detections to process")
@@ -151,7 +151,7 @@ class StochasticCropExtractor:
         """Create a summary report of extracted crops"""
         
         # Load original detections for analysis
-        with open(json_file_path, 'r') as f:
+        with open(json_file_path, 'r', encoding='utf-8') as f:
             detections = json.load(f)
         
         # Group by type and source
@@ -102,63 +102,114 @@ class GeminiIconAnalyzer:
         # Execute all tasks in parallel with concurrency limit
         semaphore = asyncio.Semaphore(self.max_concurrent_requests)
         
-        # Modified analysis function with semaphore for direct images
-        async def analyze_and_process_image_direct(image_data, filename: str, index: int) -> Dict[str, Any]:
-            """Analyze a single image with concurrency control - supports both file paths and PIL images"""
-            async with semaphore:
-                debug_print(f"  📸 Analyzing image {index+1}/{len(valid_images)}: {filename}")
+        # Create tasks for all images
+        tasks = []
+        for i, (image_data, filename) in enumerate(valid_images):
+            tasks.append(self._analyze_and_process_image(semaphore, image_data, filename,
+                                                         f"{i+1}/{len(valid_images)}"))
+        
+        debug_print(f"🚀 Executing {len(tasks)} requests to Gemini (max {self.max_concurrent_requests} concurrent)...")
+        image_results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        total_input = len(direct_images) if direct_images else len(grouped_image_paths)
+        return self._compile_results(valid_images, image_results, bool(direct_images), total_input,
+                                     start_time, filename_base)
+    
+    async def analyze_image_stream(self, image_queue: asyncio.Queue, filename_base: str = "") -> Dict[str, Any]:
+        """
+        Analyze grouped images while they are still being generated
+        
+        Args:
+            image_queue: Receives (PIL.Image, filename) tuples, then None when generation is done
+            filename_base: Base filename for saving results
+            
+        Returns:
+            Dictionary containing analysis results (same shape as analyze_grouped_images)
+        """
+        debug_print(f"\n🤖 Starting Gemini analysis of grouped images as they are generated (direct mode)...")
+        start_time = datetime.now()
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        
+        valid_images = []
+        tasks = []
+        total_input = 0
+        
+        # Each image goes to Gemini as soon as it arrives; the semaphore caps requests in flight
+        while True:
+            item = await image_queue.get()
+            if item is None:
+                break
+            total_input += 1
+            image_data, filename = item
+            if "combined" not in filename:
+                continue
+            valid_images.append((image_data, filename))
+            tasks.append(asyncio.create_task(
+                self._analyze_and_process_image(semaphore, image_data, filename, str(len(valid_images)))
+            ))
+        
+        if not valid_images:
+            debug_print("❌ No valid combined images found for analysis")
+            return {'images': [], 'total_icons': 0, 'analysis_time': 0}
+        
+        debug_print(f"🚀 Waiting on {len(tasks)} requests to Gemini (max {self.max_concurrent_requests} concurrent)...")
+        image_results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        return self._compile_results(valid_images, image_results, True, total_input,
+                                     start_time, filename_base)
+    
+    async def _analyze_and_process_image(self, semaphore: asyncio.Semaphore, image_data, filename: str,
+                                         position: str) -> Dict[str, Any]:
+        """Analyze a single image with concurrency control - supports both file paths and PIL images"""
+        async with semaphore:
+            debug_print(f"  📸 Analyzing image {position}: {filename}")
+            
+            try:
+                # Analyze with Gemini - supports both PIL and file path
+                response = await self._analyze_single_image_direct(image_data, filename)
                 
-                try:
-                    # Analyze with Gemini - supports both PIL and file path
-                    response = await self._analyze_single_image_direct(image_data, filename)
+                if response:
+                    icons = self._parse_gemini_response(response)
                     
-                    if response:
-                        icons = self._parse_gemini_response(response)
-                        
-                        image_result = {
-                            'image_path': filename if isinstance(image_data, str) else f"direct:{filename}",
-                            'image_name': filename,
-                            'icons_found': len(icons),
-                            'icons': icons,
-                            'raw_response': response,
-                            'analysis_success': True
-                        }
-                        
-                        debug_print(f"    ✅ Found {len(icons)} icons in {filename}")
-                        return image_result
-                    else:
-                        image_result = {
-                            'image_path': filename if isinstance(image_data, str) else f"direct:{filename}",
-                            'image_name': filename,
-                            'icons_found': 0,
-                            'icons': [],
-                            'raw_response': None,
-                            'analysis_success': False,
-                            'error': 'Failed to get response from Gemini'
-                        }
-                        debug_print(f"    ❌ Analysis failed for {filename}")
-                        return image_result
+                    image_result = {
+                        'image_path': filename if isinstance(image_data, str) else f"direct:{filename}",
+                        'image_name': filename,
+                        'icons_found': len(icons),
+                        'icons': icons,
+                        'raw_response': response,
+                        'analysis_success': True
+                    }
                     
-                except Exception as e:
-                    debug_print(f"    ❌ Error analyzing {filename}: {str(e)}")
-                    return {
+                    debug_print(f"    ✅ Found {len(icons)} icons in {filename}")
+                    return image_result
+                else:
+                    image_result = {
                         'image_path': filename if isinstance(image_data, str) else f"direct:{filename}",
                         'image_name': filename,
                         'icons_found': 0,
                         'icons': [],
                         'raw_response': None,
                         'analysis_success': False,
-                        'error': str(e)
+                        'error': 'Failed to get response from Gemini'
                     }
-        
-        # Create tasks for all images
-        tasks = []
-        for i, (image_data, filename) in enumerate(valid_images):
-            tasks.append(analyze_and_process_image_direct(image_data, filename, i))
-        
-        debug_print(f"🚀 Executing {len(tasks)} requests to Gemini (max {self.max_concurrent_requests} concurrent)...")
-        image_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
+                    debug_print(f"    ❌ Analysis failed for {filename}")
+                    return image_result
+                
+            except Exception as e:
+                debug_print(f"    ❌ Error analyzing {filename}: {str(e)}")
+                return {
+                    'image_path': filename if isinstance(image_data, str) else f"direct:{filename}",
+                    'image_name': filename,
+                    'icons_found': 0,
+                    'icons': [],
+                    'raw_response': None,
+                    'analysis_success': False,
+                    'error': str(e)
+                }
+    
+    def _compile_results(self, valid_images: List[Tuple], image_results: List, direct_mode: bool,
+                         total_input: int, start_time: datetime, filename_base: str) -> Dict[str, Any]:
+        """Turn gathered per-image results into the final results dict, then save and summarize"""
         # Handle any exceptions from gather
         processed_results = []
         total_icons_found = 0
@@ -166,7 +217,7 @@ class GeminiIconAnalyzer:
         for i, result in enumerate(image_results):
             if isinstance(result, Exception):
                 error_result = {
-                    'image_path': f"direct:{valid_images[i][1]}" if direct_images else valid_images[i][0],
+                    'image_path': f"direct:{valid_images[i][1]}" if direct_mode else valid_images[i][0],
                     'image_name': valid_images[i][1],
                     'icons_found': 0,
                     'icons': [],
@@ -192,8 +243,8 @@ class GeminiIconAnalyzer:
             'analysis_timestamp': end_time.isoformat(),
             'analysis_duration_seconds': analysis_duration,
             'total_images_analyzed': len(valid_images),
-            'total_input_images': len(direct_images) if direct_images else len(grouped_image_paths),
-            'analysis_mode': 'direct' if direct_images else 'file',
+            'total_input_images': total_input,
+            'analysis_mode': 'direct' if direct_mode else 'file',
             'successful_analyses': len([r for r in image_results if r['analysis_success']]),
             'total_icons_found': total_icons_found,
             'images': image_results
@@ -0,0 +1,81 @@
+"""
+Disk cache for Gemini icon analysis results
+Keyed by the grouped images' content + prompt version so identical icon sets skip the API call
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import List, Dict, Any, Optional
+from utils.helpers import debug_print
+
+
+def prompt_version(prompt_path: str) -> str:
+    """Version tag for the prompt file - editing the prompt invalidates cached results"""
+    try:
+        stat = os.stat(prompt_path)
+        return f"{prompt_path}:{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return prompt_path or ""
+
+
+def make_cache_key(images: List, prompt_tag: str) -> str:
+    """
+    SHA256 over every grouped image + the prompt version
+
+    Args:
+        images: (PIL image, filename) tuples from direct mode, or image file paths
+        prompt_tag: Output of prompt_version()
+    """
+    digest = hashlib.sha256()
+    for item in images:
+        if isinstance(item, str):
+            digest.update(os.path.basename(item).encode())
+            with open(item, "rb") as f:
+                digest.update(f.read())
+        else:
+            img, filename = item
+            # Raw pixels are cheaper to hash than re-encoding to PNG
+            digest.update(f"{filename}|{img.mode}|{img.size}".encode())
+            digest.update(img.tobytes())
+    digest.update(prompt_tag.encode())
+    return digest.hexdigest()
+
+
+class GeminiResponseCache:
+    """One JSON file per key under <output_dir>/.gemini_cache, expired after ttl_days"""
+
+    def __init__(self, output_dir: str = "outputs", ttl_days: float = 7):
+        self.cache_dir = os.path.join(output_dir, ".gemini_cache")
+        self.ttl_seconds = ttl_days * 86400
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached analysis for key, or None on miss/expiry"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            debug_print(f"⚠️  Gemini cache read failed ({key[:12]}): {e}")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store an analysis result (written to a temp file, then renamed into place)"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            debug_print(f"⚠️  Gemini cache write failed ({key[:12]}): {e}")
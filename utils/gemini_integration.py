@@ -55,6 +55,15 @@ def integrate_gemini_results(seraphine_analysis, gemini_results):
     debug_print(f"✅ Integrated Gemini results: {total_integrated}/{sum(len(boxes) for boxes in bbox_processor.final_groups.values())} items updated")
     return seraphine_analysis
 
+def _create_analyzer(analyzer_cls, config):
+    """GeminiIconAnalyzer configured from config.json"""
+    return analyzer_cls(
+        prompt_path=config.get("gemini_prompt_path", "utils/prompt.txt"),
+        output_dir=config.get("output_dir", "outputs"),
+        max_concurrent_requests=config.get("gemini_max_concurrent", 4),
+        save_results=config.get("save_gemini_json", True)
+    )
+
 async def run_gemini_analysis(seraphine_analysis, grouped_image_paths, image_path, config):
     """
     Run Gemini LLM analysis with optimized image sharing
@@ -74,12 +83,7 @@ async def run_gemini_analysis(seraphine_analysis, grouped_image_paths, image_pat
         filename_base = os.path.splitext(os.path.basename(image_path))[0]
         
         # Initialize analyzer
-        analyzer = GeminiIconAnalyzer(
-            prompt_path=config.get("gemini_prompt_path", "utils/prompt.txt"),
-            output_dir=output_dir,
-            max_concurrent_requests=config.get("gemini_max_concurrent", 4),
-            save_results=config.get("save_gemini_json", True)
-        )
+        analyzer = _create_analyzer(GeminiIconAnalyzer, config)
         
         # Use direct image mode for optimized sharing
         if config.get("gemini_return_images_b64", True):
@@ -134,3 +138,79 @@ async def run_gemini_analysis(seraphine_analysis, grouped_image_paths, image_pat
     except Exception as e:
         debug_print(f"❌ Gemini analysis failed: {str(e)}")
         return None
+
+async def run_gemini_analysis_streaming(seraphine_analysis, image_path, config, image_generator,
+                                        save_to_disk=True, original_image=None):
+    """
+    Generate grouped images and analyze them with Gemini in one overlapped step:
+    images are produced on a worker thread and each is sent to Gemini as soon as it is ready.
+    With save_to_disk=False the images only ever exist in memory; original_image (PIL)
+    saves re-reading the screenshot from image_path.
+    
+    Returns:
+        (gemini_results or None, list of grouped image paths)
+    """
+    if not config.get("gemini_enabled", False):
+        debug_print("\n⏭️  Gemini analysis disabled in config")
+        return None, []
+    
+    debug_print("\n🤖 Steps 3+4: Grouped images streamed into Gemini LLM Analysis")
+    debug_print("=" * 70)
+    
+    import os
+    import asyncio
+    
+    filename_base = os.path.splitext(os.path.basename(image_path))[0]
+    
+    try:
+        from utils.gemini_analyzer import GeminiIconAnalyzer
+        analyzer = _create_analyzer(GeminiIconAnalyzer, config)
+    except ImportError:
+        debug_print("❌ Gemini analyzer not available (missing dependencies)")
+        return None, []
+    except Exception as e:
+        debug_print(f"❌ Gemini analysis failed: {str(e)}")
+        return None, []
+    
+    loop = asyncio.get_running_loop()
+    image_queue = asyncio.Queue()
+    
+    def on_image(image, filename, bbox_count):
+        loop.call_soon_threadsafe(image_queue.put_nowait, (image, filename))
+    
+    def produce():
+        try:
+            return image_generator.create_grouped_images(
+                image_path=image_path,
+                seraphine_analysis=seraphine_analysis,
+                filename_base=filename_base,
+                return_direct_images=True,
+                on_image=on_image,
+                save_to_disk=save_to_disk,
+                original_image=original_image
+            )
+        finally:
+            # Always close the stream so the consumer can't wait forever
+            loop.call_soon_threadsafe(image_queue.put_nowait, None)
+    
+    producer = loop.run_in_executor(None, produce)
+    
+    gemini_results = None
+    try:
+        gemini_results = await analyzer.analyze_image_stream(image_queue, filename_base)
+        
+        debug_print(f"✅ Gemini analysis complete:")
+        debug_print(f"   🖼️  Analyzed: {gemini_results.get('successful_analyses', 0)}/{gemini_results.get('total_images_analyzed', 0)} images")
+        debug_print(f"   🎯 Total icons found: {gemini_results.get('total_icons_found', 0)}")
+    except Exception as e:
+        debug_print(f"❌ Gemini analysis failed: {str(e)}")
+    
+    try:
+        result = await producer
+        grouped_image_paths = result['file_paths']
+        debug_print(f"✅ Generated {len(grouped_image_paths)} grouped images")
+    except Exception as e:
+        debug_print(f"❌ Grouped image generation failed: {str(e)}")
+        grouped_image_paths = []
+    
+    return gemini_results, grouped_image_paths
@@ -18,11 +18,26 @@ def load_configuration():
         print(f"Error loading configuration: {e}")
         return None
 
+# Resolved once from config.json on first use (or set by set_debug_mode)
+_debug_enabled = None
+
+def is_debug_enabled():
+    """True when config.json mode is "debug" (read once, then cached)"""
+    global _debug_enabled
+    if _debug_enabled is None:
+        config = load_configuration()
+        _debug_enabled = bool(config and config.get("mode", "").lower() == "debug")
+    return _debug_enabled
+
+def set_debug_mode(mode):
+    """Switch debug output on/off for the whole process, e.g. after reloading config"""
+    global _debug_enabled
+    _debug_enabled = (mode or "").lower() == "debug"
+
 def debug_only(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
-        config = load_configuration()
-        if config and config.get("mode", "").lower() == "debug":
+        if _debug_enabled or (_debug_enabled is None and is_debug_enabled()):
             return func(*args, **kwargs)
     return wrapper
 
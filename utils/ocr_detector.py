@@ -27,6 +27,7 @@ class OCRDetConfig:
     padding_x: int = 5  # Fixed horizontal padding
     padding_y_percent: float = 0.30  # Vertical padding percentage
     min_padding_y: int = 5
+    intra_op_threads: int = 0  # ORT intra-op threads per session, 0 = half the cores (YOLO runs alongside)
 
 class OCRDetMemoryPool:
     """Memory pool for OCR detection"""
@@ -50,14 +51,16 @@ class OCRModelCache:
     _instance = None
     _session = None
     _model_path = None
+    _intra_op_threads = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def get_session(self, model_path):
-        if self._session is None or self._model_path != model_path:
+    def get_session(self, model_path, intra_op_threads: int = 0):
+        if (self._session is None or self._model_path != model_path
+                or self._intra_op_threads != intra_op_threads):
             if self._session is None:
                 debug_print("  Loading CPU-optimized OCR detection model...")
             else:
@@ -70,6 +73,8 @@ class OCRModelCache:
             so.enable_mem_reuse = True
             so.enable_cpu_mem_arena = True
             so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            # YOLO and OCR run concurrently - give each half the cores instead of oversubscribing
+            so.intra_op_num_threads = intra_op_threads or max(1, (os.cpu_count() or 2) // 2)
             
             providers = [("CPUExecutionProvider", {
                 "enable_cpu_mem_arena": True,
@@ -80,6 +85,7 @@ class OCRModelCache:
             
             self._session = ort.InferenceSession(model_path, sess_options=so, providers=providers)
             self._model_path = model_path
+            self._intra_op_threads = intra_op_threads
             
             load_time = time.time() - load_start
             debug_print(f"  OCR detection model loading: {load_time:.3f}s")
@@ -90,12 +96,17 @@ class OCRModelCache:
 ocr_memory_pool = OCRDetMemoryPool()
 ocr_model_cache = OCRModelCache()
 
+def rgb_array_to_pil(img_rgb: np.ndarray) -> Image.Image:
+    """Wrap an RGB uint8 array as a PIL image sharing its memory (no copy for contiguous arrays)"""
+    img_rgb = np.ascontiguousarray(img_rgb)
+    height, width = img_rgb.shape[:2]
+    return Image.frombuffer('RGB', (width, height), img_rgb, 'raw', 'RGB', 0, 1)
+
 def preprocess_det(image, max_side_len, enable_timing=True):
     """Detection preprocessing"""
     preprocess_start = time.time()
     
-    img = np.array(image)
-    height, width, _ = img.shape
+    width, height = image.size
     
     ratio = min(max_side_len / float(width), max_side_len / float(height))
     resize_w = int(width * ratio)
@@ -152,6 +163,18 @@ def extract_boxes_opencv(score_map, ratio_w, ratio_h, det_threshold, min_box_siz
     
     return boxes, time.time() - extraction_start
 
+@dataclass
+class OCRProbMap:
+    """Raw detection output for one image - reusable across post-processing settings"""
+    score_map: np.ndarray
+    ratio_w: float
+    ratio_h: float
+    img_width: int
+    img_height: int
+    setup_time: float = 0.0
+    preprocess_time: float = 0.0
+    inference_time: float = 0.0
+
 class OCRDetector:
     """Clean OCR detector class - detection only, no recognition"""
     
@@ -159,12 +182,13 @@ class OCRDetector:
         self.config = config or OCRDetConfig()
         self.memory_pool = OCRDetMemoryPool()
     
-    def detect(self, image_input):
+    def detect(self, image_input, is_rgb: bool = False):
         """
         Run OCR detection on image (no text recognition)
         
         Args:
-            image_input: Path to image file or numpy array
+            image_input: Path to image file, PIL image or numpy array (BGR, or RGB with is_rgb=True)
+            is_rgb: numpy input is already RGB, skip the BGR->RGB conversion
             
         Returns:
             List of detection dictionaries with 'bbox' and metadata
@@ -176,20 +200,42 @@ class OCRDetector:
             debug_print(f"🤖 Model: {self.config.model_path}")
             debug_print("=" * 60)
         
+        prob = self._forward(image_input, is_rgb)
+        detections, box_extraction_time = self._extract(
+            prob, self.config.det_threshold, self.config.use_dilation
+        )
+        
+        if not detections:
+            if self.config.enable_timing:
+                debug_print("⚠️  OCR: No text regions detected")
+            return []
+        
+        if self.config.enable_timing:
+            total_time = time.time() - total_start
+            debug_print("=" * 60)
+            debug_print(f"  📝 OCR Detection Pipeline completed in {total_time:.3f}s")
+            debug_print(f"  Found {len(detections)} OCR detections")
+            debug_print(f"  Timing breakdown:")
+            debug_print(f"   - Setup: {prob.setup_time:.3f}s")
+            debug_print(f"   - Preprocessing: {prob.preprocess_time:.3f}s")
+            debug_print(f"   - Inference: {prob.inference_time:.3f}s")
+            debug_print(f"   - Box extraction: {box_extraction_time:.3f}s")
+        
+        return detections
+    
+    def _forward(self, image_input, is_rgb: bool = False) -> OCRProbMap:
+        """Load, preprocess and run the detection model - everything before thresholding"""
         # Load image
+        setup_start = time.time()
         if isinstance(image_input, np.ndarray):
-            # Convert BGR numpy to PIL RGB
-            img_rgb = cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB) 
-            image = Image.fromarray(img_rgb)
+            # RGB numpy wrapped as PIL without another copy
+            img_rgb = image_input if is_rgb else cv2.cvtColor(image_input, cv2.COLOR_BGR2RGB)
+            image = rgb_array_to_pil(img_rgb)
         elif isinstance(image_input, str):
             image = Image.open(image_input).convert("RGB")
         else:
             image = image_input.convert("RGB")
-        
-        # Image setup
-        setup_start = time.time()
-        np_img = np.array(image)
-        img_height, img_width = np_img.shape[:2]
+        img_width, img_height = image.size
         setup_time = time.time() - setup_start
         
         # Detection preprocessing
@@ -199,27 +245,38 @@ class OCRDetector:
         
         # Detection inference
         det_inference_start = time.time()
-        session = ocr_model_cache.get_session(self.config.model_path)
+        session = ocr_model_cache.get_session(self.config.model_path, self.config.intra_op_threads)
         det_output = session.run(None, {"x": det_input})[0]
         det_inference_time = time.time() - det_inference_start
         
         if self.config.enable_timing:
             debug_print(f"  OCR detection inference: {det_inference_time:.3f}s")
         
-        # Extract boxes
-        score_map = det_output[0][0]
+        return OCRProbMap(
+            score_map=det_output[0][0], ratio_w=ratio_w, ratio_h=ratio_h,
+            img_width=img_width, img_height=img_height,
+            setup_time=setup_time, preprocess_time=det_preprocess_time,
+            inference_time=det_inference_time
+        )
+    
+    def _postprocess(self, prob: OCRProbMap, det_threshold: float = None, use_dilation: bool = None):
+        """Threshold a probability map into padded detections (defaults come from the config)"""
+        if det_threshold is None:
+            det_threshold = self.config.det_threshold
+        if use_dilation is None:
+            use_dilation = self.config.use_dilation
+        return self._extract(prob, det_threshold, use_dilation)[0]
+    
+    def _extract(self, prob: OCRProbMap, det_threshold: float, use_dilation: bool):
+        """Box extraction + padding, returns (detections, extraction_time)"""
         boxes, box_extraction_time = extract_boxes_opencv(
-            score_map, ratio_w, ratio_h, 
-            self.config.det_threshold, self.config.min_box_size, 
-            self.config.use_dilation, self.config.enable_timing
+            prob.score_map, prob.ratio_w, prob.ratio_h, 
+            det_threshold, self.config.min_box_size, 
+            use_dilation, self.config.enable_timing
         )
         
-        if not boxes:
-            if self.config.enable_timing:
-                debug_print("⚠️  OCR: No text regions detected")
-            return []
-        
         # Convert to standardized format with padding (same as ocr_onnx.py)
+        img_width, img_height = prob.img_width, prob.img_height
         detections = []
         for i, box in enumerate(boxes):
             x1, y1 = int(np.min(box[:, 0])), int(np.min(box[:, 1]))
@@ -243,15 +300,4 @@ class OCRDetector:
                 "id": i
             })
         
-        if self.config.enable_timing:
-            total_time = time.time() - total_start
-            debug_print("=" * 60)
-            debug_print(f"  📝 OCR Detection Pipeline completed in {total_time:.3f}s")
-            debug_print(f"  Found {len(detections)} OCR detections")
-            debug_print(f"  Timing breakdown:")
-            debug_print(f"   - Setup: {setup_time:.3f}s")
-            debug_print(f"   - Preprocessing: {det_preprocess_time:.3f}s")
-            debug_print(f"   - Inference: {det_inference_time:.3f}s")
-            debug_print(f"   - Box extraction: {box_extraction_time:.3f}s")
-        
-        return detections
\ No newline at end of file
+        return detections, box_extraction_time
@@ -3,6 +3,7 @@ Parallel processor for running YOLO and OCR detection simultaneously
 No imports from original files allowed.
 """
 import time
+import asyncio
 import threading
 import json
 import os
@@ -30,7 +31,9 @@ class ParallelProcessor:
                  merger_iou_threshold: float = 0.1,
                  enable_timing: bool = True,
                  create_visualizations: bool = True,
-                 save_intermediate_results: bool = True):
+                 save_intermediate_results: bool = True,
+                 yolo_detector: YOLODetector = None,
+                 ocr_detector: OCRDetector = None):
         """
         Initialize parallel processor
         
@@ -41,16 +44,18 @@ class ParallelProcessor:
             enable_timing: Whether to print timing information
             create_visualizations: Whether to create visualization images
             save_intermediate_results: Whether to save intermediate JSON files
+            yolo_detector: Pre-built YOLO detector to reuse (its config wins over yolo_config)
+            ocr_detector: Pre-built OCR detector to reuse (its config wins over ocr_config)
         """
-        self.yolo_config = yolo_config or YOLOConfig()
-        self.ocr_config = ocr_config or OCRDetConfig()
+        self.yolo_config = yolo_detector.config if yolo_detector else (yolo_config or YOLOConfig())
+        self.ocr_config = ocr_detector.config if ocr_detector else (ocr_config or OCRDetConfig())
         self.enable_timing = enable_timing
         self.create_visualizations = create_visualizations
         self.save_intermediate_results = save_intermediate_results
         
         # Initialize detectors
-        self.yolo_detector = YOLODetector(self.yolo_config)
-        self.ocr_detector = OCRDetector(self.ocr_config)
+        self.yolo_detector = yolo_detector or YOLODetector(self.yolo_config)
+        self.ocr_detector = ocr_detector or OCRDetector(self.ocr_config)
         self.merger = BBoxMerger(iou_threshold=merger_iou_threshold, enable_timing=enable_timing)
         
         # Initialize visualizer if needed
@@ -71,16 +76,84 @@ class ParallelProcessor:
         Returns:
             Dictionary containing all results and timing information
         """
+        return self._process(image_path, image_path, output_dir)
+    
+    def process_image_array(self, img_bgr, output_dir: str = "outputs", name: str = "image_array") -> Dict[str, Any]:
+        """
+        Same as process_image for an image already in memory (OpenCV BGR array)
+        
+        Args:
+            img_bgr: BGR numpy array, handed straight to both detectors
+            output_dir: Directory to save results
+            name: Stands in for the image path in results and file names
+            
+        Returns:
+            Dictionary containing all results and timing information
+        """
+        return self._process(img_bgr, name, output_dir)
+    
+    async def process_image_array_async(self, img_bgr, output_dir: str = "outputs",
+                                        name: str = "image_array") -> Dict[str, Any]:
+        """
+        process_image_array for async callers: YOLO and OCR run on the event loop's
+        executor and are awaited together, so the loop stays free while they run
+        """
+        total_start = time.time()
+        results = self._start_results(name, output_dir)
+        
+        parallel_start = time.time()
+        loop = asyncio.get_running_loop()
+        # ONNX Runtime releases the GIL during inference, so the two overlap fully
+        yolo_detections, ocr_detections = await asyncio.gather(
+            loop.run_in_executor(None, self._run_yolo, img_bgr),
+            loop.run_in_executor(None, self._run_ocr, img_bgr)
+        )
+        
+        return self._finish_results(results, yolo_detections, ocr_detections, img_bgr,
+                                    name, output_dir, total_start, parallel_start)
+    
+    def _process(self, image_input, image_path: str, output_dir: str) -> Dict[str, Any]:
+        """Detect, merge and save for a path or an in-memory array"""
         total_start = time.time()
+        results = self._start_results(image_path, output_dir)
         
+        # Run YOLO and OCR detection in parallel
+        parallel_start = time.time()
+        
+        # Execute in parallel using ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Submit both tasks
+            yolo_future = executor.submit(self._run_yolo, image_input)
+            ocr_future = executor.submit(self._run_ocr, image_input)
+            
+            # Wait for both to complete
+            yolo_detections = yolo_future.result()
+            ocr_detections = ocr_future.result()
+        
+        return self._finish_results(results, yolo_detections, ocr_detections, image_input,
+                                    image_path, output_dir, total_start, parallel_start)
+    
+    def _run_yolo(self, image_input):
+        if self.enable_timing:
+            debug_print(f"🎯 Thread: Starting YOLO detection...")
+        return self.yolo_detector.detect(image_input)
+    
+    def _run_ocr(self, image_input):
+        if self.enable_timing:
+            debug_print(f"📝 Thread: Starting OCR detection...")
+        return self.ocr_detector.detect(image_input)
+    
+    def _start_results(self, image_path: str, output_dir: str) -> Dict[str, Any]:
+        """Announce the run, make sure output_dir exists and return the empty result containers"""
         if self.enable_timing:
             debug_print(f"\n🚀 Starting parallel detection pipeline...")
             debug_print(f"📁 Image: {image_path}")
             debug_print(f"📁 Output directory: {output_dir}")
             debug_print("=" * 80)
         
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
+        # Ensure output directory exists (only needed when something gets written)
+        if self.save_intermediate_results or self.create_visualizations:
+            os.makedirs(output_dir, exist_ok=True)
         
         # Prepare result containers
         results = {
@@ -92,30 +165,12 @@ class ParallelProcessor:
             'merge_stats': {},
             'visualization_paths': {}
         }
-        
-        # Run YOLO and OCR detection in parallel
-        parallel_start = time.time()
-        
-        def run_yolo():
-            if self.enable_timing:
-                debug_print(f"🎯 Thread: Starting YOLO detection...")
-            return self.yolo_detector.detect(image_path)
-        
-        def run_ocr():
-            if self.enable_timing:
-                debug_print(f"📝 Thread: Starting OCR detection...")
-            return self.ocr_detector.detect(image_path)
-        
-        # Execute in parallel using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit both tasks
-            yolo_future = executor.submit(run_yolo)
-            ocr_future = executor.submit(run_ocr)
-            
-            # Wait for both to complete
-            yolo_detections = yolo_future.result()
-            ocr_detections = ocr_future.result()
-        
+        return results
+    
+    def _finish_results(self, results, yolo_detections, ocr_detections, image_input,
+                        image_path: str, output_dir: str, total_start: float,
+                        parallel_start: float) -> Dict[str, Any]:
+        """Assign IDs, merge, visualize and save once both detectors are done"""
         # 🎯 FIX: Assign intelligent IDs BEFORE merging!
         yolo_detections, ocr_detections = self.assign_intelligent_ids(yolo_detections, ocr_detections)
         
@@ -140,7 +195,8 @@ class ParallelProcessor:
         
         # Create visualizations if enabled
         viz_time = 0
-        if self.create_visualizations:
+        # The visualizer re-reads the image from disk, so it needs a real path
+        if self.create_visualizations and isinstance(image_input, str):
             viz_start = time.time()
             if self.enable_timing:
                 debug_print(f"\n🎨 Creating beautiful visualizations...")
@@ -163,6 +219,11 @@ class ParallelProcessor:
             'ocr_count': len(ocr_detections),
             'merged_count': len(merged_detections)
         }
+        results['detection_counts'] = {
+            'yolo': results['timing']['yolo_count'],
+            'ocr': results['timing']['ocr_count'],
+            'merged': results['timing']['merged_count']
+        }
         
         # Save results to files
         self._save_results(results, output_dir, image_path)
@@ -192,27 +253,27 @@ class ParallelProcessor:
         
         # Save YOLO results
         yolo_file = os.path.join(output_dir, f"{base_name}_yolo_result.json")
-        with open(yolo_file, 'w') as f:
+        with open(yolo_file, 'w', encoding='utf-8') as f:
             json.dump({
                 'image_path': image_path,
                 'detections': results['yolo_detections'],
                 'count': len(results['yolo_detections']),
                 'source': 'yolo'
-            }, f, indent=2)
+            }, f, indent=2, ensure_ascii=False)
         
         # Save OCR results
         ocr_file = os.path.join(output_dir, f"{base_name}_ocr_det_result.json")
-        with open(ocr_file, 'w') as f:
+        with open(ocr_file, 'w', encoding='utf-8') as f:
             json.dump({
                 'image_path': image_path,
                 'detections': results['ocr_detections'],
                 'count': len(results['ocr_detections']),
                 'source': 'ocr_det'
-            }, f, indent=2)
+            }, f, indent=2, ensure_ascii=False)
         
         # Save merged results
         merged_file = os.path.join(output_dir, f"{base_name}_merged_result.json")
-        with open(merged_file, 'w') as f:
+        with open(merged_file, 'w', encoding='utf-8') as f:
             json.dump({
                 'image_path': image_path,
                 'detections': results['merged_detections'],
@@ -220,12 +281,12 @@ class ParallelProcessor:
                 'source': 'merged',
                 'merge_stats': results['merge_stats'],
                 'timing': results['timing']
-            }, f, indent=2)
+            }, f, indent=2, ensure_ascii=False)
         
         # Save complete results
         complete_file = os.path.join(output_dir, f"{base_name}_complete_results.json")
-        with open(complete_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        with open(complete_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
         
         if self.enable_timing:
             debug_print(f"  ✅ YOLO results: {yolo_file}")
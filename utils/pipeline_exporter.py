@@ -7,48 +7,69 @@ import json
 from datetime import datetime
 from utils.helpers import debug_print
 
-def create_enhanced_seraphine_structure(seraphine_analysis, original_merged_detections):
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _json_default(obj):
+    """stdlib json fallback for numpy scalars/arrays (orjson handles these natively)"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def write_json(path, data, pretty=True):
+    """Write data as UTF-8 JSON - orjson when installed (numpy values included), stdlib json otherwise"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        with open(path, 'wb') as f:
+            if not isinstance(data, dict) or not data:
+                f.write(orjson.dumps(data, option=option))
+                return
+            # Encode one top-level value at a time so the whole document is never
+            # held in memory as a single bytes object
+            newline, indent = (b"\n", b"  ") if pretty else (b"", b"")
+            separator = b": " if pretty else b":"
+            f.write(b"{" + newline)
+            for i, (key, value) in enumerate(data.items()):
+                if i:
+                    f.write(b"," + newline)
+                encoded = orjson.dumps(value, option=option)
+                if pretty:
+                    encoded = encoded.replace(b"\n", b"\n  ")
+                f.write(indent + orjson.dumps(str(key)) + separator + encoded)
+            f.write(newline + b"}")
+    else:
+        # json.dump already writes the iterencode() chunks as they are produced
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2 if pretty else None, ensure_ascii=False, default=_json_default)
+
+def create_enhanced_seraphine_structure(seraphine_analysis, original_merged_detections=None):
     """
     Create ENHANCED seraphine structure with Gemini results
-    Format: H1_1: {bbox, g_icon_name, g_brief, m_id, y_id, o_id}
+    Format (flat, keyed by item id): H1_1: {bbox, g_icon_name, g_brief, m_id, group}
+    y_id/o_id/type/source live once in merged_detections - resolve them through m_id
+    (see the top-level 'm_id_index'). bbox stays here: long boxes are rescaled during
+    grouping, so it can differ from the merged detection's bbox.
     """
     bbox_processor = seraphine_analysis.get('bbox_processor')
     if not bbox_processor:
         return {}
     
-    # Create lookup from m_id to original detection data
-    m_id_to_original = {}
-    for detection in original_merged_detections:
-        m_id = detection['m_id']
-        m_id_to_original[m_id] = {
-            'y_id': detection.get('y_id'),
-            'o_id': detection.get('o_id'),
-            'source': detection.get('source', 'unknown'),
-            'type': detection.get('type', 'unknown')
-        }
-    
     enhanced_groups = {}
     
-    # Process each group
+    # Flat item_id -> item mapping; the owning group is stored on each item
     for group_id, boxes in bbox_processor.final_groups.items():
-        enhanced_groups[group_id] = {}
-        
-        # Process each box in the group
-        for i, bbox in enumerate(boxes):
-            item_id = f"{group_id}_{i+1}"  # H1_1, H1_2, V2_1, etc.
-            
-            # Look up original IDs using m_id
-            original_data = m_id_to_original.get(bbox.merged_id, {})
-            
-            enhanced_groups[group_id][item_id] = {
+        for i, bbox in enumerate(boxes, 1):
+            enhanced_groups[f"{group_id}_{i}"] = {  # H1_1, H1_2, V2_1, etc.
                 'bbox': [bbox.x1, bbox.y1, bbox.x2, bbox.y2],
                 'g_icon_name': getattr(bbox, 'g_icon_name', 'unanalyzed'),
                 'g_brief': getattr(bbox, 'g_brief', 'Not analyzed'),
                 'm_id': bbox.merged_id,  # M001, M002, etc.
-                'y_id': original_data.get('y_id'),  # ✅ NOW PROPERLY LOOKED UP!
-                'o_id': original_data.get('o_id'),  # ✅ NOW PROPERLY LOOKED UP!
-                'type': original_data.get('type', bbox.bbox_type),  # Use original or fallback
-                'source': original_data.get('source', bbox.source)   # Use original or fallback
+                'group': group_id
             }
     
     return enhanced_groups
@@ -65,10 +86,7 @@ def save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysi
     debug_print("=" * 70)
     
     # Create enhanced seraphine structure with PROPER ID TRACKING!
-    enhanced_seraphine_groups = create_enhanced_seraphine_structure(
-        seraphine_analysis, 
-        detection_results['merged_detections']  # ✅ PASS ORIGINAL MERGED DETECTIONS!
-    )
+    enhanced_seraphine_groups = create_enhanced_seraphine_structure(seraphine_analysis)
     
     # Choose the right field name based on Gemini success
     seraphine_field_name = "seraphine_gemini_groups" if gemini_results else "seraphine_groups"
@@ -76,7 +94,8 @@ def save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysi
     # Rest of save_pipeline_json logic but with enhanced structure
     output_dir = config.get("output_dir", "outputs")
     current_time = datetime.now().strftime("%d-%m")
-    filename_base = os.path.splitext(os.path.basename(image_path))[0]
+    image_filename = os.path.basename(image_path)
+    filename_base = os.path.splitext(image_filename)[0]
     
     analysis = seraphine_analysis['analysis']
     
@@ -84,7 +103,7 @@ def save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysi
         'pipeline_version': 'v1.2_enhanced_with_gemini',
         'timestamp': datetime.now().isoformat(),
         'image_info': {
-            'filename': os.path.basename(image_path),
+            'filename': image_filename,
             'path': image_path
         },
         'detection_summary': {
@@ -117,6 +136,8 @@ def save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysi
             'ocr_detections': detection_results['ocr_detections'], 
             'merged_detections': detection_results['merged_detections']
         },
+        # m_id -> position in detections.merged_detections, for O(1) lookups from group items
+        'm_id_index': {det['m_id']: i for i, det in enumerate(detection_results['merged_detections'])},
         seraphine_field_name: enhanced_seraphine_groups  # DYNAMIC FIELD NAME!
     }
     
@@ -134,8 +155,8 @@ def save_enhanced_pipeline_json(image_path, detection_results, seraphine_analysi
     
     os.makedirs(output_dir, exist_ok=True)
     
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(pipeline_results, f, indent=2, ensure_ascii=False)
+    # Pretty-printed for humans; compact in deploy mode where nobody reads it
+    write_json(json_path, pipeline_results, pretty=config.get("mode", "debug") != "deploy_mcp")
     
     debug_print(f"✅ Enhanced Pipeline JSON saved: {json_filename}")
     debug_print(f"   📊 Complete pipeline with Gemini integration")
@@ -0,0 +1,95 @@
+"""
+Produce int8 (QDQ) versions of the YOLO and OCR detection models
+Calibrates on a folder of screenshots using the same preprocessing as the detectors.
+
+Usage:
+    python -m utils.quantize_models --images screenshots/ [--max-images 50]
+
+Writes <model>_int8.onnx next to each model; enable with "use_int8_models": true in config.json.
+"""
+import argparse
+import glob
+import os
+import cv2
+import onnxruntime as ort
+from PIL import Image
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+from utils.helpers import load_configuration
+from utils.yolo_detector import YOLOConfig, prepare_bgr_ultra_fast
+from utils.ocr_detector import OCRDetConfig, preprocess_det
+
+IMAGE_PATTERNS = ("*.png", "*.jpg", "*.jpeg", "*.bmp")
+
+def int8_path(model_path: str) -> str:
+    """models/foo.onnx -> models/foo_int8.onnx"""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}_int8{ext}"
+
+class ScreenshotReader(CalibrationDataReader):
+    """Feeds preprocessed screenshots to the calibrator, one input dict per image"""
+    
+    def __init__(self, image_paths, input_name, preprocess):
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.preprocess = preprocess
+        self._index = 0
+    
+    def get_next(self):
+        while self._index < len(self.image_paths):
+            path = self.image_paths[self._index]
+            self._index += 1
+            img_bgr = cv2.imread(path, cv2.IMREAD_COLOR)
+            if img_bgr is not None:
+                return {self.input_name: self.preprocess(img_bgr)}
+        return None
+
+def quantize_model(model_path, image_paths, preprocess):
+    input_name = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    output_path = int8_path(model_path)
+    print(f"Quantizing {model_path} -> {output_path} ({len(image_paths)} calibration images)")
+    quantize_static(
+        model_path,
+        output_path,
+        ScreenshotReader(image_paths, input_name, preprocess),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the detection models to int8 (QDQ)")
+    parser.add_argument("--images", required=True, help="Folder of calibration screenshots")
+    parser.add_argument("--max-images", type=int, default=50, help="Calibration images to use")
+    parser.add_argument("--skip-yolo", action="store_true")
+    parser.add_argument("--skip-ocr", action="store_true")
+    args = parser.parse_args()
+    
+    config = load_configuration() or {}
+    image_paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(args.images, pattern)))
+    image_paths = image_paths[:args.max_images]
+    if not image_paths:
+        print(f"No calibration images found in {args.images}")
+        return
+    
+    if not args.skip_yolo:
+        yolo_config = YOLOConfig(model_path=config.get("yolo_model_path", YOLOConfig.model_path))
+        quantize_model(
+            yolo_config.model_path, image_paths,
+            lambda img: prepare_bgr_ultra_fast(img, yolo_config.max_resolution, enable_timing=False)[0]
+        )
+    
+    if not args.skip_ocr:
+        ocr_config = OCRDetConfig(
+            model_path=config.get("ocr_model_path", OCRDetConfig.model_path),
+            max_side_len=config.get("ocr_max_side_len", OCRDetConfig.max_side_len)
+        )
+        quantize_model(
+            ocr_config.model_path, image_paths,
+            lambda img: preprocess_det(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)),
+                                       ocr_config.max_side_len, enable_timing=False)[0]
+        )
+
+if __name__ == "__main__":
+    main()
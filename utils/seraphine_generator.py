@@ -1,6 +1,5 @@
 import os
 import time
-import glob
 from typing import List, Dict, Any
 from PIL import Image
 from utils.helpers import debug_print
@@ -19,7 +18,9 @@ class FinalGroupImageGenerator:
         os.makedirs(self.output_dir, exist_ok=True)
     
     def create_grouped_images(self, image_path: str, seraphine_analysis: Dict[str, Any], 
-                            filename_base: str, return_direct_images: bool = False) -> List[str] | Dict[str, Any]:
+                            filename_base: str, return_direct_images: bool = False,
+                            on_image=None, save_to_disk: bool = True,
+                            original_image: Image.Image = None) -> List[str] | Dict[str, Any]:
         """
         Generate group images using the BBoxProcessor
         
@@ -28,6 +29,10 @@ class FinalGroupImageGenerator:
             seraphine_analysis: Result from FinalSeraphineProcessor.process_detections()
             filename_base: Base filename for outputs
             return_direct_images: If True, returns PIL images directly for Gemini
+            on_image: Optional callback(PIL.Image, filename, bbox_count) per finished image
+                      (direct mode only), so consumers can start before generation ends
+            save_to_disk: Direct mode only - False keeps the images in memory (file_paths is empty)
+            original_image: Already-loaded screenshot (skips reading image_path)
             
         Returns:
             If return_direct_images=False: List of generated image file paths (original behavior)
@@ -45,19 +50,17 @@ class FinalGroupImageGenerator:
         
         # Load original image into processor
         try:
-            bbox_processor.original_image = Image.open(image_path)
+            bbox_processor.original_image = original_image if original_image is not None else Image.open(image_path)
             if self.enable_debug:
                 debug_print(f"📷 Loaded original image: {bbox_processor.original_image.size}")
         except Exception as e:
             debug_print(f"❌ Error loading original image: {e}")
             bbox_processor.original_image = None
         
-        # Generate images
-        os.makedirs(self.output_dir, exist_ok=True)
-        
         if return_direct_images:
             # Generate with direct image return
-            result = bbox_processor.generate_images(self.output_dir, return_images=True)
+            result = bbox_processor.generate_images(self.output_dir, return_images=True, on_image=on_image,
+                                                    save_to_disk=save_to_disk)
             
             # Create file path list for compatibility
             generated_files = result['saved_paths']
@@ -66,7 +69,7 @@ class FinalGroupImageGenerator:
             # NOTE: We skip this for optimization - Gemini doesn't need the annotated image
             
             # Save mapping only if enabled
-            if self.save_mapping:
+            if self.save_mapping and save_to_disk:
                 bbox_processor.save_mapping(self.output_dir)
             
             elapsed = time.time() - start_time
@@ -80,14 +83,14 @@ class FinalGroupImageGenerator:
             }
         else:
             # Original behavior - just save files
-            bbox_processor.generate_images(self.output_dir)
+            os.makedirs(self.output_dir, exist_ok=True)
+            result = bbox_processor.generate_images(self.output_dir)
             if self.save_mapping:
                 bbox_processor.save_mapping(self.output_dir)
             
-            # Return list of generated image paths (compatible with old interface)
-            generated_files = []
-            pattern = os.path.join(self.output_dir, "combined_groups_*.png")
-            generated_files.extend(glob.glob(pattern))
+            # Return list of generated image paths (compatible with old interface) - exactly
+            # the files this run wrote, not everything matching in output_dir
+            generated_files = list(result['saved_paths'])
             
             # Add annotated image if it exists
             annotated_path = os.path.join(self.output_dir, "annotated_original_image.png")
@@ -526,8 +526,8 @@ class BBoxProcessor:
             return f"{base_name}_{image_count}.png"
     
     def _generate_combined_group_images(self, groups: Dict[str, List[BBox]], base_name: str, 
-                             output_dir: str, start_image_count: int) -> int:
-        """Generate images combining both horizontal and vertical groups"""
+                             output_dir: str, start_image_count: int, saved_paths: List[str] = None) -> int:
+        """Generate images combining both horizontal and vertical groups (saved files are appended to saved_paths)"""
         image_count = start_image_count
         current_y = self.PADDING + self.LABEL_TOP_PADDING
         current_image = Image.new('RGB', (self.IMAGE_WIDTH, self.IMAGE_HEIGHT), 'white')
@@ -631,6 +631,8 @@ class BBoxProcessor:
                         filename = self._generate_filename(base_name, image_count, bbox_count)
                         output_path = f"{output_dir}/{filename}"
                         current_image.save(output_path)
+                        if saved_paths is not None:
+                            saved_paths.append(output_path)
                         self.log(f"SAVE: Saved {output_path} (height used: {current_y}, {bbox_count} bboxes)")
                     image_count += 1
                     
@@ -711,6 +713,8 @@ class BBoxProcessor:
             filename = self._generate_filename(base_name, image_count, bbox_count)
             output_path = f"{output_dir}/{filename}"
             current_image.save(output_path)
+            if saved_paths is not None:
+                saved_paths.append(output_path)
             self.log(f"SAVE: Saved final {output_path} (height used: {current_y + current_row_max_height}, {bbox_count} bboxes)")
             image_count += 1
         
@@ -861,8 +865,8 @@ class BBoxProcessor:
                     "source": bbox.source
                 }
         
-        with open(mapping_file, 'w') as f:
-            json.dump(enhanced_mapping, f, indent=2)
+        with open(mapping_file, 'w', encoding='utf-8') as f:
+            json.dump(enhanced_mapping, f, indent=2, ensure_ascii=False)
         
         self.log(f"Saved enhanced mapping to {mapping_file}")
     
@@ -896,20 +900,26 @@ class BBoxProcessor:
         
         self.log("BBox processing pipeline completed")
 
-    def generate_images(self, output_dir: str = "outputs", return_images: bool = False):
+    def generate_images(self, output_dir: str = "outputs", return_images: bool = False, on_image=None,
+                        save_to_disk: bool = True):
         """Steps 10-11: Generate images with grouped bboxes - combining H and V groups
         
         Args:
             output_dir: Directory to save images (still saves files)
             return_images: If True, also returns PIL images directly
+            on_image: Optional callback(PIL.Image, filename, bbox_count), called as soon as
+                      each image is finished (only with return_images=True)
+            save_to_disk: With return_images=True, False skips writing the PNGs
             
         Returns:
-            If return_images=True: Dict with 'image_count' and 'generated_images' list
-            If return_images=False: None (original behavior)
+            Dict with 'image_count', 'generated_images' (PIL images, empty unless
+            return_images=True) and 'saved_paths' (files written by this call)
         """
         self.log("Steps 10-11: Generating images with combined H and V groups")
         
-        os.makedirs(output_dir, exist_ok=True)
+        save_to_disk = save_to_disk or not return_images
+        if save_to_disk:
+            os.makedirs(output_dir, exist_ok=True)
         
         # Combine all groups (both horizontal and vertical)
         all_groups = self.final_groups
@@ -919,7 +929,7 @@ class BBoxProcessor:
         if return_images:
             # Generate combined images and return them
             image_count, generated_images = self._generate_combined_group_images_with_return(
-                all_groups, "combined_groups", output_dir, 0
+                all_groups, "combined_groups", output_dir, 0, on_image, save_to_disk
             )
             
             self.log(f"Generated {image_count} combined images with direct return")
@@ -927,16 +937,22 @@ class BBoxProcessor:
             return {
                 'image_count': image_count,
                 'generated_images': generated_images,  # List of (PIL.Image, filename, bbox_count)
-                'saved_paths': [f"{output_dir}/{filename}" for _, filename, _ in generated_images]
+                'saved_paths': [f"{output_dir}/{filename}" for _, filename, _ in generated_images] if save_to_disk else []
             }
         else:
             # Original behavior - just save files
-            image_count = self._generate_combined_group_images(all_groups, "combined_groups", output_dir, 0)
+            saved_paths = []
+            image_count = self._generate_combined_group_images(all_groups, "combined_groups", output_dir, 0, saved_paths)
             self.log(f"Generated {image_count} combined images")
-            return None
+            return {
+                'image_count': image_count,
+                'generated_images': [],
+                'saved_paths': saved_paths
+            }
 
     def _generate_combined_group_images_with_return(self, groups: Dict[str, List[BBox]], base_name: str, 
-                                                   output_dir: str, start_image_count: int) -> Tuple[int, List[Tuple]]:
+                                                   output_dir: str, start_image_count: int,
+                                                   on_image=None, save_to_disk: bool = True) -> Tuple[int, List[Tuple]]:
         """Generate images and return them directly along with saving - FIXED VERSION"""
         image_count = start_image_count
         current_y = self.PADDING + self.LABEL_TOP_PADDING
@@ -1028,10 +1044,13 @@ class BBoxProcessor:
                         output_path = f"{output_dir}/{filename}"
                         
                         # Save to disk (original behavior)
-                        current_image.save(output_path)
+                        if save_to_disk:
+                            current_image.save(output_path)
                         
                         # Add to return list (new behavior)
                         generated_images.append((current_image.copy(), filename, bbox_count))
+                        if on_image:
+                            on_image(*generated_images[-1])
                         
                         self.log(f"SAVE: Saved {output_path} and added to return list ({bbox_count} bboxes)")
                     
@@ -1113,10 +1132,13 @@ class BBoxProcessor:
             output_path = f"{output_dir}/{filename}"
             
             # Save to disk
-            current_image.save(output_path)
+            if save_to_disk:
+                current_image.save(output_path)
             
             # Add to return list
             generated_images.append((current_image.copy(), filename, bbox_count))
+            if on_image:
+                on_image(*generated_images[-1])
             
             self.log(f"SAVE: Saved final {output_path} and added to return list ({bbox_count} bboxes)")
             image_count += 1
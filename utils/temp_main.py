@@ -5,34 +5,65 @@ import os
 import time
 import json
 import asyncio
-from PIL import Image
-from utils.yolo_detector import YOLODetector, YOLOConfig
-from utils.ocr_detector import OCRDetector, OCRDetConfig  
-from utils.bbox_merger import BBoxMerger
-from utils.seraphine_processor import FinalSeraphineProcessor, convert_detections_to_seraphine_format
-from utils.seraphine_generator import FinalGroupImageGenerator
-from utils.beautiful_visualizer import BeautifulVisualizer
-from utils.gemini_analyzer import GeminiIconAnalyzer
-from utils.parallel_processor import ParallelProcessor
+import signal
+from types import MappingProxyType
+from functools import lru_cache
+from datetime import datetime
+from collections import namedtuple
+from pathlib import Path
+from utils.gemini_cache import GeminiResponseCache, make_cache_key, prompt_version
+from utils.pipeline_exporter import write_json
+# Detectors (onnxruntime/OpenCV), Seraphine, visualizer and Gemini modules are heavy -
+# they are imported inside the functions that use them, so importing this module
+# (e.g. just for save_final_results_json) stays cheap
 
+# Read-only view - loaded once per process, never mutated by the pipeline
 with open("utils/config.json", "r") as f:
-    config = json.load(f)
+    config = MappingProxyType(json.load(f))
 
-async def main():
-    """Complete pipeline with Final Seraphine integration, visualizations, and Gemini LLM analysis"""
-    print("🚀 COMPLETE AI PIPELINE: YOLO + OCR + Final Seraphine + Visualizations + Gemini LLM")
-    print("=" * 90)
-    
-    # Configuration
-    image_path = "altair.jpg"
-    output_dir = config.get("output_dir", "outputs")
-    
-    # Check if image exists
-    if not os.path.exists(image_path):
-        print(f"❌ Error: Image file '{image_path}' not found!")
-        return
+# Static part of pipeline_info in every final results JSON
+_PIPELINE_META = MappingProxyType({'pipeline_version': '3.0_optimized'})
+
+# Snapshot of seraphine_analysis['analysis'] taken once after Step 2 (missing keys -> 0)
+SeraphineSummary = namedtuple(
+    'SeraphineSummary',
+    'total_groups horizontal_groups vertical_groups grouping_efficiency grouped_items ungrouped_items',
+    defaults=(0, 0, 0, 0.0, 0, 0)
+)
+
+def summarize_seraphine(seraphine_analysis) -> SeraphineSummary:
+    """Project the Seraphine 'analysis' stats into a SeraphineSummary"""
+    data = (seraphine_analysis or {}).get('analysis', {})
+    return SeraphineSummary(**{k: data[k] for k in SeraphineSummary._fields if k in data})
+
+@lru_cache(maxsize=32)
+def _convert_cached(frozen_detections: tuple) -> list:
+    """Seraphine-format detections for a frozen detection list (shared result - treat as read-only)"""
+    from utils.seraphine_processor import convert_detections_to_seraphine_format
+    detections = [{k: list(v) if isinstance(v, tuple) else v for k, v in items} for items in frozen_detections]
+    return convert_detections_to_seraphine_format(detections)
+
+def to_seraphine_detections(detections: list) -> list:
+    """convert_detections_to_seraphine_format, memoized on the detections' contents
+    (retries / repeated runs on the same screen skip the rebuild)"""
+    try:
+        frozen = tuple(
+            tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in d.items())
+            for d in detections
+        )
+        return _convert_cached(frozen)
+    except TypeError:
+        # Unhashable values (nested dicts, arrays) - convert directly
+        from utils.seraphine_processor import convert_detections_to_seraphine_format
+        return convert_detections_to_seraphine_format(detections)
+
+@lru_cache(maxsize=1)
+def get_parallel_processor():
+    """YOLO + OCR ParallelProcessor configured from config.json (models stay loaded between runs)"""
+    from utils.yolo_detector import YOLOConfig
+    from utils.ocr_detector import OCRDetConfig
+    from utils.parallel_processor import ParallelProcessor
     
-    # Configure components based on config.json
     yolo_config = YOLOConfig(
         model_path=config.get("yolo_model_path"),
         conf_threshold=config.get("yolo_conf_threshold"),
@@ -50,8 +81,7 @@ async def main():
         use_dilation=config.get("ocr_use_dilation")
     )
     
-    # Initialize processors
-    parallel_processor = ParallelProcessor(
+    return ParallelProcessor(
         yolo_config=yolo_config,
         ocr_config=ocr_config,
         merger_iou_threshold=config.get("merger_iou_threshold"),
@@ -59,33 +89,83 @@ async def main():
         create_visualizations=False,
         save_intermediate_results=config.get("save_json", False)
     )
-    
-    # Initialize Seraphine components
-    final_seraphine_processor = FinalSeraphineProcessor(
+
+def new_seraphine_processor():
+    """Fresh FinalSeraphineProcessor configured from config.json - not cached: its
+    BBoxProcessor accumulates boxes/groups, and each run's seraphine_analysis keeps a
+    reference to it"""
+    from utils.seraphine_processor import FinalSeraphineProcessor
+    return FinalSeraphineProcessor(
         enable_timing=config.get("seraphine_timing"), 
-        enable_debug=config.get("seraphine_enable_debug")
+        enable_debug=config.get("seraphine_enable_debug", False)
+    )
+
+@lru_cache(maxsize=1)
+def get_gemini_analyzer():
+    """GeminiIconAnalyzer built once - the prompt file is read a single time per process
+    (a failed construction is not cached, so it is retried on the next call)"""
+    from utils.gemini_analyzer import GeminiIconAnalyzer
+    return GeminiIconAnalyzer(
+        prompt_path=config.get("gemini_prompt_path"), 
+        output_dir=config.get("output_dir", "outputs"),
+        max_concurrent_requests=config.get("gemini_max_concurrent", 4),
+        save_results=config.get("save_json", False)
     )
+
+async def main():
+    """Complete pipeline with Final Seraphine integration, visualizations, and Gemini LLM analysis"""
+    print("🚀 COMPLETE AI PIPELINE: YOLO + OCR + Final Seraphine + Visualizations + Gemini LLM")
+    print("=" * 90)
+    
+    # Configuration
+    image_path = "altair.jpg"
+    output_dir = config.get("output_dir", "outputs")
+    # One timestamp per run so the final and Gemini JSONs can be matched up
+    run_timestamp = datetime.now().strftime("%H-%M")
+    
+    # Flags checked at several steps - bind once
+    save_json, save_viz, save_images, dbg = (
+        config.get(k, False) for k in ("save_json", "save_visualizations", "save_images", "seraphine_enable_debug")
+    )
+    save_gemini_viz, save_gemini_json = (
+        config.get(k, False) for k in ("save_gemini_visualization", "save_gemini_json")
+    )
+    
+    # Check if image exists
+    if not os.path.exists(image_path):
+        print(f"❌ Error: Image file '{image_path}' not found!")
+        return
+    
+    # Create the output directory once - every writer below can assume it exists
+    out_path = Path(output_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    filename_base = Path(image_path).stem
     
+    # Detectors are built once per process and reused across main() calls;
+    # Seraphine holds per-run state, so it gets a new processor every run
+    parallel_processor = get_parallel_processor()
+    final_seraphine_processor = new_seraphine_processor()
+    
+    from utils.seraphine_generator import FinalGroupImageGenerator
     final_group_generator = FinalGroupImageGenerator(
         output_dir=output_dir,
-        save_mapping=config.get("save_json", False)
+        save_mapping=save_json
     )
     
     # Initialize Gemini analyzer (optional - will skip if not configured)
     gemini_analyzer = None
     try:
-        # gemini_analyzer = None
-        gemini_analyzer = GeminiIconAnalyzer(
-            prompt_path=config.get("gemini_prompt_path"), 
-            output_dir=output_dir,
-            save_results=config.get("save_json", False)  # NEW: Pass config setting
-        )
+        gemini_analyzer = get_gemini_analyzer()
         if not config.get("yolo_enable_debug"):  # Only print if not in debug mode
             print("✅ Gemini analyzer initialized")
     except Exception as e:
         print(f"⚠️  Gemini analyzer not available: {e}")
         print("   Continuing without LLM analysis...")
     
+    results = None
+    handled_signals = []
+    interrupted = asyncio.Event()
+    save_json_task = None
     try:
         # Step 1: Run parallel YOLO + OCR detection
         if config.get("yolo_enable_debug") or config.get("ocr_enable_debug"):
@@ -93,137 +173,257 @@ async def main():
         
         results = parallel_processor.process_image(image_path, output_dir)
         
+        # Nothing to group or describe (e.g. a blank screen) - skip Seraphine and Gemini
+        if not results.get('merged_detections'):
+            print("⚠️  No detections found - skipping Seraphine grouping and Gemini analysis")
+            results['seraphine_summary'] = SeraphineSummary()
+            results['seraphine_analysis'] = {'analysis': results['seraphine_summary']._asdict()}
+            results['gemini_analysis'] = None
+            display_final_summary(results, image_path, output_dir)
+            return results
+        
+        # From here on, Ctrl-C / SIGTERM cancels the run and saves what has been computed
+        # so far instead of throwing away the detections (not supported on Windows loops)
+        handled_signals = install_interrupt_handlers(asyncio.current_task(), interrupted)
+        
         # Step 2: Run Final Seraphine analysis
-        if config.get("seraphine_enable_debug"):
+        if dbg:
             print("\n🧠 Step 2: Final Seraphine Intelligent Grouping & Image Generation")
         
-        seraphine_detections = convert_detections_to_seraphine_format(results['merged_detections'])
-        seraphine_analysis = final_seraphine_processor.process_detections(seraphine_detections)
+        seraphine_detections = to_seraphine_detections(results['merged_detections'])
+        # Grouping is CPU-bound; decode the screenshot for Step 3 on another thread meanwhile
+        seraphine_analysis, original_image = await asyncio.gather(
+            asyncio.to_thread(final_seraphine_processor.process_detections, seraphine_detections),
+            asyncio.to_thread(load_original_image, image_path)
+        )
         results['seraphine_analysis'] = seraphine_analysis
+        results['seraphine_summary'] = summarize_seraphine(seraphine_analysis)
         
         # Step 3: Generate grouped images for Gemini (only if Gemini is available)
-        filename_base = os.path.splitext(os.path.basename(image_path))[0]
-        
         if gemini_analyzer:
-            if config.get("seraphine_enable_debug"):
+            if dbg:
                 print("\n🖼️  Step 3: Creating Grouped Images for Gemini Analysis")
             
-            # Use direct images mode for better performance
+            # Gemini always gets the PIL images in memory - they only touch disk when
+            # save_images asks to keep them (gemini_return_images_b64 is ignored here)
             grouped_results = final_group_generator.create_grouped_images(
                 image_path, 
                 seraphine_analysis, 
                 filename_base, 
-                return_direct_images=config.get("gemini_return_images_b64", False)
+                return_direct_images=True,
+                save_to_disk=save_images,
+                original_image=original_image
             )
+            results['grouped_image_paths'] = grouped_results.get('file_paths', [])
+            results['direct_images'] = grouped_results.get('direct_images', [])
+            image_count = grouped_results.get('image_count', 0)
             
-            # Handle both modes properly
-            if config.get("gemini_return_images_b64", False):
-                # Dictionary mode with direct images
-                results['grouped_image_paths'] = grouped_results.get('file_paths', [])
-                results['direct_images'] = grouped_results.get('direct_images', [])
-                image_count = grouped_results.get('image_count', 0)
-            else:
-                # Traditional file mode - returns list directly
-                results['grouped_image_paths'] = grouped_results if isinstance(grouped_results, list) else []
-                results['direct_images'] = None
-                image_count = len(results['grouped_image_paths'])
-            
-            if config.get("seraphine_enable_debug"):
+            if dbg:
                 print(f"✅ Generated {image_count} grouped images for analysis")
         
         
         # Step 4: Gemini LLM Analysis
         if gemini_analyzer:
-            if config.get("seraphine_enable_debug"):
+            if dbg:
                 print("\n🤖 Step 4: Gemini LLM Analysis of Grouped Icons")
             
             try:
+                # Identical icon sets + unchanged prompt -> reuse the previous analysis
+                cache_ttl_days = config.get("gemini_cache_ttl_days", 7)
+                gemini_cache = GeminiResponseCache(output_dir, cache_ttl_days) if cache_ttl_days else None
+                cache_key = None
+                gemini_results = None
+                cache_hit = False
+                if gemini_cache:
+                    cache_key = await asyncio.to_thread(
+                        make_cache_key,
+                        results.get('direct_images') or results.get('grouped_image_paths', []),
+                        prompt_version(config.get("gemini_prompt_path"))
+                    )
+                    gemini_results = gemini_cache.get(cache_key)
+                    cache_hit = gemini_results is not None
+                    if cache_hit:
+                        print("⚡ Gemini analysis loaded from cache")
+                
                 # Use direct images if available, otherwise use file paths
-                if results.get('direct_images'):
-                    gemini_results = await gemini_analyzer.analyze_grouped_images(
+                if cache_hit:
+                    pass
+                elif results.get('direct_images'):
+                    gemini_results = await asyncio.shield(gemini_analyzer.analyze_grouped_images(
                         grouped_image_paths=None,
                         filename_base=filename_base,
                         direct_images=results['direct_images']
-                    )
+                    ))
                 else:
-                    gemini_results = await gemini_analyzer.analyze_grouped_images(
+                    gemini_results = await asyncio.shield(gemini_analyzer.analyze_grouped_images(
                         grouped_image_paths=results.get('grouped_image_paths', []),
                         filename_base=filename_base,
                         direct_images=None
-                    )
+                    ))
+                
+                if cache_key and not cache_hit and gemini_results.get('successful_analyses'):
+                    gemini_cache.put(cache_key, gemini_results)
                 
                 results['gemini_analysis'] = gemini_results
                 
-                if config.get("seraphine_enable_debug"):
+                if dbg:
                     print(f"✅ Gemini analysis completed: {gemini_results['total_icons_found']} icons identified")
                 
             except Exception as e:
                 print(f"❌ Gemini analysis failed: {e}")
                 results['gemini_analysis'] = None
         
+        # Steps 5-8 are pure side effects (disk + image rendering) - run them as
+        # background tasks and only wait for them right before the summary
+        pending = []
+        visualizer = None
+        if save_viz or save_gemini_viz:
+            from utils.beautiful_visualizer import BeautifulVisualizer
+            visualizer = BeautifulVisualizer(output_dir=output_dir)
+        
         # Step 5: Save final results JSON (only if enabled in config)
-        if config.get("save_json", False):
-            if config.get("seraphine_enable_debug"):
+        if save_json:
+            if dbg:
                 print("\n💾 Step 5: Saving Final Results")
-            save_final_results_json(results, output_dir, filename_base)
+            save_json_task = asyncio.create_task(
+                asyncio.to_thread(save_final_results_json, results, out_path, filename_base, run_timestamp)
+            )
+            # Shielded: cancelling a to_thread task doesn't stop its thread, so an interrupt
+            # waits for this write below rather than starting a second one on the same file
+            pending.append(asyncio.shield(save_json_task))
         
         # Step 6: Create visualizations (only if enabled in config)
-        if config.get("save_visualizations", False):
-            if config.get("seraphine_enable_debug"):
+        viz_task = None
+        if save_viz:
+            if dbg:
                 print("\n🎨 Step 6: Creating Beautiful Visualizations")
-            visualizer = BeautifulVisualizer(output_dir=output_dir)
-            visualization_paths = visualizer.create_all_visualizations(
-                image_path, results, filename_base
-            )
-            results['visualization_paths'] = visualization_paths
+            viz_task = asyncio.create_task(asyncio.to_thread(
+                visualizer.create_all_visualizations, image_path, results, filename_base
+            ))
+            pending.append(viz_task)
         
-        # Step 7: Clean up temporary files (if save_images is False)
-        if not config.get("save_images", False) and results.get('grouped_image_paths'):
-            cleanup_temp_files(results.get('grouped_image_paths', []))
+        # Step 7: Clean up temporary files - group images only reach disk when
+        # save_images is on, so the Gemini path has nothing to remove
+        if not gemini_analyzer and not save_images and results.get('grouped_image_paths'):
+            pending.append(asyncio.create_task(cleanup_temp_files(results.get('grouped_image_paths', []))))
         
         # Step 8: Optional Gemini visualization and JSON export
-        if results.get('gemini_analysis') and (config.get("save_gemini_visualization", False) or config.get("save_gemini_json", False)):
-            if config.get("seraphine_enable_debug"):
+        gemini_viz_task = None
+        if results.get('gemini_analysis') and (save_gemini_viz or save_gemini_json):
+            if dbg:
                 print("\n🎨 Step 8: Creating Gemini Visualization and Saving Results")
             
-            if config.get("save_gemini_visualization", False):
-                # Create gemini visualization
-                visualizer = BeautifulVisualizer(output_dir=output_dir)
-                original_image = Image.open(image_path)
-                gemini_viz_path = visualizer._create_gemini_visualization(
+            if save_gemini_viz:
+                # Create gemini visualization on the screenshot decoded in Step 2,
+                # rendered alongside the Step 6 visualizations
+                gemini_viz_task = asyncio.create_task(asyncio.to_thread(
+                    visualizer._create_gemini_visualization,
                     original_image, 
                     results['gemini_analysis'], 
                     results['seraphine_analysis'], 
                     filename_base
-                )
-                results['gemini_visualization_path'] = gemini_viz_path
+                ))
+                pending.append(gemini_viz_task)
             
-            if config.get("save_gemini_json", False):
+            if save_gemini_json:
                 # Save gemini results as separate JSON
-                save_gemini_results_json(results.get('gemini_analysis'), output_dir, filename_base)
+                pending.append(asyncio.create_task(asyncio.to_thread(
+                    save_gemini_results_json, results.get('gemini_analysis'), out_path, filename_base, run_timestamp
+                )))
+        
+        await asyncio.gather(*pending)
+        if viz_task:
+            results['visualization_paths'] = viz_task.result()
+        if gemini_viz_task:
+            results['gemini_visualization_path'] = gemini_viz_task.result()
         
         # Final Summary (always show)
         display_final_summary(results, image_path, output_dir)
 
         return results
         
+    except asyncio.CancelledError:
+        if not interrupted.is_set():
+            raise
+        asyncio.current_task().uncancel()
+        print("\n⚠️  Pipeline interrupted - saving partial results...")
+        try:
+            if save_json_task is not None:
+                await save_json_task
+            else:
+                await asyncio.to_thread(save_final_results_json, results, out_path, filename_base, run_timestamp)
+        except Exception as e:
+            print(f"❌ Could not save partial results: {e}")
+        return results
+        
     except Exception as e:
         print(f"❌ Error during processing: {str(e)}")
         import traceback
         traceback.print_exc()
         return None
+    
+    finally:
+        loop = asyncio.get_running_loop()
+        for sig in handled_signals:
+            loop.remove_signal_handler(sig)
 
 
-def cleanup_temp_files(file_paths: list):
-    """Clean up temporary grouped image files"""
-    cleaned_count = 0
+def install_interrupt_handlers(task: asyncio.Task, interrupted: asyncio.Event) -> list:
+    """Set interrupted and cancel task on SIGINT/SIGTERM - returns the signals handled"""
+    def _on_signal():
+        interrupted.set()
+        task.cancel()
+    
+    loop = asyncio.get_running_loop()
+    handled = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, _on_signal)
+            handled.append(sig)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows event loops (and non-main threads) can't install signal handlers
+            pass
+    return handled
+
+
+def load_original_image(image_path: str):
+    """Open and fully decode the screenshot as a PIL image (safe to call from a worker thread)"""
+    from PIL import Image
+    with Image.open(image_path) as img:
+        img.load()
+        return img.copy()
+
+
+def _bulk_remove(file_paths: list) -> int:
+    """Unlink every path, one failure doesn't stop the rest - returns how many were removed
+    (one scandir pass per parent directory instead of an exists() check per file)"""
+    wanted_by_dir = {}
     for file_path in file_paths:
+        parent, name = os.path.split(file_path)
+        wanted_by_dir.setdefault(parent or ".", set()).add(name)
+    
+    cleaned_count = 0
+    for parent, names in wanted_by_dir.items():
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                cleaned_count += 1
-        except Exception as e:
-            print(f"⚠️  Could not remove {file_path}: {e}")
+            with os.scandir(parent) as entries:
+                for entry in entries:
+                    if entry.name not in names or not entry.is_file():
+                        continue
+                    try:
+                        os.unlink(entry.path)
+                        cleaned_count += 1
+                    except FileNotFoundError:
+                        pass
+                    except Exception as e:
+                        print(f"⚠️  Could not remove {entry.path}: {e}")
+        except FileNotFoundError:
+            pass
+    return cleaned_count
+
+
+async def cleanup_temp_files(file_paths: list):
+    """Clean up temporary grouped image files on a worker thread"""
+    cleaned_count = await asyncio.to_thread(_bulk_remove, file_paths)
     
     if cleaned_count > 0:
         print(f"🧹 Cleaned up {cleaned_count} temporary image files")
@@ -231,16 +431,20 @@ def cleanup_temp_files(file_paths: list):
 
 def display_final_summary(results, image_path, output_dir):
     """Display clean final pipeline summary"""
-    seraphine_analysis = results['seraphine_analysis']
+    summary = results.get('seraphine_summary') or summarize_seraphine(results['seraphine_analysis'])
+    save_json, save_gemini_json, save_gemini_viz, save_images = (
+        config.get(k) for k in ("save_json", "save_gemini_json", "save_gemini_visualization", "save_images")
+    )
     
     print(f"\n📊 PIPELINE SUMMARY:")
     print("=" * 50)
-    print(f"  📸 Image: {os.path.basename(image_path)}")
-    print(f"  🎯 YOLO detections: {len(results['yolo_detections'])}")
-    print(f"  📝 OCR detections: {len(results['ocr_detections'])}")
-    print(f"  🔗 Merged detections: {len(results['merged_detections'])}")
-    print(f"  🧠 Seraphine groups: {seraphine_analysis['analysis']['total_groups']}")
-    print(f"  📊 Grouping efficiency: {seraphine_analysis['analysis']['grouping_efficiency']:.1%}")
+    print(f"  📸 Image: {Path(image_path).name}")
+    counts = results['detection_counts']
+    print(f"  🎯 YOLO detections: {counts['yolo']}")
+    print(f"  📝 OCR detections: {counts['ocr']}")
+    print(f"  🔗 Merged detections: {counts['merged']}")
+    print(f"  🧠 Seraphine groups: {summary.total_groups}")
+    print(f"  📊 Grouping efficiency: {summary.grouping_efficiency:.1%}")
     
     if results.get('gemini_analysis'):
         print(f"  🤖 LLM-identified icons: {results['gemini_analysis']['total_icons_found']}")
@@ -249,27 +453,26 @@ def display_final_summary(results, image_path, output_dir):
     print(f"  ⏱️  Total processing time: {results['timing']['total_time']:.3f}s")
     
     # Show what was saved
-    if config.get("save_json"):
+    if save_json:
         print(f"  💾 Final results saved to: {output_dir}/")
-    if config.get("save_gemini_json") and results.get('gemini_analysis'):
+    if save_gemini_json and results.get('gemini_analysis'):
         print(f"  📋 Gemini JSON saved separately")
-    if config.get("save_gemini_visualization") and results.get('gemini_visualization_path'):
+    if save_gemini_viz and results.get('gemini_visualization_path'):
         print(f"  🎨 Gemini visualization created")
-    if not config.get("save_images"):
+    if not save_images:
         print(f"  🧹 Temporary images cleaned up")
     
     print(f"\n🚀 PIPELINE COMPLETE!")
 
 
-def save_final_results_json(results: dict, output_dir: str, filename_base: str):
+def save_final_results_json(results: dict, output_dir, filename_base: str, timestamp: str = None):
     """Save only the final comprehensive results JSON"""
-    from datetime import datetime
-    
-    current_time = datetime.now().strftime("%H-%M")
+    current_time = timestamp or datetime.now().strftime("%H-%M")
     
     # Safely extract seraphine analysis data
     seraphine_analysis = results.get('seraphine_analysis', {})
-    seraphine_analysis_data = seraphine_analysis.get('analysis', {})
+    summary = results.get('seraphine_summary') or summarize_seraphine(seraphine_analysis)
+    counts = results['detection_counts']
     
     # Create comprehensive final results
     final_results = {
@@ -277,21 +480,14 @@ def save_final_results_json(results: dict, output_dir: str, filename_base: str):
             'filename': filename_base,
             'processing_timestamp': current_time,
             'total_processing_time_seconds': results['timing']['total_time'],
-            'pipeline_version': '3.0_optimized'
+            **_PIPELINE_META
         },
         'detection_summary': {
-            'yolo_detections': len(results['yolo_detections']),
-            'ocr_detections': len(results['ocr_detections']),
-            'merged_detections': len(results['merged_detections'])
-        },
-        'seraphine_analysis': {
-            'total_groups': seraphine_analysis_data.get('total_groups', 0),
-            'horizontal_groups': seraphine_analysis_data.get('horizontal_groups', 0),
-            'vertical_groups': seraphine_analysis_data.get('vertical_groups', 0),
-            'grouping_efficiency': seraphine_analysis_data.get('grouping_efficiency', 0.0),
-            'grouped_items': seraphine_analysis_data.get('grouped_items', 0),
-            'ungrouped_items': seraphine_analysis_data.get('ungrouped_items', 0)
+            'yolo_detections': counts['yolo'],
+            'ocr_detections': counts['ocr'],
+            'merged_detections': counts['merged']
         },
+        'seraphine_analysis': summary._asdict(),
         'gemini_analysis': results.get('gemini_analysis', {'analysis_completed': False}),
         'timing_breakdown': results['timing']
     }
@@ -303,30 +499,32 @@ def save_final_results_json(results: dict, output_dir: str, filename_base: str):
         final_results['seraphine_analysis']['detailed_groups'] = seraphine_analysis['group_assignments']
     
     # Save final results
-    final_path = os.path.join(output_dir, f"{filename_base}_final_results_{current_time}.json")
-    with open(final_path, 'w') as f:
-        json.dump(final_results, f, indent=2)
+    final_path = Path(output_dir) / f"{filename_base}_final_results_{current_time}.json"
+    write_json(final_path, final_results)
     
-    print(f"💾 Final results saved: {os.path.basename(final_path)}")
-    return final_path
+    print(f"💾 Final results saved: {final_path.name}")
+    return str(final_path)
 
 
-def save_gemini_results_json(gemini_analysis: dict, output_dir: str, filename_base: str):
+def save_gemini_results_json(gemini_analysis: dict, output_dir, filename_base: str, timestamp: str = None):
     """Save Gemini analysis results as separate JSON file"""
     if not gemini_analysis:
         return
     
-    from datetime import datetime
-    current_time = datetime.now().strftime("%H-%M")
+    current_time = timestamp or datetime.now().strftime("%H-%M")
     
-    gemini_path = os.path.join(output_dir, f"{filename_base}_gemini_analysis_{current_time}.json")
-    with open(gemini_path, 'w', encoding='utf-8') as f:
-        json.dump(gemini_analysis, f, indent=2, ensure_ascii=False)
+    gemini_path = Path(output_dir) / f"{filename_base}_gemini_analysis_{current_time}.json"
+    write_json(gemini_path, gemini_analysis)
     
-    print(f"💾 Gemini analysis saved: {os.path.basename(gemini_path)}")
-    return gemini_path
+    print(f"💾 Gemini analysis saved: {gemini_path.name}")
+    return str(gemini_path)
 
 
 if __name__ == "__main__":
-    # Run the async main function
-    asyncio.run(main())
\ No newline at end of file
+    # Run the async main function - on uvloop when it is installed (not available on Windows)
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+    run(main())
\ No newline at end of file
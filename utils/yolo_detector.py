@@ -9,7 +9,7 @@ import cv2
 import onnxruntime as ort
 from PIL import Image
 from dataclasses import dataclass
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Union
 import argparse
 import json
 import os
@@ -85,6 +85,24 @@ def filter_sparse_boxes_ultra_fast(image_np, detections, min_content_pixels=50):
     
     return filtered_detections, filtered_count
 
+def optimized_model_path(model_path):
+    """Where the ORT-optimized copy of a model is cached (models/x.onnx -> models/x.ort-<version>.optimized.onnx)
+    The ORT version is part of the name: serialized graphs are only guaranteed to load in the same release"""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.ort-{ort.__version__}.optimized{ext}"
+
+def _cpu_session_options(level):
+    """SessionOptions shared by every YOLO session, at the given graph optimization level"""
+    so = ort.SessionOptions()
+    so.log_severity_level = 3
+    so.enable_mem_pattern = True
+    so.enable_mem_reuse = True
+    so.enable_cpu_mem_arena = True
+    so.graph_optimization_level = level
+    # YOLO and OCR run concurrently - give each half the cores instead of oversubscribing
+    so.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+    return so
+
 class CPUModelCache:
     """Singleton cache for ONNX models with CPU optimization"""
     _instance = None
@@ -105,13 +123,6 @@ class CPUModelCache:
                 debug_print("  Reloading YOLO model...")
             load_start = time.time()
             
-            so = ort.SessionOptions()
-            so.log_severity_level = 3
-            so.enable_mem_pattern = True
-            so.enable_mem_reuse = True
-            so.enable_cpu_mem_arena = True
-            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-            
             providers = [("CPUExecutionProvider", {
                 "enable_cpu_mem_arena": True,
                 "arena_extend_strategy": "kSameAsRequested",
@@ -119,7 +130,7 @@ class CPUModelCache:
                 "max_mem": 1024 * 1024 * 512
             })]
             
-            self._session = ort.InferenceSession(model_path, sess_options=so, providers=providers)
+            self._session = self._load_with_optimized_cache(model_path, providers)
             self._model_path = model_path
             self._input_name = self._session.get_inputs()[0].name
             
@@ -128,6 +139,35 @@ class CPUModelCache:
         
         return self._session, self._input_name
     
+    def _load_with_optimized_cache(self, model_path, providers):
+        """Session for model_path, reusing a cached ORT_ENABLE_EXTENDED graph when possible
+        
+        Only the portable (EXTENDED) optimizations are serialized - ENABLE_ALL adds
+        hardware-specific layout transforms - and ENABLE_ALL is re-applied on load.
+        Any problem with the cache (read-only models dir, stale/corrupt file) falls
+        back to the plain model.
+        """
+        enable_all = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        optimized_path = optimized_model_path(model_path)
+        try:
+            fresh = (os.path.exists(optimized_path) and
+                     os.path.getmtime(optimized_path) >= os.path.getmtime(model_path))
+            if not fresh:
+                # Offline pass: write the EXTENDED-optimized graph, the session itself is discarded
+                so = _cpu_session_options(ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED)
+                so.optimized_model_filepath = optimized_path
+                ort.InferenceSession(model_path, sess_options=so, providers=providers)
+            return ort.InferenceSession(optimized_path, sess_options=_cpu_session_options(enable_all),
+                                        providers=providers)
+        except Exception as e:
+            debug_print(f"  ⚠️  Optimized YOLO graph cache unavailable ({e}), loading original model")
+            try:
+                os.remove(optimized_path)  # drop a corrupt/partial copy so the next load rebuilds it
+            except OSError:
+                pass
+            return ort.InferenceSession(model_path, sess_options=_cpu_session_options(enable_all),
+                                        providers=providers)
+    
     def reset(self):
         """Reset the model cache to force reload"""
         self._session = None
@@ -148,10 +188,21 @@ def load_and_prepare_image_ultra_fast(img_path, max_resolution, enable_timing=Tr
         debug_print(f"📸 YOLO: Loading and preparing image: {img_path}")
     
     load_start = time.time()
-    # Load directly as BGR (OpenCV native format)
-    img_bgr = cv2.imread(img_path, cv2.IMREAD_COLOR)
+    if img_path.endswith('.npy'):
+        # Raw BGR array saved with np.save - memory-mapped, no decode
+        img_bgr = np.load(img_path, mmap_mode='r')
+    else:
+        # Load directly as BGR (OpenCV native format)
+        img_bgr = cv2.imread(img_path, cv2.IMREAD_COLOR)
     load_time = time.time() - load_start
     
+    return prepare_bgr_ultra_fast(img_bgr, max_resolution, enable_timing, start_time, load_time)
+
+def prepare_bgr_ultra_fast(img_bgr, max_resolution, enable_timing=True, start_time=None, load_time=0.0):
+    """🚀 Same preprocessing as load_and_prepare_image_ultra_fast for an in-memory BGR array (no file I/O)"""
+    if start_time is None:
+        start_time = time.time()
+    
     orig_h, orig_w = img_bgr.shape[:2]
     target_w = min(round_to_multiple(orig_w, 32), max_resolution[0])
     target_h = min(round_to_multiple(orig_h, 32), max_resolution[1])
@@ -433,13 +484,18 @@ class YOLODetector:
         """
         Run YOLO detection on image
         Args:
-            image_input: str (file path) or PIL.Image
+            image_input: str (file path), BGR numpy array or PIL.Image
         """
         if isinstance(image_input, str):
             # File path - use existing fast loading
             input_tensor, input_size, orig_size, scaling_factors, content_image = load_and_prepare_image_ultra_fast(
                 image_input, self.config.max_resolution, self.config.enable_timing
             )
+        elif isinstance(image_input, np.ndarray):
+            # BGR array already in memory - same preprocessing as the file path, minus the read
+            input_tensor, input_size, orig_size, scaling_factors, content_image = prepare_bgr_ultra_fast(
+                image_input, self.config.max_resolution, self.config.enable_timing
+            )
         else:
             # PIL Image - use new PIL loading
             input_tensor, input_size, orig_size, scaling_factors, content_image = load_and_prepare_image_from_pil(
@@ -497,18 +553,21 @@ class YOLODetector:
         
         return detections
     
-    def detect_batch(self, image_paths: List[str]) -> List[List[Dict[str, Any]]]:
+    def detect_batch(self, image_paths: Union[List[Union[str, np.ndarray]], np.ndarray]) -> List[List[Dict[str, Any]]]:
         """
         🚀 NEW: Efficient batch processing for multiple images
+        Args:
+            image_paths: file paths and/or BGR numpy arrays already in memory,
+                         or one stacked (N, H, W, 3) BGR uint8 array
         """
-        if not image_paths:
+        if len(image_paths) == 0:
             return []
         
         total_start = time.time()
         
         if self.config.enable_timing:
             debug_print(f"\n🚀 Starting YOLO BATCH detection pipeline...")
-            debug_print(f"  Images: {len(image_paths)} files")
+            debug_print(f"  Images: {len(image_paths)}")
             debug_print(f"🤖 Model: {self.config.model_path}")
             if self.config.enable_content_filtering:
                 debug_print(f"🚀 Content filtering: ENABLED (min pixels: {self.config.min_content_pixels})")
@@ -520,16 +579,23 @@ class YOLODetector:
         content_images = []
         image_metas = []
         
-        for img_path in image_paths:
+        for i, img_input in enumerate(image_paths):
             try:
-                input_tensor, input_size, orig_size, scaling_factors, content_image = load_and_prepare_image_ultra_fast(
-                    img_path, self.config.max_resolution, enable_timing=False
-                )
+                if isinstance(img_input, np.ndarray):
+                    # BGR array already in memory - skip the disk round-trip
+                    input_tensor, input_size, orig_size, scaling_factors, content_image = prepare_bgr_ultra_fast(
+                        img_input, self.config.max_resolution, enable_timing=False
+                    )
+                else:
+                    input_tensor, input_size, orig_size, scaling_factors, content_image = load_and_prepare_image_ultra_fast(
+                        img_input, self.config.max_resolution, enable_timing=False
+                    )
                 input_tensors.append(input_tensor)
                 content_images.append(content_image)
                 image_metas.append((input_size, orig_size, scaling_factors))
             except Exception as e:
-                debug_print(f"⚠️  Error loading {img_path}: {e}")
+                label = img_input if isinstance(img_input, str) else f"image #{i}"
+                debug_print(f"⚠️  Error loading {label}: {e}")
                 input_tensors.append(None)
                 content_images.append(None)
                 image_metas.append(None)
@@ -552,7 +618,7 @@ class YOLODetector:
         all_detections = []
         valid_idx = 0
         
-        for i, (img_path, meta) in enumerate(zip(image_paths, image_metas)):
+        for i, meta in enumerate(image_metas):
             if meta is None:
                 all_detections.append([])
                 continue
@@ -599,6 +665,25 @@ class YOLODetector:
         
         return all_detections
     
+    def warmup(self, image_size: Tuple[int, int] = (640, 640), runs: int = 2, batch_size: int = 1):
+        """
+        Run a few dummy forward passes so session load and first-run allocations
+        don't land in the first timed call
+        Args:
+            image_size: (width, height) of the input to warm up with, rounded to multiples of 32
+        """
+        start = time.time()
+        session, input_name = model_cache.get_session(self.config.model_path)
+        
+        width = min(round_to_multiple(image_size[0], 32), self.config.max_resolution[0])
+        height = min(round_to_multiple(image_size[1], 32), self.config.max_resolution[1])
+        dummy = np.zeros((batch_size, 3, height, width), dtype=np.float32)
+        for _ in range(runs):
+            session.run(None, {input_name: dummy})
+        
+        if self.config.enable_timing:
+            debug_print(f"  🔥 YOLO warm-up ({runs}x {width}x{height}, batch {batch_size}): {time.time() - start:.3f}s")
+    
     def reset_model_cache(self):
         """Reset the model cache"""
         model_cache.reset()
@@ -829,12 +914,12 @@ def process_batch(detector, args):
             if args.output_dir:
                 base_name = os.path.splitext(os.path.basename(image_path))[0]
                 output_file = os.path.join(args.output_dir, f"{base_name}_detections.json")
-                with open(output_file, 'w') as f:
+                with open(output_file, 'w', encoding='utf-8') as f:
                     json.dump({
                         "image": image_path,
                         "detections": detections,
                         "count": len(detections)
-                    }, f, indent=2)
+                    }, f, indent=2, ensure_ascii=False)
                 if not args.quiet:
                     debug_print(f"  💾 Saved results to: {output_file}")
             